@@ -1,15 +1,47 @@
-import os
 import sys
+import threading
+import time
 
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QObject, QRunnable, QThreadPool, QTimer
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QComboBox,
     QSlider, QPushButton, QVBoxLayout, QFormLayout,
-    QScrollArea, QMessageBox, QFrame  # Import QScrollArea
+    QScrollArea, QMessageBox, QFrame, QProgressBar  # Import QScrollArea
 )
 
-import drone_selector
-import location
+# Only Qt and the standard library load before the window is shown. The recommender
+# (drone_selector, recommendation_table: pandas, scikit-learn) and location (requests)
+# are imported where they are used, and warm_up_engine loads them in the background.
+# The form's choices and transform_user_input are shared with recommendation_table.
+from form_input import (
+    PORT_SIZES, PORT_LOCATIONS, CAMERA_RESOLUTIONS, CARGO_OPTIONS, TRANSMISSION_OPTIONS,
+    SENSOR_OPTIONS, NIGHT_USAGE_OPTIONS, transform_user_input
+)
+
+DEFAULT_PROFILE = "default"  # drone_selector.DEFAULT_PROFILE; the other profiles are listed after the warm-up
+
+
+# --- Engine Warm-up ---
+def warm_up_engine():
+    """
+    Imports the recommender, loads the catalog, its neighbour index and the recommendation table.
+
+    Returns:
+        list[str]: The weights profile names.
+    """
+    import drone_selector
+    import recommendation_table
+
+    profiles = drone_selector.weights_profiles
+    drone_selector.get_catalog().warm(profiles.get())
+    recommendation_table.get_table()
+    return profiles.names()
+
+
+class WarmupSignals(QObject):
+    """Signals of the background engine warm-up."""
+    finished = Signal(list, float)
+    failed = Signal(str)
 
 
 class ModernSlider(QWidget):
@@ -79,6 +111,54 @@ class ModernSlider(QWidget):
         return self.slider.value()
 
 
+class RecommendationSignals(QObject):
+    """Signals emitted by a RecommendationWorker; each carries the id of the submission it belongs to."""
+    progress = Signal(int, str)
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class RecommendationWorker(QRunnable):
+    """Runs transform_user_input and get_top_drones off the Qt main thread."""
+
+    def __init__(self, request_id, user_input_from_ui, profile_name):
+        super().__init__()
+        self.request_id = request_id
+        self.user_input_from_ui = user_input_from_ui
+        self.profile_name = profile_name
+        self.signals = RecommendationSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Marks the submission as dropped; its result is discarded once the current step returns."""
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        try:
+            self.signals.progress.emit(self.request_id, "Fetching weather data...")
+            user_input = transform_user_input(self.user_input_from_ui)
+            if self.is_cancelled():
+                return
+            self.signals.progress.emit(self.request_id, "Scoring drones...")
+            # Waits for the warm-up's import if it is still running
+            import drone_selector
+            import recommendation_table
+
+            # Parsed once and reloaded only when the profile's file changes
+            weights_gui = drone_selector.weights_profiles.get(self.profile_name)
+            # Inputs on the precomputed grid are answered from the table, the rest are scored live
+            res = recommendation_table.recommend(user_input, weights_gui, table=recommendation_table.get_table())
+            if self.is_cancelled():
+                return
+            self.signals.finished.emit(self.request_id, res)
+        except Exception as e:
+            if not self.is_cancelled():
+                self.signals.failed.emit(self.request_id, str(e))
+
+
 class DronePortConfig(QWidget):
     def __init__(self):
         super().__init__()
@@ -112,17 +192,16 @@ class DronePortConfig(QWidget):
 
 
         # --- Widgets ---
-        self.port_size_combo = self._create_styled_combobox(["Small", "Medium", "Big", "Very Big"])
+        self.port_size_combo = self._create_styled_combobox(PORT_SIZES)
         self.form_layout.addRow("Port Size:", self.port_size_combo)
 
-        self.port_location_combo = self._create_styled_combobox(["Baltic Sea", "West Mediterranean", "Central Mediterranean", "Adriatic Sea",
-                  "Great North Sea", "Celtic Sea", "Iberian Cost", "Aegean Sea", "Black Sea"])
+        self.port_location_combo = self._create_styled_combobox(PORT_LOCATIONS)
         self.form_layout.addRow("Port Location:", self.port_location_combo)
 
         self.budget_entry = self._create_styled_entry()
         self.form_layout.addRow("Budget (€):", self.budget_entry)
 
-        self.camera_combo = self._create_styled_combobox(["Low", "Average", "High", "Very High"])
+        self.camera_combo = self._create_styled_combobox(list(CAMERA_RESOLUTIONS))
         self.form_layout.addRow("Camera Performance:", self.camera_combo)
 
         self.battery_entry = self._create_styled_entry()
@@ -131,24 +210,27 @@ class DronePortConfig(QWidget):
         self.dimensions_entry = self._create_styled_entry()
         self.form_layout.addRow("Dimensions (cm³):", self.dimensions_entry)
 
-        self.cargo_combo = self._create_styled_combobox(["No", "Low Weight", "High Weight"])
+        self.cargo_combo = self._create_styled_combobox(CARGO_OPTIONS)
         self.form_layout.addRow("Cargo Capacity:", self.cargo_combo)
 
-        self.transmission_combo = self._create_styled_combobox(["No Transmission", "Slow", "Average", "High"])
+        self.transmission_combo = self._create_styled_combobox(TRANSMISSION_OPTIONS)
         self.form_layout.addRow("Data Transmission:", self.transmission_combo)
 
         self.storage_entry = self._create_styled_entry()
         self.form_layout.addRow("Storage (GB):", self.storage_entry)
 
-        self.air_water_combo = self._create_styled_combobox(["Yes", "No"])
+        self.air_water_combo = self._create_styled_combobox(SENSOR_OPTIONS)
         self.form_layout.addRow("Air/Water Sensors:", self.air_water_combo)
 
-        self.night_combo = self._create_styled_combobox(["Yes", "No", "Occasionally"])
+        self.night_combo = self._create_styled_combobox(NIGHT_USAGE_OPTIONS)
         self.form_layout.addRow("Night usage", self.night_combo)
 
         self.charging_entry = self._create_styled_entry()
         self.form_layout.addRow("Charging Time (min):", self.charging_entry)
 
+        self.profile_combo = self._create_styled_combobox([DEFAULT_PROFILE])
+        self.form_layout.addRow("Weights Profile:", self.profile_combo)
+
         # Add the form layout to the main layout of the container widget
         self.main_layout.addLayout(self.form_layout)
 
@@ -183,11 +265,99 @@ class DronePortConfig(QWidget):
         self.submit_button.clicked.connect(self.submit_form)
         self.main_layout.addWidget(self.submit_button, alignment=Qt.AlignCenter) # Center the button
 
+        # --- Request Progress ---
+        # Recommendations run in a worker thread; a newer submission supersedes the running one
+        self.status_label = QLabel("")
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setStyleSheet("color: #bbbbcc; font-size: 14px;")
+        self.main_layout.addWidget(self.status_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # Busy indicator, the pipeline has no measurable percentage
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setFixedHeight(6)
+        self.progress_bar.setStyleSheet("""
+            QProgressBar {
+                background-color: #2b2b40;
+                border: none;
+                border-radius: 3px;
+            }
+            QProgressBar::chunk {
+                background-color: #4e94f3;
+                border-radius: 3px;
+            }
+        """)
+        self.progress_bar.hide()
+        self.main_layout.addWidget(self.progress_bar)
+
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setStyleSheet("""
+            QPushButton {
+                background-color: #ff6b6b;
+                color: #ffffff;
+                padding: 8px 20px;
+                border: none;
+                border-radius: 8px;
+                font-weight: bold;
+                font-size: 14px;
+            }
+            QPushButton:hover {
+                background-color: #e63946;
+            }
+        """)
+        self.cancel_button.clicked.connect(self.cancel_request)
+        self.cancel_button.hide()
+        self.main_layout.addWidget(self.cancel_button, alignment=Qt.AlignCenter)
+
+        self.thread_pool = QThreadPool(self)
+        self.request_counter = 0
+        self.active_worker = None
+
         # Set the scroll area as the main layout for the window
         self.window_layout = QVBoxLayout(self)
         self.window_layout.addWidget(self.scroll_area)
         self.window_layout.setContentsMargins(0, 0, 0, 0) # Remove margins around the scroll area
 
+        # --- Background Warm-up ---
+        # Started once the window has painted, so the imports never delay it: the recommender and
+        # catalog load, and every port region's weather is fetched, while the form is filled in
+        self.warmup_signals = WarmupSignals()
+        self.warmup_signals.finished.connect(self.on_warmup_finished)
+        self.warmup_signals.failed.connect(self.on_warmup_failed)
+        self.engine_warmup_thread = None
+        self.weather_prefetch_thread = None
+        QTimer.singleShot(0, self.start_warmup)
+
+    def start_warmup(self):
+        self.engine_warmup_thread = threading.Thread(target=self.warm_up_engine, daemon=True)
+        self.engine_warmup_thread.start()
+        self.weather_prefetch_thread = threading.Thread(target=self.prefetch_weather, daemon=True)
+        self.weather_prefetch_thread.start()
+
+    def warm_up_engine(self):
+        start = time.perf_counter()
+        try:
+            names = warm_up_engine()
+        except Exception as e:
+            self.warmup_signals.failed.emit(str(e))
+            return
+        self.warmup_signals.finished.emit(names, time.perf_counter() - start)
+
+    def on_warmup_finished(self, names, seconds):
+        for name in names:
+            if self.profile_combo.findText(name) < 0:
+                self.profile_combo.addItem(name)
+        print(f"Engine warm-up finished in {seconds:.2f}s")
+
+    def on_warmup_failed(self, message):
+        # A submission retries the same steps and reports the error to the user
+        print(f"Warning: Engine warm-up failed: {message}")
+
+    def prefetch_weather(self):
+        import location
+
+        _, timings = location.prefetch_weather()
+        print(f"Weather prefetch for {len(timings['per_region_s'])} regions finished in {timings['wall_clock_s']}s")
 
     def _create_styled_entry(self):
         """Helper to create consistently styled QLineEdit."""
@@ -238,49 +408,6 @@ class DronePortConfig(QWidget):
         """)
         return combo
 
-    def load_weights_from_file(self):
-        filepath = "weights.conf"
-        weights = {}
-        if not os.path.exists(filepath):
-            print(f"Error: Weight configuration file '{filepath}' not found.")
-            print("Please create the file with the correct weights.")
-            # Return an empty dict or raise an error, depending on desired behavior
-            # For now, let's return a default (empty) dict to avoid crashing
-            return {}
-
-        with open(filepath, 'r') as f:
-            # Skip comment lines
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-
-                try:
-                    # Expecting format: "Criterion Name": Value
-                    # Find the first colon to split key and value
-                    parts = line.split(':', 1)
-                    if len(parts) != 2:
-                        print(f"Warning: Skipping malformed line in weights file: {line}")
-                        continue
-
-                    key_str = parts[0].strip()
-                    value_str = parts[1].strip()
-
-                    # Remove quotes from the key string if present
-                    if key_str.startswith('"') and key_str.endswith('"'):
-                        key = key_str[1:-1]
-                    else:
-                        key = key_str  # Or raise an error if quotes are mandatory
-
-                    weight = float(value_str)
-                    weights[key] = weight
-                except ValueError:
-                    print(f"Warning: Skipping line with invalid weight value: {line}")
-                except Exception as e:
-                    print(f"An unexpected error occurred while parsing line: {line} - {e}")
-        return weights
-
-
     def submit_form(self):
         print("--- Form Submitted ---")
         # Access the values from the input fields
@@ -315,14 +442,8 @@ class DronePortConfig(QWidget):
 
 
 
-        resolution_map = {
-            "Low": "480p",
-            "Average": "720p",
-            "High": "1080p",
-            "Very High": "4K"
-        }
         # Get the numerical value, default to 0 if text is not found (shouldn't happen with combobox)
-        camera_performance_mapped = resolution_map.get(camera_performance, "480p") # Default to "480p"
+        camera_performance_mapped = CAMERA_RESOLUTIONS.get(camera_performance, "480p") # Default to "480p"
 
 
         # Collect data into a dictionary
@@ -342,9 +463,42 @@ class DronePortConfig(QWidget):
             "Cargo": cargo
         }
 
-        weights_gui = self.load_weights_from_file()
+        self.cancel_request()
+        self.request_counter += 1
+        worker = RecommendationWorker(self.request_counter, user_input_from_ui, self.profile_combo.currentText())
+        worker.signals.progress.connect(self.on_request_progress)
+        worker.signals.finished.connect(self.on_request_finished)
+        worker.signals.failed.connect(self.on_request_failed)
+        self.active_worker = worker
+        self.status_label.setText("Starting...")
+        self.progress_bar.show()
+        self.cancel_button.show()
+        self.thread_pool.start(worker)
+
+    def cancel_request(self):
+        """Drops the running submission, if any. Its results will not be shown."""
+        if self.active_worker is not None:
+            self.active_worker.cancel()
+            self.active_worker = None
+        self.status_label.setText("")
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+
+    def _is_current_request(self, request_id):
+        return self.active_worker is not None and self.active_worker.request_id == request_id
+
+    def on_request_progress(self, request_id, message):
+        if self._is_current_request(request_id):
+            self.status_label.setText(message)
+
+    def on_request_finished(self, request_id, res):
+        if not self._is_current_request(request_id):
+            return  # Superseded or cancelled submission
+        self.active_worker = None
+        self.status_label.setText("")
+        self.progress_bar.hide()
+        self.cancel_button.hide()
 
-        res = drone_selector.get_top_drones(transform_user_input(user_input_from_ui), weights_gui)
         for drone in res:
             print(f"\nDrone ID: {drone['Drone ID']}")
             print(f"Total Score: {drone['Total Score (%)']}%")
@@ -357,89 +511,14 @@ class DronePortConfig(QWidget):
         else:
             QMessageBox.information(self, "No Results", "No drones were recommended based on your criteria.")
 
-
-def transform_user_input(user_input_gui):
-    radius_map = {
-        "Small": [1, 150],
-        "Medium": [5, 400],
-        "Big": [7, 600],
-        "Very Big": [10, 800]
-    }
-
-    transmission_map = {
-        "No Transmission": [0, 0],
-        "Slow": [1, 20],
-        "Average": [1, 50],
-        "High": [1, 85]
-    }
-
-    loc = location.get_historical_weather_open_meteo(user_input_gui["Port Location"])
-    wind = loc["average_max_wind_kmh"]
-    temp = loc["average_min_temp_C"]
-    rtt = transmission_map.get(user_input_gui["Data Transmission"])[0]
-    speed = transmission_map.get(user_input_gui["Data Transmission"])[1]
-    radAndHeigh = radius_map.get(user_input_gui["Port Size"], -1)
-    radius = radAndHeigh[0]
-    height = radAndHeigh[1]
-    user_input = {
-        "Flight Radius": radius,
-        "Flight height": height,
-        "Thermal/Night Camera": 0.0 if user_input_gui["Night Vision"] == "No" else 1.0,
-        "Max wind resistance": wind,
-        "Budgets options": user_input_gui["Budget (€)"],
-        "Camera Quality": user_input_gui["Camera Performance"],
-        "ISO range": 25600 if user_input_gui["Night Vision"] == "Yes" else (
-            6400 if user_input_gui["Night Vision"] == "Occasionally" else 3200),
-        "Battery Life": user_input_gui["Battery Life (min)"],
-        "Payload Capacity": 0 if user_input_gui["Cargo"] == "No" else (
-            10 if user_input_gui["Cargo"] == "Low Weight" else 23),
-        "Dimensions": user_input_gui["Dimensions (cm³)"],
-        "Real-time data transmission": rtt,
-        "Transmission bandwidth": speed,
-        "Data storage ability": user_input_gui["Storage (GB)"],
-        "Air/Water quality sensor availability": 1 if user_input_gui["Air/Water Sensors"] == "Yes" else 0,
-        "Noise level": user_input_gui["Noise level"],
-        "Operating Temperature": temp,
-        "Class Identification Label": get_drone_class_from_volume(user_input_gui["Dimensions (cm³)"]),
-        "Charging Time": user_input_gui["Charging Time (min)"],
-        "Automatic Landing/Takeoff": 1,
-        "GPS Supported Systems": "GPS+Galileo",
-        "Automated Path Finding": 1 if int(user_input_gui["Budget (€)"]) >= 8000 else 0,
-    }
-
-    return user_input
-
-def get_drone_class_from_volume(volume_cm3: float) -> str:
-        """
-        Determines the drone class (C0 to C4) based on its volume in cm³.
-
-        Args:
-            volume_cm3 (float): The volume of the drone in cubic centimeters.
-
-        Returns:
-            str: The corresponding drone class (e.g., "C0", "C1", "C2", "C3", "C4").
-                 Returns "Unknown" if the input volume is not a valid number.
-        """
-        try:
-            volume = float(volume_cm3)
-        except (ValueError, TypeError):
-            print(f"Warning: Invalid volume input '{volume_cm3}'. Returning 'Unknown'.")
-            return "Unknown"
-
-        if volume <= 0:
-            # Drones must have a positive volume. Assign to smallest class or handle as error.
-            # For this function, we'll assign to C0 as the smallest possible class.
-            return "C0"
-        elif volume <= 5000:  # Up to 5000 cm³
-            return "C0"
-        elif volume <= 8750:  # From 5001 cm³ to 8750 cm³
-            return "C1"
-        elif volume <= 12500:  # From 8751 cm³ to 12500 cm³
-            return "C2"
-        elif volume <= 16250:  # From 12501 cm³ to 16250 cm³
-            return "C3"
-        else:  # Greater than 16250 cm³ (up to 20000 and beyond)
-            return "C4"
+    def on_request_failed(self, request_id, message):
+        if not self._is_current_request(request_id):
+            return
+        self.active_worker = None
+        self.status_label.setText("")
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+        QMessageBox.warning(self, "Error", f"Could not compute recommendations: {message}")
 
 
 class ResultsWindow(QWidget):
@@ -0,0 +1,284 @@
+# batch_scoring.py
+"""
+Batch scoring of a JSONL file of user inputs against the drone catalog.
+
+Each input line is either a bare user input dict (the shape form_input.transform_user_input
+produces) or {"id": ..., "user_input": {...}, "weights": {...}, "profile": "cargo"}. Lines
+without weights use their named weights profile, or the --profile one. Every line yields
+exactly one output line, in input order:
+the ranked drones, or an error.
+
+Records are read lazily and scored in chunks across a process pool. The catalog is
+loaded, and its index built, once in the parent before the pool starts; forked workers
+share it copy-on-write, and a compiled .dcat catalog is memory-mapped by every worker
+either way. At most 2 * processes chunks are in flight, so memory stays bounded
+however long the file is. Throughput and latency percentiles are printed at the end.
+
+Usage:
+    python batch_scoring.py requests.jsonl --output results.jsonl --processes 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import drone_selector
+
+DEFAULT_CHUNK_SIZE = 64
+LATENCY_PERCENTILES = [50, 90, 99]
+
+_worker_catalog = None
+_worker_options = None
+_worker_profiles = None
+
+
+# --- Records ---
+def parse_record(line, line_number, catalog_columns):
+    """
+    Parses one input line.
+
+    Returns:
+        dict: {"line", "id", "user_input", "weights", "profile"}, or {"line", "id", "error"} if the line
+              is not valid JSON or has no catalog feature to score.
+    """
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"line": line_number, "id": None, "error": f"Invalid JSON: {e}"}
+    if not isinstance(record, dict):
+        return {"line": line_number, "id": None, "error": "Expected a JSON object"}
+
+    record_id = record.get("id", line_number)
+    if "user_input" in record:
+        user_input = record["user_input"]
+    else:
+        user_input = {key: value for key, value in record.items() if key not in ("id", "weights", "profile")}
+    if not isinstance(user_input, dict) or not any(key in catalog_columns for key in user_input):
+        return {"line": line_number, "id": record_id, "error": "No catalog feature in the user input"}
+    return {"line": line_number, "id": record_id, "user_input": user_input, "weights": record.get("weights"),
+            "profile": record.get("profile")}
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def result_to_json(drone, explain=False):
+    """Converts one get_top_drones result to a JSON-serializable dict."""
+    result = {key: _json_value(value) for key, value in drone.items() if key != "Explanation"}
+    if explain:
+        result["Explanation"] = [{key: _json_value(value) for key, value in record.items()}
+                                 for record in drone["Explanation"].records()]
+    return result
+
+
+# --- Workers ---
+def _init_worker(catalog_path, options):
+    global _worker_catalog, _worker_options, _worker_profiles
+    # Under fork the parent's loaded catalog is inherited, and refresh() only checks the file's mtime
+    _worker_catalog = drone_selector.get_catalog(catalog_path)
+    _worker_options = options
+    _worker_profiles = drone_selector.WeightsProfileStore(options["weights_path"])
+
+
+def score_chunk(records, catalog=None, options=None, profiles=None):
+    """
+    Scores a chunk of parsed records, batching those that share weights or a weights profile.
+
+    Returns:
+        tuple: The output dict of every record, in order, and the seconds spent scoring.
+    """
+    catalog = _worker_catalog if catalog is None else catalog
+    options = _worker_options if options is None else options
+    profiles = _worker_profiles if profiles is None else profiles
+    start = time.perf_counter()
+    outputs = [None] * len(records)
+    groups = {}
+    for position, record in enumerate(records):
+        if record["weights"]:
+            key, weights = json.dumps(record["weights"], sort_keys=True), record["weights"]
+        else:
+            name = record["profile"] or options["profile"]
+            try:
+                key, weights = f"profile:{name}", profiles.get(name)
+            except KeyError as e:
+                outputs[position] = {"id": record["id"], "line": record["line"], "error": str(e.args[0])}
+                continue
+        groups.setdefault(key, (weights, []))[1].append(position)
+
+    for weights, positions in groups.values():
+        _score_group(records, positions, weights, catalog, options, outputs)
+    return outputs, time.perf_counter() - start
+
+
+def _score_group(records, positions, weights, catalog, options, outputs):
+    """Scores the records at positions in one batch; if the batch fails, each record is rescored on its own."""
+    try:
+        ranked = drone_selector.get_top_drones_batch(
+            [records[position]["user_input"] for position in positions], weights, k=options["k"],
+            W_knn=options["W_knn"], W_detailed=options["W_detailed"], top_n=options["top_n"],
+            catalog=catalog, exact=options["exact"], constraints=options["constraints"])
+    except Exception as e:
+        if len(positions) > 1:
+            # One bad value fails the whole batch; only its own record should get the error
+            for position in positions:
+                _score_group(records, [position], weights, catalog, options, outputs)
+            return
+        outputs[positions[0]] = {"id": records[positions[0]]["id"], "line": records[positions[0]]["line"],
+                                 "error": f"{type(e).__name__}: {e}"}
+        return
+    for position, drones in zip(positions, ranked):
+        outputs[position] = {"id": records[position]["id"], "line": records[position]["line"],
+                             "results": [result_to_json(drone, options["explain"]) for drone in drones]}
+
+
+# --- Driver ---
+def _iter_chunks(lines, catalog_columns, chunk_size):
+    """Yields lists of (parsed record, read timestamp), chunk_size records at a time."""
+    chunk = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        chunk.append((parse_record(line, line_number, catalog_columns), time.perf_counter()))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _valid_records(chunk):
+    return [record for record, _ in chunk if "error" not in record]
+
+
+def _mp_context():
+    # fork lets the workers share the parent's preloaded catalog
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def run_batch(input_path, output_path, profile=None, weights_path=drone_selector.WEIGHTS_PATH,
+              catalog_path=drone_selector.CATALOG_PATH, processes=1,
+              chunk_size=DEFAULT_CHUNK_SIZE, k=8, W_knn=0.6, W_detailed=0.4, top_n=3, exact=False,
+              constraints=None, explain=False):
+    """
+    Streams input_path through the recommender and writes one result line per record to output_path.
+
+    Args:
+        input_path (str): JSONL file of user inputs.
+        output_path (str): JSONL file to write.
+        profile (str, optional): Weights profile for records that name none; defaults to weights_path.
+        weights_path (str): The default weights file; named profiles sit next to it.
+        catalog_path (str): The drones catalog, CSV or compiled.
+        processes (int): Worker processes; 1 scores in the calling process.
+        chunk_size (int): Records per task sent to a worker.
+        k, W_knn, W_detailed, top_n, exact, constraints: As in get_top_drones.
+        explain (bool): Include the structured explanation records in the output.
+
+    Returns:
+        dict: Records, errors, wall-clock seconds, throughput, and the per-record latency
+              (read to written) and per-chunk scoring time percentiles in milliseconds.
+    """
+    options = {"profile": profile, "weights_path": weights_path, "k": k, "W_knn": W_knn, "W_detailed": W_detailed,
+               "top_n": top_n, "exact": exact, "constraints": constraints, "explain": explain}
+    catalog = drone_selector.get_catalog(catalog_path)
+    profiles = drone_selector.WeightsProfileStore(weights_path)
+    catalog.warm(profiles.get(profile))
+    catalog_columns = set(catalog.column_names)
+
+    start = time.perf_counter()
+    latencies, chunk_seconds = [], []
+    n_records = n_errors = 0
+
+    with open(input_path, "r") as f_in, open(output_path, "w") as f_out:
+        def write_chunk(chunk, scored):
+            nonlocal n_records, n_errors
+            outputs, seconds = scored
+            outputs = iter(outputs)
+            chunk_seconds.append(seconds)
+            for record, read_at in chunk:
+                # Parse errors never reach a worker; interleave them back in input order
+                output = {key: record[key] for key in ("id", "line", "error")} if "error" in record \
+                    else next(outputs)
+                n_errors += "error" in output
+                f_out.write(json.dumps(output) + "\n")
+                latencies.append(time.perf_counter() - read_at)
+            n_records += len(chunk)
+
+        chunks = _iter_chunks(f_in, catalog_columns, chunk_size)
+        if processes <= 1:
+            for chunk in chunks:
+                write_chunk(chunk, score_chunk(_valid_records(chunk), catalog, options, profiles))
+        else:
+            with ProcessPoolExecutor(max_workers=processes, mp_context=_mp_context(), initializer=_init_worker,
+                                     initargs=(catalog_path, options)) as executor:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append((chunk, executor.submit(score_chunk, _valid_records(chunk))))
+                    if len(pending) >= 2 * processes:
+                        chunk, future = pending.popleft()
+                        write_chunk(chunk, future.result())
+                while pending:
+                    chunk, future = pending.popleft()
+                    write_chunk(chunk, future.result())
+
+    wall_clock_s = time.perf_counter() - start
+    return {
+        "records": n_records,
+        "errors": n_errors,
+        "wall_clock_s": wall_clock_s,
+        "records_per_s": n_records / wall_clock_s if wall_clock_s > 0 else 0.0,
+        "latency_ms": _percentiles(latencies),
+        "chunk_scoring_ms": _percentiles(chunk_seconds),
+    }
+
+
+def _percentiles(seconds):
+    if not seconds:
+        return {}
+    values = np.asarray(seconds) * 1000.0
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in LATENCY_PERCENTILES}
+    summary["max"] = float(values.max())
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a JSONL file of user inputs against the drone catalog.")
+    parser.add_argument("input", help="JSONL file of user inputs.")
+    parser.add_argument("--output", default="results.jsonl")
+    parser.add_argument("--catalog", default=drone_selector.CATALOG_PATH, help="Catalog CSV or compiled .dcat.")
+    parser.add_argument("--weights", default=drone_selector.WEIGHTS_PATH,
+                        help="Default weights file; named profiles are weights.<name>.conf next to it.")
+    parser.add_argument("--profile", default=None, help="Weights profile for records that name none.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--k", type=int, default=8, help="Number of nearest neighbours.")
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--exact", action="store_true", help="Rank the whole catalog for every record.")
+    parser.add_argument("--constraints", nargs="*", choices=drone_selector.HARD_CONSTRAINTS, default=None)
+    parser.add_argument("--explain", action="store_true", help="Include structured explanations.")
+    args = parser.parse_args(argv)
+
+    stats = run_batch(args.input, args.output, profile=args.profile, weights_path=args.weights,
+                      catalog_path=args.catalog,
+                      processes=args.processes, chunk_size=args.chunk_size, k=args.k, top_n=args.top_n,
+                      exact=args.exact, constraints=args.constraints, explain=args.explain)
+    print(f"Scored {stats['records']} records ({stats['errors']} errors) in {stats['wall_clock_s']:.2f} s, "
+          f"{stats['records_per_s']:.1f} records/s")
+    for name in ("latency_ms", "chunk_scoring_ms"):
+        summary = "  ".join(f"{key} {value:.1f}" for key, value in stats[name].items())
+        print(f"  {name:<18} {summary}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# benchmark.py
+"""
+Benchmark of the drone selection pipeline across synthetic catalog sizes.
+
+Catalogs are produced by dataset_generator with the notebook's distributions.
+
+Every stage of a get_top_drones query is timed on its own, and the peak
+memory of each stage is recorded in a separate tracemalloc pass so it does
+not distort the timings. Results are written as JSON for comparing runs.
+
+Usage:
+    python benchmark.py --sizes 1000 10000 100000 1000000 --output bench_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.neighbors import NearestNeighbors
+
+import dataset_generator
+import drone_selector
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+BENCHMARK_USER_INPUT = {
+    "Flight Radius": 7.0,
+    "Flight height": 300.0,
+    "Thermal/Night Camera": 1,
+    "Max wind resistance": 10.0,
+    "Budgets options": 8000.0,
+    "Camera Quality": "4K",
+    "ISO range": 3200,
+    "Battery Life": 90.0,
+    "Payload Capacity": 10.0,
+    "Dimensions": 3000.0,
+    "Real-time data transmission": 1,
+    "Transmission bandwidth": 50.0,
+    "Data storage ability": 128,
+    "Air/Water quality sensor availability": 0,
+    "Noise level": 50.0,
+    "Operating Temperature": 20.0,
+    "Class Identification Label": "C2",
+    "Charging Time": 60.0,
+    "Automatic Landing/Takeoff": 1,
+    "GPS Supported Systems": "GPS+Galileo",
+    "Automated Path Finding": 1
+}
+
+
+class StageRecorder:
+    """Records the duration, or the tracemalloc peak, of each named pipeline stage."""
+
+    def __init__(self, measure_memory=False):
+        self.measure_memory = measure_memory
+        self.values = {}
+
+    @contextmanager
+    def stage(self, name):
+        if self.measure_memory:
+            tracemalloc.reset_peak()
+            start_current, _ = tracemalloc.get_traced_memory()
+            yield
+            _, peak = tracemalloc.get_traced_memory()
+            self.values[name] = max(0, peak - start_current)
+        else:
+            start = time.perf_counter()
+            yield
+            self.values[name] = time.perf_counter() - start
+
+
+def run_pipeline(csv_path, user_input_gui, weights_gui, recorder, k=8):
+    """Runs one cold get_top_drones query stage by stage."""
+    with recorder.stage("csv_load"):
+        df = pd.read_csv(csv_path)
+        for col in df.select_dtypes(include=np.number).columns:
+            df[col] = df[col].round(2)
+
+    with recorder.stage("preprocess_data"):
+        user_input_processed = drone_selector.preprocess_data(pd.DataFrame([user_input_gui])).iloc[0].to_dict()
+        df_processed = drone_selector.preprocess_data(df)
+
+    with recorder.stage("scale_features"):
+        df_scaled, user_scaled_vector, feature_names, _ = drone_selector.scale_features(
+            df_processed, user_input_processed)
+
+    with recorder.stage("prepare_knn_weights"):
+        knn_weights = drone_selector.prepare_knn_weights(feature_names, user_input_gui.keys(), weights_gui)
+        sqrt_knn_weights = np.sqrt(knn_weights)
+        weighted_features = np.nan_to_num(df_scaled[feature_names].to_numpy(dtype=float) * sqrt_knn_weights)
+        user_weighted_vector = np.nan_to_num(user_scaled_vector * sqrt_knn_weights)
+
+    with recorder.stage("knn_fit"):
+        model = NearestNeighbors(n_neighbors=k, metric="euclidean")
+        model.fit(weighted_features)
+
+    with recorder.stage("knn_query"):
+        _, indices = model.kneighbors(user_weighted_vector.reshape(1, -1), n_neighbors=min(k, len(df)))
+
+    with recorder.stage("fuzzy_scoring"):
+        candidates = df.iloc[indices[0]]
+        drone_selector.score_fuzzy_criteria(candidates, user_input_gui, weights_gui, with_labels=False)
+
+    with recorder.stage("fuzzy_scoring_full_catalog"):
+        drone_selector.score_fuzzy_criteria(df, user_input_gui, weights_gui, with_labels=False)
+
+    with recorder.stage("explanations"):
+        explanation_set = drone_selector.ExplanationSet(
+            candidates, df_scaled[feature_names].iloc[indices[0]].to_numpy(dtype=float), feature_names,
+            user_input_gui, user_scaled_vector, weights_gui, np.linalg.norm(sqrt_knn_weights) or 1.0, 0.6, 0.4)
+        for position in range(len(candidates)):
+            explanation_set.render(position)
+
+    catalog = drone_selector.DroneCatalog(csv_path)
+    catalog.refresh()
+    drone_selector.get_top_drones(user_input_gui, weights_gui, k=k, catalog=catalog)
+    with recorder.stage("warm_catalog_query"):
+        drone_selector.get_top_drones(user_input_gui, weights_gui, k=k, catalog=catalog)
+
+
+def benchmark_size(n, weights_gui, repeat=3, seed=123, measure_memory=True, k=8):
+    """
+    Benchmarks every pipeline stage on a synthetic catalog of n drones.
+
+    Returns:
+        dict: The catalog size, the median seconds per stage, and (optionally) the peak
+              bytes allocated per stage.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "drones_dataset.csv")
+        dataset_generator.write_catalog(csv_path, n, seed=seed, include_real_drones=False)
+
+        timings = []
+        for _ in range(repeat):
+            recorder = StageRecorder()
+            run_pipeline(csv_path, BENCHMARK_USER_INPUT, weights_gui, recorder, k=k)
+            timings.append(recorder.values)
+
+        peak_bytes = {}
+        if measure_memory:
+            recorder = StageRecorder(measure_memory=True)
+            tracemalloc.start()
+            try:
+                run_pipeline(csv_path, BENCHMARK_USER_INPUT, weights_gui, recorder, k=k)
+            finally:
+                tracemalloc.stop()
+            peak_bytes = recorder.values
+
+    stages = {}
+    for name in timings[0]:
+        stages[name] = {"seconds": float(np.median([run[name] for run in timings]))}
+        if name in peak_bytes:
+            stages[name]["peak_bytes"] = int(peak_bytes[name])
+    return {"n_drones": n, "stages": stages}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the drone selection pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalog sizes to benchmark.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per size; the median is reported.")
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--k", type=int, default=8, help="Number of nearest neighbours.")
+    parser.add_argument("--weights", default="weights.conf")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass.")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    weights_gui = drone_selector.load_weights(args.weights)
+    results = []
+    for n in args.sizes:
+        result = benchmark_size(n, weights_gui, repeat=args.repeat, seed=args.seed,
+                                measure_memory=not args.no_memory, k=args.k)
+        results.append(result)
+        print(f"n={n}")
+        for name, stage in result["stages"].items():
+            memory = f"  peak {stage['peak_bytes'] / 2 ** 20:.1f} MiB" if "peak_bytes" in stage else ""
+            print(f"  {name:<28} {stage['seconds'] * 1000:10.2f} ms{memory}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "k": args.k,
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# catalog_format.py
+"""
+Binary columnar container used for compiled drone catalogs.
+
+Layout: an 8-byte magic, a uint32 format version and a uint64 header length,
+followed by a JSON header and then every array at a 64-byte aligned offset.
+The header records each array's dtype, shape, memory order and offset, so
+arrays are memory-mapped straight from the file without copying.
+
+Usage:
+    python catalog_format.py drones_dataset.csv drones_dataset.dcat
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"DRONECAT"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sIQ")
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_arrays(path, arrays, metadata):
+    """
+    Writes named arrays and a JSON-serializable metadata dict to a columnar file.
+
+    Two-dimensional arrays are stored in Fortran (column-major) order, so every
+    column is contiguous on disk and the matrix maps back without reordering.
+
+    Args:
+        path (str): Output file. It is written to a temporary file and renamed into place.
+        arrays (dict): Name to np.ndarray.
+        metadata (dict): Extra information stored in the header.
+    """
+    arrays = {name: np.asfortranarray(array) for name, array in arrays.items()}
+    layout = {}
+    header = {"metadata": metadata, "arrays": layout}
+
+    # The header size depends on the offsets, so offsets are laid out relative to the data start first
+    relative_offset = 0
+    for name, array in arrays.items():
+        relative_offset = _align(relative_offset)
+        layout[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "order": "F" if array.ndim > 1 else "C",
+            "offset": relative_offset,
+        }
+        relative_offset += array.nbytes
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header_bytes) + 24 * len(layout))
+    for entry in layout.values():
+        entry["offset"] += data_start
+    header_bytes = json.dumps(header).encode("utf-8")
+    if _PREAMBLE.size + len(header_bytes) > data_start:
+        raise ValueError("Catalog header does not fit in the reserved space")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(layout[name]["offset"])
+            f.write(array.tobytes(order="A"))
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    """Returns the parsed JSON header of a columnar file."""
+    with open(path, "rb") as f:
+        magic, version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled drone catalog")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog format version {version} in {path}")
+        return json.loads(f.read(header_length).decode("utf-8"))
+
+
+def read_arrays(path):
+    """
+    Memory-maps every array of a columnar file read-only.
+
+    Returns:
+        tuple: The metadata dict and a dict of name to read-only np.memmap.
+    """
+    header = read_header(path)
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        shape = tuple(entry["shape"])
+        if 0 in shape:
+            arrays[name] = np.empty(shape, dtype=np.dtype(entry["dtype"]), order=entry["order"])
+            continue
+        arrays[name] = np.memmap(path, dtype=np.dtype(entry["dtype"]), mode="r", offset=entry["offset"],
+                                 shape=shape, order=entry["order"])
+    return header["metadata"], arrays
+
+
+def is_columnar_file(path):
+    """True if path starts with the compiled catalog magic."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+if __name__ == "__main__":
+    import sys
+
+    import drone_selector
+
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python catalog_format.py <catalog.csv> [<output.dcat>]")
+        sys.exit(1)
+    output = drone_selector.compile_catalog(*sys.argv[1:])
+    print(f"Compiled catalog written to {output}")
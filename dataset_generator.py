@@ -0,0 +1,295 @@
+# dataset_generator.py
+"""
+Synthetic drone catalog generator, extracted from dataset_generator.ipynb.
+
+Rows are generated in fixed-size chunks and appended to the CSV as soon as
+they are produced, so memory stays flat regardless of the catalog size. Each
+chunk draws from its own RNG stream spawned from the seed, which makes the
+output reproducible and independent of the number of worker processes.
+
+Usage:
+    python dataset_generator.py --rows 10000000 --seed 123 --processes 4 --output drones_dataset.csv
+"""
+
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 500_000
+
+drone_brands = [
+    "DJI", "Parrot", "Autel Robotics", "Skydio", "Yuneec", "Holy Stone", "Hubsan", "Ryze Tech", "PowerVision",
+    "Walkera", "3DR", "SenseFly", "Delair", "EHang", "Teledyne FLIR", "AgEagle", "Quantum Systems",
+    "AeroVironment", "Baykar", "Elbit Systems"
+]
+
+drone_names = [
+    "Noivern", "Porygon", "Rotom", "Accelgor", "Dragapult", "Galvantula", "Clawitzer", "Frosmoth", "Zeraora",
+    "Azelf", "Gliscor", "Golisopod", "Skarmory", "Hydreigon", "Volcarona", "Vikavolt", "Genesect", "Metagross"
+]
+
+cool_numbers = ["", "100", "200", "300", "500", "1000", "2000", "3000", "5000", "10000"]
+
+cool_letters = ["", "X", "e", "Z", "T", "S", "w", "M", "m", "f", "U"]
+
+# Every "<brand> <name> <number><letter>" combination, so a chunk of names is a single take()
+ALL_DRONE_NAMES = np.array([
+    f"{brand} {name} {number}{letter}"
+    for brand in drone_brands for name in drone_names for number in cool_numbers for letter in cool_letters
+], dtype=object)
+
+camera_score = {"480p": 1, "720p": 2, "1080p": 3, "4K": 4}
+gps_score = {
+    "GPS": 1,
+    "GPS+GLONASS": 2,
+    "GPS+BeiDou": 2,
+    "GPS+Galileo": 2.5,
+}
+
+# Upper bounds of the generating distributions. The notebook normalized by the observed column maxima
+# and quality-score range; a chunk cannot see the whole catalog, so the distribution bounds are used instead.
+MAX_BATTERY_LIFE = 600.0
+MAX_PAYLOAD_CAPACITY = 30.0
+MAX_BANDWIDTH = 100.0
+MAX_FLIGHT_RADIUS = 10.0
+MAX_FLIGHT_HEIGHT = 1000.0
+
+min_price = 500
+max_price = 15000
+
+real_drones = [
+    {
+        "Drone ID": "DJI Mavic 4 Pro", "Flight Radius": 15, "Flight height": 6000, "Thermal/Night Camera": 1,
+        "Max wind resistance": 15.0, "Camera Quality": "6K", "ISO range": 12800, "Battery Life": 51,
+        "Payload Capacity": 0.5, "Dimensions": 30000.0, "Real-time data transmission": 1,
+        "Transmission bandwidth": 20.0, "Data storage ability": 512, "Air/Water quality sensor availability": 0,
+        "Noise level": 60.0, "Operating Temperature": 40.0, "Class Identification Label": "C1",
+        "Charging Time": 90.0, "Automatic Landing/Takeoff": 1, "GPS Supported Systems": "GPS+GLONASS",
+        "Automated Path Finding": 1, "Budgets options": 2500,
+    },
+    {
+        "Drone ID": "Matrice 300 RTK", "Flight Radius": 15, "Flight height": 6000, "Thermal/Night Camera": 1,
+        "Max wind resistance": 15.0, "Camera Quality": "4K", "ISO range": 12800, "Battery Life": 55,
+        "Payload Capacity": 2.7, "Dimensions": 45000.0, "Real-time data transmission": 1,
+        "Transmission bandwidth": 18.0, "Data storage ability": 128, "Air/Water quality sensor availability": 1,
+        "Noise level": 70.0, "Operating Temperature": 45.0, "Class Identification Label": "C3",
+        "Charging Time": 120.0, "Automatic Landing/Takeoff": 1, "GPS Supported Systems": "GPS+GLONASS+RTK",
+        "Automated Path Finding": 1, "Budgets options": 12000,
+    },
+    {
+        "Drone ID": "Autel EVO Lite+", "Flight Radius": 10, "Flight height": 500, "Thermal/Night Camera": 0,
+        "Max wind resistance": 10.0, "Camera Quality": "6K", "ISO range": 6400, "Battery Life": 40,
+        "Payload Capacity": 0.2, "Dimensions": 10000.0, "Real-time data transmission": 1,
+        "Transmission bandwidth": 10.0, "Data storage ability": 128, "Air/Water quality sensor availability": 0,
+        "Noise level": 55.0, "Operating Temperature": 35.0, "Class Identification Label": "C1",
+        "Charging Time": 80.0, "Automatic Landing/Takeoff": 1, "GPS Supported Systems": "GPS",
+        "Automated Path Finding": 1, "Budgets options": 1600,
+    },
+    {
+        "Drone ID": "Skydio 2", "Flight Radius": 5, "Flight height": 100, "Thermal/Night Camera": 0,
+        "Max wind resistance": 8.0, "Camera Quality": "4K", "ISO range": 3200, "Battery Life": 23,
+        "Payload Capacity": 0.1, "Dimensions": 8000.0, "Real-time data transmission": 1,
+        "Transmission bandwidth": 8.0, "Data storage ability": 64, "Air/Water quality sensor availability": 0,
+        "Noise level": 50.0, "Operating Temperature": 30.0, "Class Identification Label": "C1",
+        "Charging Time": 60.0, "Automatic Landing/Takeoff": 1, "GPS Supported Systems": "GPS+GLONASS",
+        "Automated Path Finding": 1, "Budgets options": 1000,
+    },
+    {
+        "Drone ID": "Parrot Anafi USA", "Flight Radius": 7, "Flight height": 200, "Thermal/Night Camera": 1,
+        "Max wind resistance": 12.0, "Camera Quality": "4K", "ISO range": 12800, "Battery Life": 32,
+        "Payload Capacity": 0.3, "Dimensions": 12000.0, "Real-time data transmission": 1,
+        "Transmission bandwidth": 12.0, "Data storage ability": 64, "Air/Water quality sensor availability": 1,
+        "Noise level": 58.0, "Operating Temperature": 35.0, "Class Identification Label": "C2",
+        "Charging Time": 90.0, "Automatic Landing/Takeoff": 1, "GPS Supported Systems": "GPS+Galileo",
+        "Automated Path Finding": 1, "Budgets options": 7000,
+    },
+    {
+        "Drone ID": "RQ-11 Raven", "Flight Radius": 10, "Flight height": 150, "Thermal/Night Camera": 1,
+        "Max wind resistance": 10.0, "Camera Quality": "720p", "ISO range": 3200, "Battery Life": 90,
+        "Payload Capacity": 1.9, "Dimensions": 20000.0, "Real-time data transmission": 1,
+        "Transmission bandwidth": 5.0, "Data storage ability": 64, "Air/Water quality sensor availability": 0,
+        "Noise level": 45.0, "Operating Temperature": 40.0, "Class Identification Label": "C3",
+        "Charging Time": 120.0, "Automatic Landing/Takeoff": 1, "GPS Supported Systems": "GPS",
+        "Automated Path Finding": 0, "Budgets options": 45000,
+    },
+]
+
+
+def compute_quality_score(df):
+    """Weighted quality score used to price the generated drones."""
+    return (
+        df["Camera Quality"].map(camera_score) * 1.5 +
+        df["Battery Life"] / MAX_BATTERY_LIFE * 7.5 +
+        df["Payload Capacity"] / MAX_PAYLOAD_CAPACITY * 10.0 +
+        df["Real-time data transmission"] * 2 +
+        df["Air/Water quality sensor availability"] * 1 +
+        df["Automatic Landing/Takeoff"] * 1.5 +
+        df["Automated Path Finding"] * 2.5 +
+        df["Thermal/Night Camera"] * 1.5 +
+        df["GPS Supported Systems"].map(gps_score) * 1.0 +
+        df["Transmission bandwidth"] / MAX_BANDWIDTH * 1.5 +
+        df["Flight Radius"] / MAX_FLIGHT_RADIUS * 3.0 +
+        df["Flight height"] / MAX_FLIGHT_HEIGHT * 1.5
+    )
+
+
+# Quality-score range over the whole generating distribution, used to map scores to prices
+MIN_QUALITY_SCORE = float(compute_quality_score(pd.DataFrame({
+    "Camera Quality": ["480p"], "Battery Life": [20.0], "Payload Capacity": [0.1],
+    "Real-time data transmission": [0], "Air/Water quality sensor availability": [0],
+    "Automatic Landing/Takeoff": [0], "Automated Path Finding": [0], "Thermal/Night Camera": [0],
+    "GPS Supported Systems": ["GPS"], "Transmission bandwidth": [0.0], "Flight Radius": [0.0],
+    "Flight height": [200.0],
+})).iloc[0])
+MAX_QUALITY_SCORE = float(compute_quality_score(pd.DataFrame({
+    "Camera Quality": ["4K"], "Battery Life": [MAX_BATTERY_LIFE], "Payload Capacity": [MAX_PAYLOAD_CAPACITY],
+    "Real-time data transmission": [1], "Air/Water quality sensor availability": [1],
+    "Automatic Landing/Takeoff": [1], "Automated Path Finding": [1], "Thermal/Night Camera": [1],
+    "GPS Supported Systems": ["GPS+Galileo"], "Transmission bandwidth": [MAX_BANDWIDTH],
+    "Flight Radius": [MAX_FLIGHT_RADIUS], "Flight height": [MAX_FLIGHT_HEIGHT],
+})).iloc[0])
+
+
+def generate_chunk(n, rng):
+    """
+    Generates n synthetic drones with the distributions of dataset_generator.ipynb.
+
+    Args:
+        n (int): Number of rows.
+        rng (np.random.Generator): Random generator for this chunk.
+
+    Returns:
+        pd.DataFrame: The rows, with the same columns as drones_dataset.csv.
+    """
+    rtt = rng.integers(0, 2, n)
+    df = pd.DataFrame({
+        "Drone ID": ALL_DRONE_NAMES[rng.integers(0, len(ALL_DRONE_NAMES), n)],
+        "Flight Radius": rng.uniform(0.0, MAX_FLIGHT_RADIUS, n),  # km
+        "Flight height": np.clip(rng.normal(loc=500, scale=100, size=n), 200, MAX_FLIGHT_HEIGHT),  # m
+        "Thermal/Night Camera": rng.integers(0, 2, n),
+        "Max wind resistance": rng.uniform(20.0, 60.0, n),  # m/s
+        "Camera Quality": rng.choice(["480p", "720p", "1080p", "4K"], n),
+        "ISO range": rng.choice([100, 200, 400, 800, 1600, 3200, 6400, 12800, 25600], n),
+        "Battery Life": np.clip(rng.normal(loc=200, scale=100, size=n), 20, MAX_BATTERY_LIFE),  # min
+        "Payload Capacity": rng.uniform(0.1, MAX_PAYLOAD_CAPACITY, n),  # kg
+        "Dimensions": rng.uniform(1000.0, 20000.0, n),  # cm^3
+        "Real-time data transmission": rtt,
+        "Transmission bandwidth": np.where(rtt == 1, rng.uniform(1.0, MAX_BANDWIDTH, n), 0.0),  # Mbps
+        "Data storage ability": rng.choice([8, 16, 32, 64, 128, 256, 512, 1024], n),  # GB
+        "Air/Water quality sensor availability": rng.integers(0, 2, n),
+        "Noise level": rng.uniform(30.0, 90.0, n),  # dB
+        "Operating Temperature": rng.uniform(-20.0, 50.0, n),  # °C
+        "Class Identification Label": rng.choice(["C0", "C1", "C2", "C3", "C4"], n),
+        "Charging Time": rng.uniform(30.0, 240.0, n),  # min
+        "Automatic Landing/Takeoff": rng.integers(0, 2, n),
+        "GPS Supported Systems": rng.choice(["GPS", "GPS+GLONASS", "GPS+BeiDou", "GPS+Galileo"], n),
+        "Automated Path Finding": rng.integers(0, 2, n),
+    })
+
+    quality_score = compute_quality_score(df)
+    df["Budgets options"] = (
+        ((quality_score - MIN_QUALITY_SCORE) /
+         (MAX_QUALITY_SCORE - MIN_QUALITY_SCORE)) *
+        (max_price - min_price) + min_price
+    ).round(2)
+    return df
+
+
+def _chunk_sizes(rows, chunk_size):
+    return [min(chunk_size, rows - start) for start in range(0, rows, chunk_size)]
+
+
+def _generate_chunk_from_seed(n, seed_sequence):
+    return generate_chunk(n, np.random.default_rng(seed_sequence))
+
+
+def iter_chunks(rows, seed=123, chunk_size=DEFAULT_CHUNK_SIZE, processes=1):
+    """
+    Yields the catalog as DataFrame chunks, in order.
+
+    Chunk i always uses the i-th stream spawned from the seed, so the rows do not depend on
+    the number of processes. With several processes at most 2 * processes chunks are in flight.
+
+    Args:
+        rows (int): Total number of generated drones.
+        seed (int): Seed of the catalog.
+        chunk_size (int): Rows per chunk.
+        processes (int): Worker processes; 1 generates in the calling process.
+    """
+    sizes = _chunk_sizes(rows, chunk_size)
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if processes <= 1:
+        for n, seed_sequence in zip(sizes, seed_sequences):
+            yield _generate_chunk_from_seed(n, seed_sequence)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = deque()
+        for n, seed_sequence in zip(sizes, seed_sequences):
+            pending.append(executor.submit(_generate_chunk_from_seed, n, seed_sequence))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def generate_catalog(rows, seed=123, chunk_size=DEFAULT_CHUNK_SIZE, include_real_drones=True):
+    """Generates the whole catalog in memory; meant for small catalogs and tests."""
+    chunks = list(iter_chunks(rows, seed=seed, chunk_size=chunk_size))
+    if include_real_drones:
+        chunks.append(pd.DataFrame(real_drones))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_catalog(path, rows, seed=123, chunk_size=DEFAULT_CHUNK_SIZE, processes=1, include_real_drones=True):
+    """
+    Streams a generated catalog to a CSV file chunk by chunk.
+
+    Args:
+        path (str): Output CSV path.
+        rows (int): Number of generated drones (the real drones are added on top).
+        seed (int): Seed of the catalog.
+        chunk_size (int): Rows generated and written at a time.
+        processes (int): Worker processes used for generation.
+        include_real_drones (bool): Append the real drone models, as the notebook did.
+
+    Returns:
+        int: The number of rows written.
+    """
+    tmp_path = f"{path}.tmp"
+    written = 0
+    header = True
+    with open(tmp_path, "w", newline="") as f:
+        for chunk in iter_chunks(rows, seed=seed, chunk_size=chunk_size, processes=processes):
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+            written += len(chunk)
+        if include_real_drones:
+            pd.DataFrame(real_drones).to_csv(f, index=False, header=header)
+            written += len(real_drones)
+    os.replace(tmp_path, path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic drone catalog CSV.")
+    parser.add_argument("--rows", type=int, default=50, help="Number of synthetic drones.")
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--no-real-drones", action="store_true", help="Do not append the real drone models.")
+    parser.add_argument("--output", default="drones_dataset.csv")
+    args = parser.parse_args(argv)
+
+    written = write_catalog(args.output, args.rows, seed=args.seed, chunk_size=args.chunk_size,
+                            processes=args.processes, include_real_drones=not args.no_real_drones)
+    print(f"Wrote {written} drones to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
 # drone_selector.py
 
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.neighbors import NearestNeighbors
-import skfuzzy as fuzz
 
-# from skfuzzy import control as ctrl # Not strictly needed for this direct fuzzy logic
+import catalog_format
+import membership
+import metrics
+import nn_backends
+import skyline
 
 # Constants
 CATEGORICAL_FEATURES = [
@@ -23,34 +35,59 @@ TEXTUAL_FEATURES = [
     "GPS Supported Systems"
 ]
 
+ONE_HOT_FEATURES = [
+    "Class Identification Label",
+    "GPS Supported Systems"
+]
+
+CAMERA_QUALITY_MAP = {"480p": 1, "720p": 2, "1080p": 3, "4K": 4, "6K": 5, "8K": 6}
+
+# Hard-constraint modes: drones that violate an enabled constraint are removed before any distance is computed
+RANGE_CONSTRAINTS = {
+    "within_budget": ("Budgets options", "<="),
+    "meets_payload": ("Payload Capacity", ">="),
+    "meets_battery": ("Battery Life", ">="),
+}
+CAPABILITY_CONSTRAINT = "has_capabilities"  # Every binary capability the user asks for (value 1) is required
+HARD_CONSTRAINTS = list(RANGE_CONSTRAINTS) + [CAPABILITY_CONSTRAINT]
+
+# Default Pareto-front objectives: column -> "min" or "max"
+SKYLINE_OBJECTIVES = {
+    "Budgets options": "min",
+    "Battery Life": "max",
+    "Payload Capacity": "max",
+    "Flight Radius": "max",
+}
+
+# Above this surviving fraction the neighbour index is over-queried and filtered instead of scanning survivors
+INDEX_FILTER_MIN_FRACTION = 0.5
+
+CATALOG_PATH = "drones_dataset.csv"
+WEIGHTS_PATH = "weights.conf"
+
 
 # --- Fuzzy membership functions ---
+# Read from memberships.json (see membership.py); the built-in definitions apply without it
+fuzzy_memberships = membership.load_memberships(membership.MEMBERSHIPS_PATH)
+
+
 def fuzzy_membership_payload(x):
-    low = fuzz.trimf(x, [0, 0, 5])
-    medium = fuzz.trimf(x, [3, 10, 15])
-    high = fuzz.trimf(x, [12, 25, 40])
-    return {"low": low, "medium": medium, "high": high}
+    return fuzzy_memberships["Payload Capacity"].memberships(x)
 
 
 def fuzzy_membership_budget(x):
-    affordable = fuzz.trimf(x, [0, 0, 5000])
-    moderate = fuzz.trimf(x, [4000, 7500, 10000])
-    expensive = fuzz.trimf(x, [8000, 15000, 30000])
-    return {"affordable": affordable, "moderate": moderate, "expensive": expensive}
+    return fuzzy_memberships["Budgets options"].memberships(x)
 
 
 def fuzzy_membership_battery(x):
-    short = fuzz.trimf(x, [0, 0, 45])
-    medium = fuzz.trimf(x, [30, 60, 90])
-    long = fuzz.trimf(x, [75, 120, 180])
-    return {"short": short, "medium": medium, "long": long}
+    return fuzzy_memberships["Battery Life"].memberships(x)
 
 
 # --- Data Preprocessing ---
 def preprocess_data(df):
     df_processed = df.copy()
-    quality_map = {"480p": 1, "720p": 2, "1080p": 3, "4K": 4, "6K": 5, "8K": 6}
-    df_processed["Camera Quality"] = df_processed["Camera Quality"].map(quality_map).fillna(1)
+    if "Camera Quality" in df_processed.columns:
+        df_processed["Camera Quality"] = df_processed["Camera Quality"].map(CAMERA_QUALITY_MAP).fillna(1)
 
     one_hot_cols = []
     if "Class Identification Label" in df_processed.columns:
@@ -82,10 +119,158 @@ def scale_features(df_processed, user_input_processed):
     return df_scaled, user_scaled_vector, features_to_scale, scaler
 
 
+# --- Weights ---
+DEFAULT_PROFILE = "default"
+
+
+def parse_weights(filepath=WEIGHTS_PATH):
+    """
+    Parses a weights file of "Criterion": value lines, skipping comments.
+
+    Malformed lines are reported and skipped, as the GUI always did.
+    """
+    weights = {}
+    with open(filepath, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(":", 1)
+            if len(parts) != 2:
+                print(f"Warning: Skipping malformed line in weights file: {line}")
+                continue
+            try:
+                weights[parts[0].strip().strip('"')] = float(parts[1].strip())
+            except ValueError:
+                print(f"Warning: Skipping line with invalid weight value: {line}")
+    return weights
+
+
+def load_weights(filepath=WEIGHTS_PATH):
+    """Parses a weights file into a plain dict."""
+    return parse_weights(filepath)
+
+
+class WeightsProfile(Mapping):
+    """
+    A parsed weights file that behaves like the weights dict and caches its compiled forms.
+
+    The feature-aligned k-NN weight vector, its square root and the normalization
+    distance are computed once per catalog feature layout, and keys are validated once
+    per catalog version, so reusing a profile across requests costs nothing extra.
+
+    Args:
+        name (str): Profile name.
+        weights (dict): Criterion weights.
+        path (str, optional): The file the profile was parsed from.
+        mtime (float, optional): Modification time of that file when it was parsed.
+    """
+
+    def __init__(self, name, weights, path=None, mtime=None):
+        self.name = name
+        self.weights = dict(weights)
+        self.path = path
+        self.mtime = mtime
+        self.fingerprint = hashlib.sha1(json.dumps(self.weights, sort_keys=True).encode("utf-8")).hexdigest()
+        self._knn_vectors = {}
+        self._validated = set()
+
+    def __getitem__(self, key):
+        return self.weights[key]
+
+    def __iter__(self):
+        return iter(self.weights)
+
+    def __len__(self):
+        return len(self.weights)
+
+    def __repr__(self):
+        return f"WeightsProfile({self.name!r}, {self.weights!r})"
+
+    def knn_vectors(self, feature_names):
+        """Returns (sqrt_knn_weights, max_dist) for a catalog's encoded feature columns."""
+        key = tuple(feature_names)
+        vectors = self._knn_vectors.get(key)
+        if vectors is None:
+            sqrt_knn_weights = np.sqrt(prepare_knn_weights(feature_names, (), self.weights))
+            sqrt_knn_weights.flags.writeable = False
+            max_dist = np.linalg.norm(sqrt_knn_weights)
+            vectors = (sqrt_knn_weights, max_dist if max_dist != 0 else 1.0)
+            self._knn_vectors[key] = vectors
+        return vectors
+
+    def validate(self, catalog):
+        """Warns once per catalog version about weights that match no catalog column."""
+        key = (catalog.token, catalog.version)
+        if key in self._validated:
+            return
+        self._validated.add(key)
+        unknown = sorted(set(self.weights) - set(catalog.column_names))
+        if unknown:
+            print(f"Warning: Weights profile '{self.name}' has weights for unknown criteria: {unknown}")
+
+
+class WeightsProfileStore:
+    """
+    Loads named weights profiles and reloads a profile only when its file changes.
+
+    The default profile is weights.conf; a profile named "cargo" is weights.cargo.conf
+    in the same directory.
+
+    Args:
+        default_path (str): The default profile's file.
+    """
+
+    def __init__(self, default_path=WEIGHTS_PATH):
+        self.default_path = default_path
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def profile_path(self, name=None):
+        if name in (None, "", DEFAULT_PROFILE):
+            return self.default_path
+        root, ext = os.path.splitext(self.default_path)
+        return f"{root}.{name}{ext}"
+
+    def names(self):
+        """Names of the available profiles, the default first."""
+        root, ext = os.path.splitext(self.default_path)
+        names = sorted(path[len(root) + 1:-len(ext) or None] for path in glob.glob(f"{glob.escape(root)}.*{ext}"))
+        return [DEFAULT_PROFILE] + [name for name in names if name and "." not in name]
+
+    def get(self, name=None):
+        """
+        Returns the named profile, re-parsing its file only if its mtime changed.
+
+        Raises:
+            KeyError: If a named (non-default) profile does not exist. A missing default
+                file yields an empty profile with a printed error, as the GUI did.
+        """
+        name = name or DEFAULT_PROFILE
+        path = self.profile_path(name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            if name != DEFAULT_PROFILE:
+                raise KeyError(f"Unknown weights profile: {name}")
+            print(f"Error: Weight configuration file '{path}' not found.")
+            return WeightsProfile(name, {}, path)
+
+        with self._lock:
+            profile = self._profiles.get(name)
+            if profile is None or profile.mtime != mtime:
+                profile = WeightsProfile(name, parse_weights(path), path, mtime)
+                self._profiles[name] = profile
+            return profile
+
+
+weights_profiles = WeightsProfileStore()
+
+
 # --- Prepare Weights for k-NN ---
 def prepare_knn_weights(knn_feature_names, original_user_input_keys, weights_gui):
     feature_weights = np.ones(len(knn_feature_names))
-    one_hot_original_features = ["Class Identification Label", "GPS Supported Systems"]
+    one_hot_original_features = ONE_HOT_FEATURES
     for i, col_name in enumerate(knn_feature_names):
         assigned_weight = False
         if col_name in weights_gui:
@@ -105,6 +290,7 @@ def prepare_knn_weights(knn_feature_names, original_user_input_keys, weights_gui
 
 
 # --- Detailed Fuzzy Scoring and Explanations ---
+# Row-wise reference implementation; the selection pipeline uses the vectorized score_fuzzy_criteria below.
 def compute_detailed_scores_and_explanations(drone_row, user_input_gui, weights_gui):
     total_detailed_score = 0.0
     total_weights_for_detailed_score = 0.0  # Use float for consistency
@@ -235,90 +421,1582 @@ def compute_detailed_scores_and_explanations(drone_row, user_input_gui, weights_
     return normalized_detailed_score, explanations
 
 
-# --- Main Drone Selection Function ---
-def get_top_drones(user_input_gui, weights_gui, k=8, W_knn=0.6, W_detailed=0.4):
-    df = pd.read_csv("drones_dataset.csv")
+# --- Vectorized Fuzzy Scoring ---
+# Column-wise counterpart of compute_detailed_scores_and_explanations: the same branches, thresholds,
+# penalty factor and labels, evaluated for a whole array of candidate drones at once. Any criterion
+# in the memberships file is scored the same way as the built-in payload, budget and battery.
+FUZZY_CRITERIA = list(fuzzy_memberships)
 
-    for col in df.select_dtypes(include=np.number).columns:  # Round numeric columns
-        df[col] = df[col].round(2)
+FUZZY_EXPLANATION_TEMPLATES = {name: criterion.explanation for name, criterion in fuzzy_memberships.items()}
 
-    user_input_df_temp = pd.DataFrame([user_input_gui])
-    user_input_processed = preprocess_data(user_input_df_temp).iloc[0].to_dict()
 
-    df_processed = preprocess_data(df)
-    df_scaled, user_scaled_knn_vector, knn_feature_names, scaler = scale_features(df_processed, user_input_processed)
+def _relevance_at_least(fm, drone_values, user_value, low, medium, high, with_labels=True):
+    """Relevance and category labels for criteria where the user asks for at least user_value."""
+    fm_low, fm_medium, fm_high = fm[low], fm[medium], fm[high]
+    meets = drone_values >= user_value
+    best = np.maximum(np.maximum(fm_low, fm_medium), fm_high)
+    high_wins_below = (fm_high > fm_medium) & (fm_high > fm_low)
+    medium_wins_below = fm_medium > fm_low
 
-    knn_weights_array = prepare_knn_weights(knn_feature_names, user_input_gui.keys(), weights_gui)
-    sqrt_knn_weights = np.sqrt(knn_weights_array)
+    relevance = np.select(
+        [meets & (fm_high > 0.5), meets & (fm_medium > 0.5), meets, high_wins_below, medium_wins_below],
+        [fm_high, fm_medium, best, fm_high * 0.5, fm_medium * 0.5],
+        default=fm_low * 0.5,
+    )
+    if not with_labels:
+        return relevance, None
+    labels = np.select(
+        [meets & (fm_high > 0.5), meets & (fm_medium > 0.5),
+         meets & (best == fm_high), meets & (best == fm_medium), meets,
+         high_wins_below, medium_wins_below],
+        [high, medium,
+         f"{high} (satisfactory)", f"{medium} (satisfactory)", f"{low} (satisfactory but meets min)",
+         f"{high} (but below user requirement)", f"{medium} (but below user requirement)"],
+        default=f"{low} (below user requirement)",
+    )
+    return relevance, labels
 
-    df_weighted_scaled_features = df_scaled[knn_feature_names].multiply(sqrt_knn_weights,
-                                                                        axis=1)  # Correct way to multiply
-    user_weighted_scaled_vector = user_scaled_knn_vector * sqrt_knn_weights
 
-    # Ensure no NaN values are passed to NearestNeighbors
-    df_weighted_scaled_features = df_weighted_scaled_features.fillna(0)
-    user_weighted_scaled_vector = np.nan_to_num(user_weighted_scaled_vector)
+def _relevance_at_most(fm, drone_values, user_value, best, middle, worst, noun="budget", with_labels=True):
+    """Relevance and category labels for criteria like the budget, where the user accepts at most user_value."""
+    fm_best, fm_middle = fm[best], fm[middle]
+    within = drone_values <= user_value
+    relevance = np.select(
+        [within & (fm_best > 0.5), within & (fm_middle > 0.5), within],
+        [fm_best, fm_middle, 1.0],
+        default=0.0,
+    )
+    if not with_labels:
+        return relevance, None
+    labels = np.select(
+        [within & (fm_best > 0.5), within & (fm_middle > 0.5), within],
+        [best, f"{middle} (within {noun})",
+         f"within {noun} (may be '{worst}' category but meets user max)"],
+        default=f"over {noun}",
+    )
+    return relevance, labels
 
-    model = NearestNeighbors(n_neighbors=k, metric="euclidean")
-    model.fit(df_weighted_scaled_features.values)  # Pass .values to avoid feature name warnings if df has names
 
-    distances, indices = model.kneighbors(user_weighted_scaled_vector.reshape(1, -1))
+def score_fuzzy_criteria(drones, user_input_gui, weights_gui, with_labels=True):
+    """
+    Fuzzy-scores every criterion of fuzzy_memberships (payload, budget and battery by default)
+    for every drone in a table at once.
 
-    max_possible_weighted_scaled_vector = np.ones(len(knn_feature_names)) * sqrt_knn_weights
-    max_dist = np.linalg.norm(max_possible_weighted_scaled_vector)
-    if max_dist == 0: max_dist = 1.0  # Use float
+    Args:
+        drones (pd.DataFrame): Candidate drones with the original (unprocessed) catalog columns.
+        user_input_gui (dict): The user input, as passed to get_top_drones.
+        weights_gui (dict): Criterion weights.
+        with_labels (bool): Whether to build the category labels; scoring a whole catalog
+            without explanations can skip them.
 
-    top_drones_data = []
-    for dist, idx in zip(distances[0], indices[0]):
-        drone_original_row = df.iloc[idx].copy()
+    Returns:
+        tuple: The normalized detailed score per drone (np.ndarray) and a dict mapping each
+               applied criterion to its user value, drone values, relevance, category labels
+               (None when with_labels is False), weight and a mask of the drones it applied to.
+    """
+    total_detailed_score = np.zeros(len(drones))
+    total_weights_for_detailed_score = np.zeros(len(drones))
+    details = {}
+
+    for criterion, fuzzy_criterion in fuzzy_memberships.items():
+        if criterion not in user_input_gui or criterion not in drones or criterion not in weights_gui:
+            continue
+        drone_values = np.asarray(drones[criterion], dtype=float)
+        applies = ~np.isnan(drone_values)
+        user_value = float(user_input_gui[criterion])
+        weight = float(weights_gui[criterion])
 
-        knn_similarity_score = max(0.0, 1.0 - (dist / max_dist)) if max_dist > 0 else 0.0
+        fm = fuzzy_criterion.memberships(drone_values)
+        if fuzzy_criterion.direction == "at_least":
+            relevance, labels = _relevance_at_least(fm, drone_values, user_value, *fuzzy_criterion.labels,
+                                                    with_labels=with_labels)
+        else:
+            relevance, labels = _relevance_at_most(fm, drone_values, user_value, *fuzzy_criterion.labels,
+                                                   noun=fuzzy_criterion.noun, with_labels=with_labels)
+
+        total_detailed_score += np.where(applies, weight * relevance, 0.0)
+        total_weights_for_detailed_score += np.where(applies, weight, 0.0)
+        details[criterion] = {"user": user_value, "drone": drone_values, "relevance": relevance,
+                              "labels": labels if with_labels else None, "weight": weight, "applies": applies}
+
+    normalized_detailed_score = np.divide(total_detailed_score, total_weights_for_detailed_score,
+                                          out=np.zeros(len(drones)), where=total_weights_for_detailed_score > 0)
+    return normalized_detailed_score, details
+
+
+def fuzzy_explanations(details, position):
+    """Renders the fuzzy explanation strings for the drone at position in a score_fuzzy_criteria result."""
+    return [
+        FUZZY_EXPLANATION_TEMPLATES[criterion].format(
+            user=detail["user"], drone=float(detail["drone"][position]), label=detail["labels"][position])
+        for criterion, detail in details.items()
+        if detail["applies"][position]
+    ]
 
-        detailed_score, fuzzy_explanations = compute_detailed_scores_and_explanations(
-            drone_original_row, user_input_gui, weights_gui
+
+# --- General Explanations ---
+# Row-wise reference implementation; returned results carry a lazy Explanation instead.
+def general_explanations(drone_original_row, user_input_gui, weights_gui):
+    explanations = []
+    for feature_name, user_value in user_input_gui.items():
+        if feature_name in ["Payload Capacity", "Budgets options", "Battery Life"]:
+            continue
+        drone_actual_value = drone_original_row.get(feature_name, "N/A")
+        weight = weights_gui.get(feature_name, 0.0)
+        match_info = ""
+        # Ensure drone_actual_value is not "N/A" before numeric comparison
+        if drone_actual_value != "N/A" and pd.api.types.is_numeric_dtype(
+                type(user_value)) and pd.api.types.is_numeric_dtype(type(drone_actual_value)):
+            if float(drone_actual_value) > float(user_value):
+                match_info = "(Drone exceeds requirement)"
+            elif float(drone_actual_value) < float(user_value):
+                match_info = "(Drone below requirement)"
+            else:
+                match_info = "(Exact match)"
+        elif str(user_value) == str(drone_actual_value):
+            match_info = "(Match)"
+        else:
+            match_info = "(Does not match)"
+        explanations.append(
+            f"{feature_name}: Requested '{user_value}', Drone '{drone_actual_value}' {match_info}."
         )
+    return explanations
+
+
+# --- Structured Explanations ---
+GENERAL_EXPLANATION_TEMPLATE = "{feature}: Requested '{requested}', Drone '{actual}' ({verdict})."
+
+
+def _general_verdicts(user_value, drone_values):
+    """Vectorized match verdicts of general_explanations for one feature across several drones."""
+    if drone_values is None:
+        return np.full(0, "", dtype=object)
+    if pd.api.types.is_numeric_dtype(type(user_value)) and pd.api.types.is_numeric_dtype(drone_values.dtype):
+        values = drone_values.astype(float)
+        return np.select([values > float(user_value), values < float(user_value)],
+                         ["Drone exceeds requirement", "Drone below requirement"], default="Exact match")
+    verdicts = []
+    for value in drone_values:
+        if pd.api.types.is_numeric_dtype(type(user_value)) and pd.api.types.is_numeric_dtype(type(value)):
+            verdicts.append("Drone exceeds requirement" if float(value) > float(user_value)
+                            else "Drone below requirement" if float(value) < float(user_value) else "Exact match")
+        else:
+            verdicts.append("Match" if str(user_value) == str(value) else "Does not match")
+    return np.array(verdicts, dtype=object)
+
+
+class ExplanationSet:
+    """
+    Structured explanations for the drones returned by one query, built on first access.
+
+    Everything needed is captured when the results are ranked, but the records are only
+    computed, for all returned drones at once, when one of them is asked for, and only
+    rendered to text on iteration. Callers that never look at explanations pay nothing.
+
+    Each record is a dict with:
+        feature: The user input key.
+        requested: The user's value.
+        actual: The drone's value ("N/A" when the catalog lacks the column).
+        verdict: How the drone compares, e.g. "meets requirement" or "Does not match".
+        category: The fuzzy category label for payload, budget and battery, else None.
+        weight: The criterion weight.
+        contribution: Points of the total score the feature earned through the fuzzy score,
+            minus its share of the points lost to the weighted k-NN distance.
+
+    Args:
+        drones (pd.DataFrame): Original catalog rows of the returned drones.
+        scaled_features (np.ndarray): Their scaled feature rows.
+        feature_names (list[str]): Names of the scaled feature columns.
+        user_input_gui (dict): The user input.
+        user_scaled_vector (np.ndarray or callable): The scaled user vector, or a function computing it
+            when the records are built.
+        weights_gui (dict): Criterion weights.
+        max_dist (float): The k-NN normalization distance.
+        W_knn (float): Weight of the k-NN similarity in the total score.
+        W_detailed (float): Weight of the fuzzy detailed score in the total score.
+    """
+
+    def __init__(self, drones, scaled_features, feature_names, user_input_gui, user_scaled_vector, weights_gui,
+                 max_dist, W_knn, W_detailed):
+        self.drones = drones
+        self.scaled_features = scaled_features
+        self.feature_names = feature_names
+        # Copied: the records are built lazily, possibly after the caller has reused its dicts,
+        # and results served from result_cache still render them
+        self.user_input_gui = dict(user_input_gui)
+        self.user_scaled_vector = user_scaled_vector
+        self.weights_gui = weights_gui if isinstance(weights_gui, WeightsProfile) else dict(weights_gui)
+        self.max_dist = max_dist
+        self.W_knn = W_knn
+        self.W_detailed = W_detailed
+        self._records = None
+
+    def __len__(self):
+        return len(self.drones)
+
+    def _knn_losses(self):
+        """Points of the total score each user input feature loses to the weighted distance, per drone."""
+        sqrt_knn_weights = np.sqrt(prepare_knn_weights(self.feature_names, self.user_input_gui.keys(),
+                                                       self.weights_gui))
+        if callable(self.user_scaled_vector):
+            self.user_scaled_vector = self.user_scaled_vector()
+        squared_terms = np.nan_to_num((self.scaled_features - self.user_scaled_vector) * sqrt_knn_weights) ** 2
+        squared_distances = squared_terms.sum(axis=1)
+        distances = np.sqrt(squared_distances)
+        lost_points = np.minimum(1.0, distances / self.max_dist) * self.W_knn * 100.0
+        shares = np.divide(lost_points, squared_distances, out=np.zeros(len(self)), where=squared_distances > 0)
+
+        losses = {}
+        for feature in self.user_input_gui:
+            columns = [i for i, col in enumerate(self.feature_names)
+                       if col == feature or (feature in ONE_HOT_FEATURES and col.startswith(feature + "_"))]
+            losses[feature] = squared_terms[:, columns].sum(axis=1) * shares
+        return losses
+
+    @metrics.timed("explanations")
+    def _build_records(self):
+        losses = self._knn_losses()
+        records = [[] for _ in range(len(self))]
+
+        _, fuzzy_details = score_fuzzy_criteria(self.drones, self.user_input_gui, self.weights_gui)
+        total_weights = sum(np.where(detail["applies"], detail["weight"], 0.0) for detail in fuzzy_details.values())
+        for criterion, detail in fuzzy_details.items():
+            fuzzy_criterion = fuzzy_memberships[criterion]
+            if fuzzy_criterion.direction == "at_most":
+                noun = fuzzy_criterion.noun
+                verdicts = np.where(detail["drone"] <= detail["user"], f"within {noun}", f"over {noun}")
+            else:
+                verdicts = np.where(detail["drone"] >= detail["user"], "meets requirement",
+                                    "below requirement")
+            gains = np.divide(detail["weight"] * detail["relevance"] * self.W_detailed * 100.0, total_weights,
+                              out=np.zeros(len(self)), where=total_weights > 0)
+            for position in np.flatnonzero(detail["applies"]):
+                records[position].append({
+                    "feature": criterion,
+                    "requested": detail["user"],
+                    "actual": float(detail["drone"][position]),
+                    "verdict": str(verdicts[position]),
+                    "category": str(detail["labels"][position]),
+                    "weight": detail["weight"],
+                    "contribution": round(float(gains[position] - losses[criterion][position]), 2) + 0.0,
+                })
+
+        for feature, user_value in self.user_input_gui.items():
+            if feature in FUZZY_CRITERIA:
+                continue
+            drone_values = self.drones[feature].to_numpy() if feature in self.drones else None
+            verdicts = _general_verdicts(user_value, drone_values)
+            for position in range(len(self)):
+                actual = drone_values[position] if drone_values is not None else "N/A"
+                if isinstance(actual, np.generic):
+                    actual = actual.item()
+                verdict = verdicts[position] if drone_values is not None else (
+                    "Match" if str(user_value) == "N/A" else "Does not match")
+                records[position].append({
+                    "feature": feature,
+                    "requested": user_value,
+                    "actual": actual,
+                    "verdict": str(verdict),
+                    "category": None,
+                    "weight": self.weights_gui.get(feature, 0.0),
+                    "contribution": round(float(-losses[feature][position]), 2) + 0.0,
+                })
+        return records
+
+    def records(self, position):
+        """The structured explanation records of the drone at position."""
+        if self._records is None:
+            self._records = self._build_records()
+        return self._records[position]
+
+    def render(self, position):
+        """The explanation lines of the drone at position."""
+        lines = []
+        for record in self.records(position):
+            if record["category"] is not None:
+                lines.append(FUZZY_EXPLANATION_TEMPLATES[record["feature"]].format(
+                    user=record["requested"], drone=record["actual"], label=record["category"]))
+            else:
+                lines.append(GENERAL_EXPLANATION_TEMPLATE.format(**record))
+        return lines
+
+
+class Explanation:
+    """
+    The explanation of one recommended drone, as stored under a result's "Explanation" key.
+
+    Iterating yields the rendered text lines, so it reads like the former list of strings;
+    records() returns the structured records. Nothing is computed until either is used.
+    """
+
+    def __init__(self, explanation_set, position):
+        self._explanation_set = explanation_set
+        self._position = position
+
+    def records(self):
+        return self._explanation_set.records(self._position)
+
+    def lines(self):
+        return self._explanation_set.render(self._position)
+
+    def __iter__(self):
+        return iter(self.lines())
+
+    def __len__(self):
+        return len(self.records())
+
+    def __getitem__(self, item):
+        return self.lines()[item]
+
+    def __repr__(self):
+        return repr(self.lines())
+
+
+# --- Hard-Constraint Prefilter ---
+class ConstraintIndex:
+    """
+    Sorted column indexes over budget, payload and battery plus bitmaps of the binary capabilities.
+
+    Args:
+        columns (pd.DataFrame): The catalog's numeric columns, one row per drone.
+    """
+
+    def __init__(self, columns):
+        self.n_rows = len(columns)
+        self.sorted_columns = {}
+        for column, _ in RANGE_CONSTRAINTS.values():
+            if column not in columns:
+                continue
+            values = np.asarray(columns[column], dtype=float)
+            order = np.argsort(values, kind="stable")  # NaN sorts last
+            self.sorted_columns[column] = (values[order], order, int(np.count_nonzero(~np.isnan(values))))
+        self.bitmaps = {column: np.asarray(columns[column], dtype=float) == 1
+                        for column in CATEGORICAL_FEATURES if column in columns}
+
+    def _range_rows(self, column, operator, bound):
+        sorted_values, order, n_valid = self.sorted_columns[column]
+        if operator == "<=":
+            return order[:np.searchsorted(sorted_values[:n_valid], bound, side="right")]
+        return order[np.searchsorted(sorted_values[:n_valid], bound, side="left"):n_valid]
+
+    def mask(self, user_input_gui, constraints):
+        """
+        Returns a boolean mask of the drones satisfying the enabled constraints, or None if none applies.
+
+        A constraint is skipped when the user input has no numeric value for its column.
+        """
+        mask = None
+        for name in constraints:
+            if name not in HARD_CONSTRAINTS:
+                raise ValueError(f"Unknown hard constraint: {name}")
+
+        for name, (column, operator) in RANGE_CONSTRAINTS.items():
+            if name not in constraints or column not in self.sorted_columns:
+                continue
+            try:
+                bound = float(user_input_gui[column])
+            except (KeyError, TypeError, ValueError):
+                continue
+            column_mask = np.zeros(self.n_rows, dtype=bool)
+            column_mask[self._range_rows(column, operator, bound)] = True
+            mask = column_mask if mask is None else mask & column_mask
+
+        if CAPABILITY_CONSTRAINT in constraints:
+            for column, bitmap in self.bitmaps.items():
+                try:
+                    required = float(user_input_gui.get(column, 0)) == 1
+                except (TypeError, ValueError):
+                    continue
+                if required:
+                    mask = bitmap.copy() if mask is None else mask & bitmap
+        return mask
+
+
+# --- Drone Catalog ---
+def _file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DroneCatalog:
+    """
+    Long-lived, preprocessed view of the drones catalog.
+
+    The catalog is read, rounded, preprocessed and scaled once. The fitted k-NN
+    index for a given weight vector is kept as well, so a query only pays for
+    transforming the user vector and the neighbour search. The catalog is
+    reloaded when the file's mtime changes and its content hash differs.
+
+    The path may point to the CSV or to a catalog compiled with compile_catalog,
+    whose matrices are memory-mapped instead of parsed.
+
+    The neighbour index comes from nn_backends. Tree and approximate indexes are
+    saved next to the catalog and loaded back instead of refitted.
+
+    Drones can be added, updated and deleted in memory by Drone ID. Edits patch
+    the scaled matrix and the cached indexes in place; the catalog is only
+    rescaled, and its indexes refitted, when the running min/max drift from the
+    scaling bounds by more than rescale_tolerance of a feature's range.
+
+    Args:
+        csv_path (str): Path to the drones dataset CSV or compiled catalog.
+        max_cached_indexes (int): How many fitted k-NN indexes (one per
+            distinct weight vector) are kept in memory. Brute-force and IVF indexes read
+            the scaled matrix through a weighted view and add little; a KD-tree or ball
+            tree holds a weighted copy of the whole matrix, so each cached tree costs
+            about one catalog matrix of memory.
+        backend (str): "auto", "brute", "kd_tree", "ball_tree" or "ivf".
+        persist_indexes (bool): Whether fitted indexes are saved to and loaded from disk.
+        index_dir (str, optional): Where indexes are saved. Defaults to the catalog's directory.
+        rescale_tolerance (float): Allowed drift of the scaling bounds, as a fraction of each
+            feature's range, before an edit triggers a full rescale.
+        max_index_patches (int, optional): Patched rows an index may accumulate before it is refitted.
+            Defaults to 1% of the catalog, and at least 1000.
+    """
+
+    def __init__(self, csv_path=CATALOG_PATH, max_cached_indexes=4, backend="auto", persist_indexes=True,
+                 index_dir=None, rescale_tolerance=0.05, max_index_patches=None):
+        self.csv_path = csv_path
+        self.max_cached_indexes = max_cached_indexes
+        self.backend = backend
+        self.persist_indexes = persist_indexes
+        self.index_dir = index_dir
+        self.rescale_tolerance = rescale_tolerance
+        self.max_index_patches = max_index_patches
+        # Identifies this instance in caches; unlike id(), never reused by a later catalog
+        self.token = uuid.uuid4().hex
+        self.version = 0
+        self.n_rows = 0
+        self.df_processed = None
+        self.feature_names = []
+        self.scaler = None
+        self.features = None
+        self.features_scaled = None
+        self.compiled = False
+        self._df = None
+        self._columns = []
+        self._compiled_arrays = None
+        self._missing = {}
+        self._mtime = None
+        self._digest = None
+        self._indexes = OrderedDict()
+        self._constraint_index = None
+        self._skylines = {}
+        self._modified = False
+        self._pending_rows = []
+        self._deleted = set()
+        self._active_mask = None
+        self._id_positions = None
+        self._data_min = None
+        self._data_max = None
+        self._buffers = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def column_names(self):
+        """Names of the original catalog columns."""
+        self.refresh()
+        return [column["name"] for column in self._columns]
+
+    def refresh(self):
+        """Reloads the catalog if the file changed on disk. Returns True if it was reloaded."""
+        with self._lock:
+            mtime = os.path.getmtime(self.csv_path)
+            if self._digest is not None and mtime == self._mtime:
+                return False
+            digest = _file_digest(self.csv_path)
+            if self._digest is not None and digest == self._digest:
+                self._mtime = mtime
+                return False
+            if catalog_format.is_columnar_file(self.csv_path):
+                with metrics.timer("compiled_load"):
+                    self._load_compiled()
+            else:
+                self._load()
+            self._indexes.clear()
+            self._constraint_index = None
+            self._skylines.clear()
+            self._reset_edits()
+            self.version += 1
+            self._mtime = mtime
+            self._digest = digest
+            return True
+
+    def _load(self):
+        with metrics.timer("csv_load"):
+            df = pd.read_csv(self.csv_path)
+            for col in df.select_dtypes(include=np.number).columns:  # Round numeric columns
+                df[col] = df[col].round(2)
+
+        with metrics.timer("preprocess"):
+            df_processed = preprocess_data(df)
+            feature_names = [col for col in df_processed.columns if col != "Drone ID"]
+            features = df_processed[feature_names].to_numpy(dtype=float)
+        with metrics.timer("scale"):
+            scaler = MinMaxScaler()
+            features_scaled = scaler.fit_transform(features)
+
+        self._df = df
+        self._columns = [{"name": col, "dtype": str(df[col].dtype)} for col in df.columns]
+        self._compiled_arrays = None
+        self._missing = {}
+        self.compiled = False
+        self.n_rows = len(df)
+        self.df_processed = df_processed
+        self.feature_names = feature_names
+        self.scaler = scaler
+        self.features = features
+        self.features_scaled = np.nan_to_num(features_scaled)
+
+    def _load_compiled(self):
+        metadata, arrays = catalog_format.read_arrays(self.csv_path)
+        scaler = MinMaxScaler()
+        scaler.fit(np.array([metadata["data_min"], metadata["data_max"]], dtype=float))
+
+        self._df = None
+        self._columns = metadata["columns"]
+        self._compiled_arrays = arrays
+        # The features hold missing values as 0; the mask restores them in the original columns
+        self._missing = {name: arrays["missing"][:, i] for i, name in enumerate(metadata.get("missing_columns", []))}
+        self.compiled = True
+        self.n_rows = metadata["n_rows"]
+        self.df_processed = None
+        self.feature_names = metadata["feature_names"]
+        self.scaler = scaler
+        self.features = arrays["features"]
+        self.features_scaled = arrays["features_scaled"]
+
+    @property
+    def df(self):
+        """The original catalog table. A compiled catalog decodes it on first access."""
+        self.refresh()
+        with self._lock:
+            self._flush_pending_rows()
+            if self._df is None:
+                self._df = self.rows(np.arange(self.n_rows))
+        return self._df
+
+    def rows(self, indices):
+        """Returns the original catalog rows at the given positions, indexed by position."""
+        indices = np.asarray(indices, dtype=np.int64)
+        self._flush_pending_rows()
+        if self._df is not None:
+            return self._df.iloc[indices]
+
+        arrays = self._compiled_arrays
+        feature_positions = {name: i for i, name in enumerate(self.feature_names)}
+        data = {}
+        for column in self._columns:
+            name = column["name"]
+            if name == "Drone ID":
+                offsets = arrays["drone_id_offsets"]
+                blob = arrays["drone_ids"]
+                data[name] = [bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8") for i in indices]
+            elif name == "Camera Quality":
+                inverse_quality_map = {value: label for label, value in CAMERA_QUALITY_MAP.items()}
+                codes = self._compiled_column(name, feature_positions[name], indices)
+                data[name] = [np.nan if np.isnan(code) else inverse_quality_map.get(code, "480p") for code in codes]
+            elif name in ONE_HOT_FEATURES:
+                dummy_names = [col for col in self.feature_names if col.startswith(name + "_")]
+                vocabulary = np.array([col[len(name) + 1:] for col in dummy_names], dtype=object)
+                dummies = self.features[np.ix_(indices, [feature_positions[col] for col in dummy_names])]
+                labels = vocabulary[dummies.argmax(axis=1)] if len(dummy_names) else np.full(len(indices), np.nan)
+                if len(dummy_names):
+                    labels = np.where(dummies.max(axis=1) > 0, labels, np.nan)
+                data[name] = labels
+            else:
+                data[name] = self._compiled_column(name, feature_positions[name], indices).astype(column["dtype"])
+        return pd.DataFrame(data, index=indices)
+
+    def _compiled_column(self, name, position, rows=slice(None)):
+        """A compiled feature column with its missing values back as NaN; gapless columns are not copied."""
+        values = self.features[rows, position]
+        if name in self._missing:
+            values = np.where(self._missing[name][rows], np.nan, values)
+        return values
+
+    def columns(self, names):
+        """Returns the given numeric catalog columns for every drone, without copying compiled data."""
+        self.refresh()
+        self._flush_pending_rows()
+        if self._df is not None:
+            return self._df[[name for name in names if name in self._df.columns]]
+        feature_positions = {name: i for i, name in enumerate(self.feature_names)}
+        return pd.DataFrame({name: self._compiled_column(name, feature_positions[name])
+                             for name in names if name in feature_positions}, copy=False)
+
+    def constraint_index(self):
+        """Returns the ConstraintIndex of the catalog, building it on first use."""
+        self.refresh()
+        with self._lock:
+            if self._constraint_index is None:
+                columns = self.columns([column for column, _ in RANGE_CONSTRAINTS.values()] + CATEGORICAL_FEATURES)
+                self._constraint_index = ConstraintIndex(columns)
+            return self._constraint_index
+
+    def _objective_points(self, objectives, rows=None):
+        """Objective values to minimize, maximized columns negated, of every drone or those at rows.
+
+        Deleted drones are NaN.
+        """
+        positions = {name: i for i, name in enumerate(self.feature_names)}
+        rows = slice(None) if rows is None else np.asarray(rows, dtype=np.int64)
+        points = np.column_stack([self.features[rows, positions[name]] * (1.0 if direction == "min" else -1.0)
+                                  for name, direction in objectives])
+        active = self.active_mask()
+        if active is not None:
+            points[~active[rows]] = np.nan
+        return points
+
+    def skyline(self, objectives=None):
+        """
+        Returns the positions of the Pareto-optimal drones: those no other drone matches or beats
+        on every objective while strictly beating on one. Drones missing an objective are left out.
+
+        The skyline is kept per objective set and patched by later edits instead of recomputed.
 
-        total_score = (knn_similarity_score * W_knn + detailed_score * W_detailed) * 100.0
+        Args:
+            objectives (dict, optional): Numeric column -> "min" or "max". Defaults to SKYLINE_OBJECTIVES.
 
-        general_explanations = []
-        for feature_name, user_value in user_input_gui.items():
-            if feature_name in ["Payload Capacity", "Budgets options", "Battery Life"]:
+        Returns:
+            np.ndarray: Ascending catalog positions.
+        """
+        objectives = tuple((objectives or SKYLINE_OBJECTIVES).items())
+        self.refresh()
+        with self._lock:
+            for name, direction in objectives:
+                if direction not in ("min", "max"):
+                    raise ValueError(f"Objective direction for '{name}' must be 'min' or 'max', not '{direction}'")
+                if name not in self.feature_names:
+                    raise ValueError(f"Unknown numeric column for an objective: '{name}'")
+            front = self._skylines.get(objectives)
+            if front is None:
+                with metrics.timer("skyline"):
+                    front = skyline.Skyline(self._objective_points(objectives))
+                self._skylines[objectives] = front
+            return np.sort(front.rows)
+
+    def _patch_skylines(self, positions, remove=False):
+        for objectives, front in self._skylines.items():
+            points = None
+
+            def all_points():
+                nonlocal points
+                if points is None:
+                    points = self._objective_points(objectives)
+                return points
+
+            for position in positions:
+                if remove:
+                    front.remove(position, all_points)
+                else:
+                    front.update(position, self._objective_points(objectives, [position])[0], all_points)
+
+    # --- Incremental updates ---
+    def _reset_edits(self):
+        self._modified = False
+        self._pending_rows = []
+        self._deleted = set()
+        self._active_mask = None
+        self._id_positions = None
+        self._data_min = None
+        self._data_max = None
+        self._buffers = None
+
+    def _begin_edit(self):
+        """Moves the catalog to writable in-memory arrays before its first edit."""
+        self.refresh()
+        if self._modified:
+            return
+        self._df = self.df
+        self._buffers = [np.array(self.features, dtype=float), np.array(self.features_scaled, dtype=float)]
+        self._set_views()
+        self._data_min = self.scaler.data_min_.copy()
+        self._data_max = self.scaler.data_max_.copy()
+        self._id_positions = {}
+        for position, drone_id in enumerate(self._df["Drone ID"]):
+            self._id_positions.setdefault(drone_id, []).append(position)
+        self.df_processed = None
+        self._modified = True
+
+    def _flush_pending_rows(self):
+        if self._pending_rows:
+            with self._lock:
+                if self._pending_rows:
+                    self._df = pd.concat([self._df] + self._pending_rows, ignore_index=True)
+                    self._pending_rows = []
+
+    def active_mask(self):
+        """Boolean mask of the drones that have not been deleted, or None if nothing was deleted."""
+        if not self._deleted:
+            return None
+        if self._active_mask is None or len(self._active_mask) != self.n_rows:
+            mask = np.ones(self.n_rows, dtype=bool)
+            mask[list(self._deleted)] = False
+            self._active_mask = mask
+        return self._active_mask
+
+    def _positions_of(self, drone_id):
+        return [position for position in self._id_positions.get(drone_id, []) if position not in self._deleted]
+
+    def _set_views(self):
+        """Points features and features_scaled at the first n_rows of the growable edit buffers."""
+        self.features = self._buffers[0][:self.n_rows]
+        self.features_scaled = self._buffers[1][:self.n_rows]
+
+    def _set_scaler_bounds(self, data_min, data_max):
+        self.scaler = MinMaxScaler().fit(np.array([data_min, data_max], dtype=float))
+
+    def _add_feature_column(self, name):
+        """Grows a one-hot vocabulary: appends an all-zero feature column for a new category."""
+        self._buffers = [np.hstack([buffer, np.zeros((len(buffer), 1))]) for buffer in self._buffers]
+        self._set_views()
+        self.feature_names = self.feature_names + [name]
+        self._data_min = np.append(self._data_min, 0.0)
+        self._data_max = np.append(self._data_max, 0.0)
+        self._set_scaler_bounds(np.append(self.scaler.data_min_, 0.0), np.append(self.scaler.data_max_, 1.0))
+        self._indexes.clear()  # The dimensionality changed
+
+    def _encode_drones(self, drones):
+        """Returns the rounded original rows and their encoded features, growing vocabularies as needed."""
+        rows = pd.DataFrame(drones, columns=[column["name"] for column in self._columns])
+        for col in rows.columns:
+            if pd.api.types.is_numeric_dtype(rows[col]):
+                rows[col] = rows[col].round(2)
+        processed = preprocess_data(rows)
+        for col in processed.columns:
+            if col not in self.feature_names and any(col.startswith(feature + "_") for feature in ONE_HOT_FEATURES):
+                self._add_feature_column(col)
+        return rows, processed.reindex(columns=self.feature_names, fill_value=0).to_numpy(dtype=float)
+
+    def _ensure_capacity(self, n_rows):
+        """Grows the edit buffers geometrically so repeated additions stay amortized O(1)."""
+        capacity = len(self._buffers[0])
+        if n_rows <= capacity:
+            return
+        capacity = max(n_rows, 2 * capacity, 16)
+        for i, buffer in enumerate(self._buffers):
+            grown = np.zeros((capacity, buffer.shape[1]))
+            grown[:self.n_rows] = buffer[:self.n_rows]
+            self._buffers[i] = grown
+
+    def _write_features(self, positions, raw):
+        self._buffers[0][positions] = raw
+        self._buffers[1][positions] = np.nan_to_num(self.scaler.transform(raw))
+        self._data_min = np.minimum(self._data_min, raw.min(axis=0))
+        self._data_max = np.maximum(self._data_max, raw.max(axis=0))
+
+    def _set_df_rows(self, positions, rows):
+        for position, (_, row) in zip(positions, rows.iterrows()):
+            for col, value in row.items():
+                try:
+                    self._df.at[position, col] = value
+                except (TypeError, ValueError):
+                    self._df[col] = self._df[col].astype(object)
+                    self._df.at[position, col] = value
+
+    def _patch_indexes(self, positions, remove=False):
+        """Applies edited rows to every cached index, dropping indexes that accumulated too many patches."""
+        max_patches = self.max_index_patches or max(1000, self.n_rows // 100)
+        for key in list(self._indexes):
+            model = self._indexes[key]
+            if not isinstance(model, nn_backends.PatchableIndex):
                 continue
-            drone_actual_value = drone_original_row.get(feature_name, "N/A")
-            weight = weights_gui.get(feature_name, 0.0)
-            match_info = ""
-            # Ensure drone_actual_value is not "N/A" before numeric comparison
-            if drone_actual_value != "N/A" and pd.api.types.is_numeric_dtype(
-                    type(user_value)) and pd.api.types.is_numeric_dtype(type(drone_actual_value)):
-                if float(drone_actual_value) > float(user_value):
-                    match_info = "(Drone exceeds requirement)"
-                elif float(drone_actual_value) < float(user_value):
-                    match_info = "(Drone below requirement)"
+            sqrt_knn_weights = np.frombuffer(key, dtype=float)
+            for position in positions:
+                if remove:
+                    model.remove(position)
                 else:
-                    match_info = "(Exact match)"
-            elif str(user_value) == str(drone_actual_value):
-                match_info = "(Match)"
+                    model.upsert(position, self.features_scaled[position] * sqrt_knn_weights)
+            if model.n_patches > max_patches:
+                del self._indexes[key]
+
+    def _after_edit(self, positions, remove=False):
+        self._constraint_index = None
+        self.version += 1
+        self._patch_skylines(positions, remove=remove)
+        if self._rescale_if_drifted():
+            return
+        self._patch_indexes(positions, remove=remove)
+
+    def _rescale_if_drifted(self):
+        """Rescales the whole catalog if the running bounds left the scaling bounds by more than the tolerance."""
+        scale_min, scale_max = self.scaler.data_min_, self.scaler.data_max_
+        scale_range = np.where(scale_max > scale_min, scale_max - scale_min, 1.0)
+        drift = (np.abs(self._data_min - scale_min) + np.abs(self._data_max - scale_max)) / scale_range
+        if not np.any(drift > self.rescale_tolerance):
+            return False
+        self._set_scaler_bounds(self._data_min, self._data_max)
+        self.features_scaled[:] = np.nan_to_num(self.scaler.transform(self.features))
+        self._indexes.clear()
+        return True
+
+    def add_drone(self, drone):
+        """
+        Adds a drone to the in-memory catalog.
+
+        Args:
+            drone (dict): Column name to value, in the CSV schema. New classes or GPS systems extend
+                the one-hot vocabularies.
+
+        Returns:
+            int: The position of the new drone.
+        """
+        with self._lock:
+            self._begin_edit()
+            row, raw = self._encode_drones([drone])
+            position = self.n_rows
+            self._ensure_capacity(position + 1)
+            self._write_features([position], raw)
+            self.n_rows += 1
+            self._set_views()
+            self._pending_rows.append(row.set_axis([position]))
+            self._id_positions.setdefault(drone.get("Drone ID"), []).append(position)
+            self._after_edit([position])
+            return position
+
+    def update_drone(self, drone_id, changes):
+        """
+        Updates every drone with the given Drone ID, e.g. to reprice it.
+
+        Args:
+            drone_id (str): The Drone ID to update.
+            changes (dict): Column name to new value.
+
+        Returns:
+            int: The number of drones updated.
+        """
+        with self._lock:
+            self._begin_edit()
+            positions = self._positions_of(drone_id)
+            if not positions:
+                return 0
+            self._flush_pending_rows()
+            drones = [dict(self._df.iloc[position].to_dict(), **changes) for position in positions]
+            rows, raw = self._encode_drones(drones)
+            self._set_df_rows(positions, rows)
+            self._write_features(positions, raw)
+            if "Drone ID" in changes and changes["Drone ID"] != drone_id:
+                self._id_positions[drone_id] = [p for p in self._id_positions[drone_id] if p not in positions]
+                self._id_positions.setdefault(changes["Drone ID"], []).extend(positions)
+            self._after_edit(positions)
+            return len(positions)
+
+    def delete_drone(self, drone_id):
+        """
+        Deletes every drone with the given Drone ID from the in-memory catalog.
+
+        Returns:
+            int: The number of drones deleted.
+        """
+        with self._lock:
+            self._begin_edit()
+            positions = self._positions_of(drone_id)
+            if not positions:
+                return 0
+            removed = self.features[positions]
+            touches_bounds = np.any((removed == self._data_min) | (removed == self._data_max))
+            self._deleted.update(positions)
+            self._active_mask = None
+            if touches_bounds:
+                active = self.active_mask()
+                if np.any(active):
+                    self._data_min = self.features[active].min(axis=0)
+                    self._data_max = self.features[active].max(axis=0)
+            self._after_edit(positions, remove=True)
+            return len(positions)
+
+    def save(self, csv_path=None):
+        """
+        Writes the edited catalog, without deleted drones, to a CSV file.
+
+        Args:
+            csv_path (str, optional): Output CSV. Defaults to the catalog's own CSV; a compiled
+                catalog needs an explicit path.
+        """
+        with self._lock:
+            if csv_path is None:
+                if self.compiled:
+                    raise ValueError("A compiled catalog must be saved to an explicit CSV path")
+                csv_path = self.csv_path
+            df = self.df
+            active = self.active_mask()
+            if active is not None:
+                df = df[active]
+            df.to_csv(csv_path, index=False)
+            if os.path.abspath(csv_path) == os.path.abspath(self.csv_path):
+                # The in-memory state already matches the file; do not reload it
+                self._mtime = os.path.getmtime(csv_path)
+                self._digest = _file_digest(csv_path)
+
+    @property
+    def content_digest(self):
+        """Digest of the catalog file as loaded, or None once drones were edited in memory."""
+        self.refresh()
+        return None if self._modified else self._digest
+
+    def warm(self, weights_gui=None):
+        """Loads the catalog and, given weights, builds or loads their neighbour index ahead of the first query."""
+        self.refresh()
+        if weights_gui is not None:
+            sqrt_knn_weights, _ = _knn_weight_vectors(self, weights_gui, ())
+            self.get_index(sqrt_knn_weights)
+
+    def transform_user_input(self, user_input_gui):
+        """Preprocesses and scales one user input dict into the catalog's feature space."""
+        return self.transform_user_inputs([user_input_gui])[0]
+
+    def transform_user_inputs(self, user_inputs_gui):
+        """Preprocesses and scales a list of user input dicts together into an (n_inputs, n_features) matrix."""
+        self.refresh()
+        with metrics.timer("transform_user_inputs"):
+            users_processed = preprocess_data(pd.DataFrame(list(user_inputs_gui)))
+            user_matrix = users_processed.reindex(columns=self.feature_names, fill_value=0).to_numpy(dtype=float)
+            return self.scaler.transform(user_matrix)
+
+    def backend_name(self):
+        """The nearest-neighbour backend used for this catalog, resolving "auto"."""
+        if self.backend == "auto":
+            return nn_backends.choose_backend(len(self), len(self.feature_names))
+        return self.backend
+
+    def _index_path(self, backend_name, weights_key):
+        index_dir = self.index_dir or os.path.dirname(os.path.abspath(self.csv_path))
+        weights_digest = hashlib.sha1(weights_key).hexdigest()[:12]
+        return os.path.join(index_dir, f"{os.path.basename(self.csv_path)}.{self._digest[:12]}."
+                                       f"{backend_name}.{weights_digest}.idx")
+
+    def _index_fingerprint(self, weights_key):
+        """Identifies the rows an index is fitted on: the full catalog digest and the weights."""
+        return f"{self._digest}.{hashlib.sha1(weights_key).hexdigest()}"
+
+    def _load_index(self, backend_name, path, weighted_features, fingerprint):
+        if not os.path.exists(path):
+            return None
+        try:
+            return nn_backends.load_backend(backend_name, path, weighted_features, fingerprint)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Ignoring unreadable index {path}: {e}")
+            return None
+
+    def _save_index(self, model, path, fingerprint):
+        try:
+            model.save(path, fingerprint)
+        except OSError as e:
+            print(f"Warning: Could not save the nearest-neighbour index to {path}: {e}")
+            return
+        # Drop indexes saved for earlier versions of this catalog
+        prefix = f"{os.path.basename(self.csv_path)}.{self._digest[:12]}."
+        for stale in glob.glob(os.path.join(os.path.dirname(path), glob.escape(os.path.basename(self.csv_path))
+                                            + ".*.idx")):
+            if not os.path.basename(stale).startswith(prefix):
+                os.remove(stale)
+
+    def get_index(self, sqrt_knn_weights):
+        """Returns a neighbour index over the weighted catalog, reusing a cached or saved fit."""
+        self.refresh()
+        with self._lock:
+            key = np.asarray(sqrt_knn_weights, dtype=float).tobytes()
+            model = self._indexes.get(key)
+            if model is not None:
+                self._indexes.move_to_end(key)
+                return model
+
+            # A view: the brute-force and IVF indexes read the weighted rows without copying the catalog
+            weighted_features = nn_backends.WeightedRows(self.features_scaled, sqrt_knn_weights)
+            backend_name = self.backend_name()
+            backend = nn_backends.make_backend(backend_name, len(self), len(self.feature_names))
+            # Edited catalogs no longer match the file, so their indexes are neither saved nor loaded
+            persist = backend.persistent and self.persist_indexes and not self._modified
+            path = self._index_path(backend_name, key) if persist else None
+            fingerprint = self._index_fingerprint(key) if persist else None
+            model = None
+            if path is not None:
+                with metrics.timer("index_load"):
+                    model = self._load_index(backend_name, path, weighted_features, fingerprint)
+            if model is None:
+                with metrics.timer("index_fit"):
+                    model = backend.fit(weighted_features)
+                if path is not None:
+                    self._save_index(model, path, fingerprint)
+            model = nn_backends.PatchableIndex(model, len(self))
+            for position in self._deleted:
+                model.remove(position)
+
+            self._indexes[key] = model
+            while len(self._indexes) > self.max_cached_indexes:
+                self._indexes.popitem(last=False)
+            return model
+
+
+def compile_catalog(csv_path=CATALOG_PATH, output_path=None):
+    """
+    Compiles the catalog CSV into a binary columnar file that DroneCatalog memory-maps.
+
+    The file holds the preprocessed, encoded feature matrix and its min/max-scaled
+    counterpart, the Drone ID column, the category vocabularies and the scaling bounds.
+    The features hold missing values as 0, like the CSV-loaded catalog; a mask of the
+    missing cells of every column that has any keeps them NaN in the original columns.
+
+    Args:
+        csv_path (str): The drones dataset CSV.
+        output_path (str, optional): Output file. Defaults to the CSV path with a .dcat extension.
+
+    Returns:
+        str: The path of the compiled catalog.
+    """
+    if output_path is None:
+        output_path = os.path.splitext(csv_path)[0] + ".dcat"
+    catalog = DroneCatalog(csv_path)
+    catalog.refresh()
+
+    encoded_ids = [str(drone_id).encode("utf-8") for drone_id in catalog.df["Drone ID"]]
+    drone_id_offsets = np.zeros(len(encoded_ids) + 1, dtype=np.int64)
+    np.cumsum([len(drone_id) for drone_id in encoded_ids], out=drone_id_offsets[1:])
+    missing_columns = [name for name in catalog.feature_names
+                       if name in catalog.df.columns and catalog.df[name].isna().any()]
+
+    metadata = {
+        "source": os.path.basename(csv_path),
+        "source_sha256": catalog._digest,
+        "n_rows": len(catalog),
+        "columns": catalog._columns,
+        "feature_names": catalog.feature_names,
+        "vocabularies": {
+            "Camera Quality": CAMERA_QUALITY_MAP,
+            **{feature: [col[len(feature) + 1:] for col in catalog.feature_names if col.startswith(feature + "_")]
+               for feature in ONE_HOT_FEATURES},
+        },
+        "data_min": catalog.scaler.data_min_.tolist(),
+        "data_max": catalog.scaler.data_max_.tolist(),
+        "missing_columns": missing_columns,
+    }
+    arrays = {
+        "drone_ids": np.frombuffer(b"".join(encoded_ids), dtype=np.uint8),
+        "drone_id_offsets": drone_id_offsets,
+        "features": catalog.features,
+        "features_scaled": catalog.features_scaled,
+        "missing": catalog.df[missing_columns].isna().to_numpy().reshape(len(catalog), len(missing_columns)),
+    }
+    catalog_format.write_arrays(output_path, arrays, metadata)
+    return output_path
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(csv_path=CATALOG_PATH):
+    """Returns the shared DroneCatalog for csv_path, creating it on first use."""
+    with _catalogs_lock:
+        catalog = _catalogs.get(csv_path)
+        if catalog is None:
+            catalog = DroneCatalog(csv_path)
+            _catalogs[csv_path] = catalog
+    catalog.refresh()
+    return catalog
+
+
+def pareto_front(objectives=None, catalog=None):
+    """
+    The drones on the Pareto front of the given objectives, e.g. the cheapest drone for each
+    level of battery life, payload and range, instead of a single blended ranking.
+
+    Args:
+        objectives (dict, optional): Numeric column -> "min" or "max". Defaults to SKYLINE_OBJECTIVES.
+        catalog (DroneCatalog): Catalog to query; defaults to the shared catalog.
+
+    Returns:
+        pd.DataFrame: The original rows of the front, ordered by the first objective.
+    """
+    objectives = objectives or SKYLINE_OBJECTIVES
+    if catalog is None:
+        catalog = get_catalog()
+    front = catalog.rows(catalog.skyline(objectives))
+    first, direction = next(iter(objectives.items()))
+    return front.sort_values(first, ascending=direction == "min", kind="stable")
+
+
+# --- Result Cache ---
+def _canonical_value(value):
+    """Converts numpy scalars and tuples so equal requests serialize, and hash, equally."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(item) for item in value]
+    return value
+
+
+class ResultCache:
+    """
+    LRU result cache for get_top_drones, with an optional time to live.
+
+    Keys are a canonical hash of the normalized user input, the weights, the query options
+    and the catalog version, so any edit or reload of the catalog misses. Entries of older
+    catalog versions are dropped as soon as a newer version is seen, and the whole cache is
+    cleared when the weights file changes.
+
+    Args:
+        max_entries (int): Entries kept before the least recently used one is evicted.
+        ttl (float, optional): Seconds an entry stays valid; None keeps entries until evicted.
+        weights_path (str, optional): Weights file whose changes clear the cache.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, weights_path=WEIGHTS_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.weights_path = weights_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._catalog_versions = {}
+        self._weights_mtime = self._read_weights_mtime()
+        self._lock = threading.Lock()
+
+    def _read_weights_mtime(self):
+        if self.weights_path is None:
+            return None
+        try:
+            return os.path.getmtime(self.weights_path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def catalog_key(catalog):
+        return f"{catalog.token}:{os.path.abspath(catalog.csv_path)}"
+
+    def make_key(self, catalog, user_input_gui, weights_gui, options):
+        canonical = {
+            "catalog": [self.catalog_key(catalog), catalog.version],
+            "user_input": {key: _canonical_value(value) for key, value in user_input_gui.items()},
+            "weights": weights_gui.fingerprint if isinstance(weights_gui, WeightsProfile)
+            else {key: _canonical_value(value) for key, value in weights_gui.items()},
+            "options": {key: _canonical_value(value) for key, value in options.items()},
+        }
+        return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _check_invalidation(self, catalog):
+        """Drops entries made stale by a weights file change or a new catalog version. Call with the lock held."""
+        weights_mtime = self._read_weights_mtime()
+        if weights_mtime != self._weights_mtime:
+            self._entries.clear()
+            self._weights_mtime = weights_mtime
+        catalog_key = self.catalog_key(catalog)
+        if self._catalog_versions.get(catalog_key, catalog.version) != catalog.version:
+            for key in [key for key, entry in self._entries.items() if entry[0] == catalog_key]:
+                del self._entries[key]
+        self._catalog_versions[catalog_key] = catalog.version
+
+    def get(self, catalog, key):
+        """Returns a copy of the cached results for key, or None."""
+        with self._lock:
+            self._check_invalidation(catalog)
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                metrics.inc("result_cache_misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.inc("result_cache_hits")
+        return [dict(drone) for drone in entry[2]]
+
+    def put(self, catalog, key, results):
+        with self._lock:
+            self._check_invalidation(catalog)
+            self._entries[key] = (self.catalog_key(catalog), time.monotonic(), [dict(drone) for drone in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+result_cache = ResultCache()
+
+
+# --- Main Drone Selection Function ---
+@metrics.timed("weight_preparation")
+def _knn_weight_vectors(catalog, weights_gui, original_user_input_keys):
+    if isinstance(weights_gui, WeightsProfile):
+        weights_gui.validate(catalog)
+        return weights_gui.knn_vectors(catalog.feature_names)
+    knn_feature_names = catalog.feature_names
+    knn_weights_array = prepare_knn_weights(knn_feature_names, original_user_input_keys, weights_gui)
+    sqrt_knn_weights = np.sqrt(knn_weights_array)
+
+    max_possible_weighted_scaled_vector = np.ones(len(knn_feature_names)) * sqrt_knn_weights
+    max_dist = np.linalg.norm(max_possible_weighted_scaled_vector)
+    if max_dist == 0: max_dist = 1.0  # Use float
+    return sqrt_knn_weights, max_dist
+
+
+def _weighted_distances(catalog, sqrt_knn_weights, user_weighted_scaled_vector, rows=None, chunk_size=65536):
+    """Weighted Euclidean distance from the user to every drone, or only to the drones at rows."""
+    n_rows = len(catalog) if rows is None else len(rows)
+    metrics.inc("rows_scanned", n_rows)
+    distances = np.empty(n_rows)
+    with metrics.timer("distance_scan"):
+        for start in range(0, n_rows, chunk_size):
+            if rows is None:
+                chunk = catalog.features_scaled[start:start + chunk_size]
             else:
-                match_info = "(Does not match)"
-            general_explanations.append(
-                f"{feature_name}: Requested '{user_value}', Drone '{drone_actual_value}' {match_info}."
-            )
+                chunk = catalog.features_scaled[rows[start:start + chunk_size]]
+            distances[start:start + chunk_size] = np.linalg.norm(
+                chunk * sqrt_knn_weights - user_weighted_scaled_vector, axis=1)
+    return distances
 
-        all_explanations = fuzzy_explanations + general_explanations
 
+def _knn_query(catalog, user_scaled_matrix, weights_gui, original_user_input_keys, k):
+    sqrt_knn_weights, max_dist = _knn_weight_vectors(catalog, weights_gui, original_user_input_keys)
+
+    # Ensure no NaN values are passed to the neighbour index
+    user_weighted_scaled_matrix = np.nan_to_num(user_scaled_matrix * sqrt_knn_weights)
+
+    model = catalog.get_index(sqrt_knn_weights)
+    with metrics.timer("index_query"):
+        distances, indices = model.kneighbors(user_weighted_scaled_matrix, n_neighbors=min(k, len(catalog)))
+    _count_index_query(catalog, model, indices)
+    return distances, indices, max_dist
+
+
+def _count_index_query(catalog, model, indices):
+    """Counts the neighbours an index query returned and, for the brute-force backend, the rows it scanned."""
+    metrics.inc("neighbors_returned", indices.size)
+    if model.name == "brute":
+        # The trees and the IVF index only visit part of the catalog, which they do not report
+        metrics.inc("rows_scanned", len(indices) * len(catalog))
+
+
+def _filtered_knn_query(catalog, user_scaled_matrix, weights_gui, original_user_input_keys, k, masks):
+    """k nearest neighbours of each user among the drones left by its hard-constraint mask."""
+    sqrt_knn_weights, max_dist = _knn_weight_vectors(catalog, weights_gui, original_user_input_keys)
+    user_weighted_scaled_matrix = np.nan_to_num(user_scaled_matrix * sqrt_knn_weights)
+
+    all_distances, all_indices = [], []
+    for user_weighted_scaled_vector, mask in zip(user_weighted_scaled_matrix, masks):
+        survivors = np.arange(len(catalog)) if mask is None else np.flatnonzero(mask)
+        n_neighbors = min(k, len(survivors))
+        fraction = len(survivors) / max(len(catalog), 1)
+
+        found = None
+        if n_neighbors and fraction >= INDEX_FILTER_MIN_FRACTION:
+            # Most drones survive: over-query the index and drop the filtered ones
+            n_fetch = min(len(catalog), int(np.ceil(n_neighbors / fraction * 2)))
+            model = catalog.get_index(sqrt_knn_weights)
+            with metrics.timer("index_query"):
+                distances, indices = model.kneighbors(user_weighted_scaled_vector.reshape(1, -1), n_neighbors=n_fetch)
+            _count_index_query(catalog, model, indices)
+            keep = np.ones(n_fetch, dtype=bool) if mask is None else mask[indices[0]]
+            if np.count_nonzero(keep) >= n_neighbors:
+                found = distances[0][keep][:n_neighbors], indices[0][keep][:n_neighbors]
+
+        if found is None:
+            distances = _weighted_distances(catalog, sqrt_knn_weights, user_weighted_scaled_vector, rows=survivors)
+            best = np.argpartition(distances, n_neighbors - 1)[:n_neighbors] \
+                if 0 < n_neighbors < len(survivors) else np.arange(n_neighbors)
+            best = best[np.argsort(distances[best], kind="stable")]
+            found = distances[best], survivors[best]
+        all_distances.append(found[0])
+        all_indices.append(found[1])
+    return all_distances, all_indices, max_dist
+
+
+def _blended_scores(catalog, user_input_gui, user_weighted_scaled_vector, sqrt_knn_weights, max_dist, weights_gui,
+                    W_knn, W_detailed, fuzzy_columns, rows=None):
+    """Distances and unrounded blended scores (0-1) of every drone, or of the drones at rows."""
+    distances = _weighted_distances(catalog, sqrt_knn_weights, user_weighted_scaled_vector, rows=rows)
+    candidate_columns = fuzzy_columns if rows is None else fuzzy_columns.iloc[rows]
+    knn_similarity_scores = np.maximum(0.0, 1.0 - distances / max_dist)
+    with metrics.timer("fuzzy_scoring"):
+        detailed_scores, _ = score_fuzzy_criteria(candidate_columns, user_input_gui, weights_gui, with_labels=False)
+    return distances, knn_similarity_scores * W_knn + detailed_scores * W_detailed
+
+
+def _exact_query(catalog, user_scaled_matrix, user_inputs_gui, weights_gui, original_user_input_keys,
+                 W_knn, W_detailed, top_n, masks=None):
+    """Blended score for every drone in the catalog (or every surviving drone); returns the top_n per input."""
+    sqrt_knn_weights, max_dist = _knn_weight_vectors(catalog, weights_gui, original_user_input_keys)
+    user_weighted_scaled_matrix = np.nan_to_num(user_scaled_matrix * sqrt_knn_weights)
+    fuzzy_columns = catalog.columns(FUZZY_CRITERIA)
+    if masks is None:
+        masks = [None] * len(user_inputs_gui)
+
+    all_distances, all_indices = [], []
+    for user_input_gui, user_weighted_scaled_vector, mask in zip(user_inputs_gui, user_weighted_scaled_matrix,
+                                                                 masks):
+        rows = None if mask is None else np.flatnonzero(mask)
+        distances, total_scores = _blended_scores(catalog, user_input_gui, user_weighted_scaled_vector,
+                                                  sqrt_knn_weights, max_dist, weights_gui, W_knn, W_detailed,
+                                                  fuzzy_columns, rows)
+        n_candidates = len(distances)
+
+        n_best = min(top_n, n_candidates)
+        if n_best < n_candidates:
+            best = np.argpartition(-total_scores, n_best - 1)[:n_best]
+        else:
+            best = np.arange(n_candidates)
+        best = best[np.argsort(-total_scores[best], kind="stable")]
+        all_distances.append(distances[best])
+        all_indices.append(best if rows is None else rows[best])
+    return all_distances, all_indices, max_dist
+
+
+def _rank_scores(catalog, distances, indices, max_dist, user_input_gui, weights_gui, W_knn, W_detailed, top_n):
+    """Scores the candidates; returns the best top_n positions into indices, best first, and the scores."""
+    candidate_columns = catalog.columns(FUZZY_CRITERIA).iloc[indices]
+    with metrics.timer("fuzzy_scoring"):
+        detailed_scores, _ = score_fuzzy_criteria(candidate_columns, user_input_gui, weights_gui, with_labels=False)
+
+    knn_similarity_scores = [max(0.0, 1.0 - (dist / max_dist)) if max_dist > 0 else 0.0 for dist in distances]
+    total_scores = [round((knn_similarity_score * W_knn + float(detailed_score) * W_detailed) * 100.0, 2)
+                    for knn_similarity_score, detailed_score in zip(knn_similarity_scores, detailed_scores)]
+    best = sorted(range(len(total_scores)), key=lambda position: total_scores[position], reverse=True)[:top_n]
+    return best, total_scores, knn_similarity_scores, detailed_scores
+
+
+def _rank_candidates(catalog, distances, indices, max_dist, user_input_gui, user_scaled_vector, weights_gui,
+                     W_knn, W_detailed, top_n):
+    indices = np.asarray(indices, dtype=np.int64)
+    best, total_scores, knn_similarity_scores, detailed_scores = _rank_scores(
+        catalog, distances, indices, max_dist, user_input_gui, weights_gui, W_knn, W_detailed, top_n)
+
+    # Only the returned drones are decoded, and their explanations are deferred until displayed
+    drones = catalog.rows(indices[best])
+    explanation_set = ExplanationSet(drones, np.array(catalog.features_scaled[indices[best]]), catalog.feature_names,
+                                     user_input_gui, user_scaled_vector, weights_gui, max_dist, W_knn, W_detailed)
+    top_drones_data = []
+    for rank, position in enumerate(best):
+        drone_original_row = drones.iloc[rank]
         top_drones_data.append({
             "Drone ID": drone_original_row["Drone ID"],
-            "Total Score (%)": round(total_score, 2),
+            "Total Score (%)": total_scores[position],
             "Price": drone_original_row.get("Budgets options", "N/A"),
-            "Explanation": all_explanations,
-            "_knn_dist": dist,
-            "_knn_score": round(knn_similarity_score, 3),
-            "_detailed_score": round(detailed_score, 3),
+            "Explanation": Explanation(explanation_set, rank),
+            "_knn_dist": distances[position],
+            "_knn_score": round(knn_similarity_scores[position], 3),
+            "_detailed_score": round(float(detailed_scores[position]), 3),
         })
+    return top_drones_data
+
+
+def get_top_drones(user_input_gui, weights_gui, k=8, W_knn=0.6, W_detailed=0.4, catalog=None, top_n=3,
+                   exact=False, constraints=None, use_cache=True):
+    """
+    Recommends the drones that best match a user input.
+
+    By default the k nearest neighbours (weighted Euclidean distance) are re-ranked by the
+    blended k-NN/fuzzy score. With exact=True the blended score is computed for every drone
+    in the catalog and the global top_n is returned, so no drone outside the k-NN set is missed.
+
+    Args:
+        user_input_gui (dict): The user requirements, keyed by catalog column.
+        weights_gui (dict): Criterion weights.
+        k (int): Number of nearest neighbours re-ranked in the default mode.
+        W_knn (float): Weight of the k-NN similarity in the total score.
+        W_detailed (float): Weight of the fuzzy detailed score in the total score.
+        catalog (DroneCatalog): Catalog to query; defaults to the shared catalog.
+        top_n (int): Number of drones returned.
+        exact (bool): Rank the whole catalog instead of the k nearest neighbours.
+        constraints (list[str], optional): Hard-constraint modes from HARD_CONSTRAINTS. Drones that
+            violate them are never considered, e.g. "within_budget" never exceeds the user's budget.
+        use_cache (bool): Serve repeated requests from result_cache.
+
+    Returns:
+        list[dict]: The top drones, best first. Empty if no drone satisfies the constraints.
+    """
+    return get_top_drones_batch([user_input_gui], weights_gui, k=k, W_knn=W_knn, W_detailed=W_detailed,
+                                top_n=top_n, catalog=catalog, exact=exact, constraints=constraints,
+                                use_cache=use_cache)[0]
+
+
+def get_top_drones_batch(user_inputs_gui, weights_gui, k=8, W_knn=0.6, W_detailed=0.4, top_n=3, catalog=None,
+                         exact=False, constraints=None, use_cache=True):
+    """
+    Scores many user inputs against the same weights in one pass.
+
+    All user vectors are preprocessed and scaled together and the neighbour
+    search is a single kneighbors call over the whole batch.
+
+    Args:
+        user_inputs_gui (list[dict]): User inputs, each shaped like the get_top_drones input.
+        weights_gui (dict): Criterion weights shared by every request.
+        k (int): Number of nearest neighbours considered per request.
+        W_knn (float): Weight of the k-NN similarity in the total score.
+        W_detailed (float): Weight of the fuzzy detailed score in the total score.
+        top_n (int): Number of drones returned per request.
+        catalog (DroneCatalog): Catalog to query; defaults to the shared catalog.
+        exact (bool): Rank the whole catalog per request instead of the k nearest neighbours.
+        constraints (list[str], optional): Hard-constraint modes from HARD_CONSTRAINTS, applied per request.
+        use_cache (bool): Serve repeated requests from result_cache; only the misses are scored.
+
+    Returns:
+        list[list[dict]]: One ranked result list per input, in input order.
+    """
+    user_inputs_gui = list(user_inputs_gui)
+    if not user_inputs_gui:
+        return []
+    metrics.inc("requests", len(user_inputs_gui))
+    with metrics.timer("get_top_drones"):
+        return _cached_top_drones_batch(user_inputs_gui, weights_gui, k, W_knn, W_detailed, top_n, catalog, exact,
+                                        constraints, use_cache)
+
+
+def score_catalog(user_input_gui, weights_gui, W_knn=0.6, W_detailed=0.4, catalog=None):
+    """
+    The blended score of every drone for one user input, as get_top_drones(exact=True) ranks them.
+
+    Returns:
+        np.ndarray: Total Score (%) per catalog position, unrounded; NaN for deleted drones.
+    """
+    if catalog is None:
+        catalog = get_catalog()
+    else:
+        catalog.refresh()
+    user_scaled_vector = catalog.transform_user_inputs([user_input_gui])[0]
+    sqrt_knn_weights, max_dist = _knn_weight_vectors(catalog, weights_gui, set(user_input_gui))
+    user_weighted_scaled_vector = np.nan_to_num(user_scaled_vector * sqrt_knn_weights)
+    _, total_scores = _blended_scores(catalog, user_input_gui, user_weighted_scaled_vector, sqrt_knn_weights,
+                                      max_dist, weights_gui, W_knn, W_detailed, catalog.columns(FUZZY_CRITERIA))
+    total_scores = total_scores * 100.0
+    active = catalog.active_mask()
+    if active is not None:
+        total_scores[~active] = np.nan
+    return total_scores
+
+
+def _cached_top_drones_batch(user_inputs_gui, weights_gui, k, W_knn, W_detailed, top_n, catalog, exact, constraints,
+                             use_cache):
+    if catalog is None:
+        catalog = get_catalog()
+    else:
+        catalog.refresh()
+    if not use_cache:
+        return _score_batch(catalog, user_inputs_gui, weights_gui, k, W_knn, W_detailed, top_n, exact, constraints)
+
+    options = {"k": k, "W_knn": W_knn, "W_detailed": W_detailed, "top_n": top_n, "exact": exact,
+               "constraints": sorted(constraints or [])}
+    keys = [result_cache.make_key(catalog, user_input, weights_gui, options) for user_input in user_inputs_gui]
+    results = [result_cache.get(catalog, key) for key in keys]
+    misses = {}  # Identical inputs within the batch are scored once
+    for position, key in enumerate(keys):
+        if results[position] is None:
+            misses.setdefault(key, position)
+    if misses:
+        scored = _score_batch(catalog, [user_inputs_gui[position] for position in misses.values()], weights_gui,
+                              k, W_knn, W_detailed, top_n, exact, constraints)
+        fresh = dict(zip(misses, scored))
+        for key, drones in fresh.items():
+            result_cache.put(catalog, key, drones)
+        for position, key in enumerate(keys):
+            if results[position] is None:
+                results[position] = [dict(drone) for drone in fresh[key]]
+    return results
+
+
+def get_top_candidates_batch(user_inputs_gui, weights_gui, k=8, W_knn=0.6, W_detailed=0.4, top_n=3, catalog=None,
+                             exact=False, constraints=None):
+    """
+    The catalog positions of the drones get_top_drones_batch would return, without decoding them.
+
+    Together with top_drones_from_candidates this splits a query in two, so the ranked
+    positions can be saved and turned into full results later.
+
+    Returns:
+        list[tuple]: (positions, k-NN distances) per input, best first, as np.ndarrays.
+    """
+    user_inputs_gui = list(user_inputs_gui)
+    if not user_inputs_gui:
+        return []
+    if catalog is None:
+        catalog = get_catalog()
+    else:
+        catalog.refresh()
+    _, distances, indices, max_dist = _query_batch(catalog, user_inputs_gui, weights_gui, k, W_knn, W_detailed, top_n,
+                                                   exact, constraints)
+    ranked = []
+    for i, user_input in enumerate(user_inputs_gui):
+        rows = np.asarray(indices[i], dtype=np.int64)
+        best = _rank_scores(catalog, distances[i], rows, max_dist, user_input, weights_gui, W_knn, W_detailed,
+                            top_n)[0]
+        ranked.append((rows[best], np.asarray(distances[i], dtype=float)[best]))
+    return ranked
+
+
+def top_drones_from_candidates(user_input_gui, weights_gui, positions, distances, W_knn=0.6, W_detailed=0.4,
+                               catalog=None):
+    """
+    Builds the get_top_drones results for drones ranked by get_top_candidates_batch.
+
+    Only the given drones are scored and decoded, so the cost does not grow with the catalog.
+
+    Args:
+        positions (np.ndarray): Catalog positions, best first.
+        distances (np.ndarray): Their k-NN distances.
+
+    Returns:
+        list[dict]: The results get_top_drones returns for the same query.
+    """
+    if catalog is None:
+        catalog = get_catalog()
+    else:
+        catalog.refresh()
+    _, max_dist = _knn_weight_vectors(catalog, weights_gui, set(user_input_gui))
+    # The scaled user vector only feeds the explanations, so it is computed if they are read,
+    # from a copy in case the caller reuses its dict by then
+    user_input_gui = dict(user_input_gui)
+    return _rank_candidates(catalog, distances, positions, max_dist, user_input_gui,
+                            lambda: catalog.transform_user_input(user_input_gui), weights_gui, W_knn, W_detailed,
+                            len(positions))
+
+
+def _query_batch(catalog, user_inputs_gui, weights_gui, k, W_knn, W_detailed, top_n, exact, constraints):
+    """Neighbour (or exact) query of a batch; returns the scaled inputs, candidate distances and rows, and max_dist."""
+    user_scaled_matrix = catalog.transform_user_inputs(user_inputs_gui)
+    all_keys = set().union(*(user_input.keys() for user_input in user_inputs_gui))
+    masks = None
+    if constraints:
+        constraint_index = catalog.constraint_index()
+        masks = [constraint_index.mask(user_input, constraints) for user_input in user_inputs_gui]
+    active = catalog.active_mask()
+    if active is not None:
+        masks = [active if mask is None else mask & active for mask in (masks or [None] * len(user_inputs_gui))]
+    if exact:
+        distances, indices, max_dist = _exact_query(catalog, user_scaled_matrix, user_inputs_gui, weights_gui,
+                                                    all_keys, W_knn, W_detailed, top_n, masks=masks)
+    elif masks is not None:
+        distances, indices, max_dist = _filtered_knn_query(catalog, user_scaled_matrix, weights_gui, all_keys, k,
+                                                           masks)
+    else:
+        distances, indices, max_dist = _knn_query(catalog, user_scaled_matrix, weights_gui, all_keys, k)
+    return user_scaled_matrix, distances, indices, max_dist
 
-    top_drones_data.sort(key=lambda x: x["Total Score (%)"], reverse=True)
-    return top_drones_data[:3] # only top 3 drones
 
+def _score_batch(catalog, user_inputs_gui, weights_gui, k, W_knn, W_detailed, top_n, exact, constraints):
+    user_scaled_matrix, distances, indices, max_dist = _query_batch(catalog, user_inputs_gui, weights_gui, k, W_knn,
+                                                                    W_detailed, top_n, exact, constraints)
+    return [
+        _rank_candidates(catalog, distances[i], indices[i], max_dist, user_input, user_scaled_matrix[i],
+                         weights_gui, W_knn, W_detailed, top_n)
+        for i, user_input in enumerate(user_inputs_gui)
+    ]
 
 
 if __name__ == "__main__":
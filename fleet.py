@@ -0,0 +1,333 @@
+# fleet.py
+"""
+Fleet composition: the set of drones a port should buy under one total budget.
+
+A port needs several capabilities at once, e.g. a thermal camera for night patrol and
+payload for cargo, which no single recommended drone may cover. optimize_fleet picks up
+to max_drones drones (a multiset when max_copies > 1) whose total price fits the budget,
+maximizing first the weighted coverage of the required capabilities, then the summed
+recommender score of the drones, then preferring the cheaper of the fleets found.
+
+The solver is a depth-first branch-and-bound over a pruned candidate set:
+    - Drones over budget or deleted are dropped.
+    - A drone is kept only if it is in the first max_drones layers of the price/score
+      skyline among the drones covering at least what it covers; any other drone has
+      max_drones cheaper-and-better stand-ins.
+    - A branch is cut when the coverage still reachable with the remaining budget, and
+      the best scores that still fit, cannot beat the incumbent. When the incumbent's
+      coverage is the most reachable, the score bound only counts completions that keep
+      it, from a table of the best score per capability set and fleet size.
+A greedy fleet seeds the incumbent, and the search stops at time_budget_s, returning
+the best fleet found so far with "optimal": False.
+
+Usage:
+    python fleet.py user_input.json --budget 20000 --max-drones 3
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import drone_selector
+import skyline
+
+# Capabilities a fleet can cover: required when the user input asks for more than 0, and
+# covered by a drone whose value reaches the user's
+FLEET_CAPABILITIES = [
+    "Thermal/Night Camera",
+    "Payload Capacity",
+    "Air/Water quality sensor availability",
+    "Flight Radius",
+]
+TIME_CHECK_INTERVAL = 256  # Search nodes between time-budget checks
+
+
+# --- Requirements and candidates ---
+def required_capabilities(user_input_gui, weights_gui):
+    """Returns [(capability, threshold, weight)] for the capabilities the user asks for, e.g. a night camera."""
+    required = []
+    for capability in FLEET_CAPABILITIES:
+        threshold = user_input_gui.get(capability)
+        weight = float(weights_gui.get(capability, 1.0))
+        if threshold is not None and float(threshold) > 0 and weight > 0:
+            required.append((capability, float(threshold), weight))
+    return required
+
+
+def _skyline_layers(prices, scores, n_layers):
+    """Positions in the first n_layers price/score skylines (cheaper and better), peeled one after another."""
+    remaining = np.arange(len(prices))
+    kept = []
+    for _ in range(n_layers):
+        if not len(remaining):
+            break
+        layer = remaining[skyline.skyline(np.column_stack([prices[remaining], -scores[remaining]]))]
+        kept.append(layer)
+        remaining = np.setdiff1d(remaining, layer, assume_unique=True)
+    return np.concatenate(kept) if kept else remaining
+
+
+def fleet_candidates(prices, scores, masks, budget, max_drones):
+    """
+    Prunes the catalog to the drones an optimal fleet can contain.
+
+    Args:
+        prices, scores (np.ndarray): Price and score per drone; NaN drones are ignored.
+        masks (np.ndarray): Bit mask of the required capabilities each drone covers.
+        budget (float): The total budget.
+        max_drones (int): Fleet size limit.
+
+    Returns:
+        np.ndarray: Candidate positions.
+    """
+    # Drones covering nothing required stay: they add no coverage, but their score still ranks fleets
+    eligible = ~np.isnan(prices) & ~np.isnan(scores) & (prices >= 0) & (prices <= budget)
+    groups = {}
+    for mask in np.unique(masks[eligible]):
+        group = np.flatnonzero(eligible & (masks == mask))
+        groups[int(mask)] = group[_skyline_layers(prices[group], scores[group], max_drones)]
+
+    # A drone covering a superset of the capabilities can stand in as well
+    candidates = []
+    for mask, group in groups.items():
+        rivals = np.concatenate([group] + [other for other_mask, other in groups.items()
+                                           if other_mask != mask and other_mask & mask == mask])
+        kept = rivals[_skyline_layers(prices[rivals], scores[rivals], max_drones)]
+        candidates.append(kept[masks[kept] == mask])
+    return np.sort(np.concatenate(candidates)) if candidates else np.array([], dtype=np.int64)
+
+
+# --- Search ---
+class _FleetSearch:
+    """Branch-and-bound over candidates sorted by score, best first."""
+
+    def __init__(self, prices, scores, masks, capability_weights, budget, max_drones, max_copies, deadline):
+        self.prices = prices
+        self.scores = scores
+        self.masks = masks
+        self.capability_weights = capability_weights
+        self.budget = budget
+        self.max_drones = max_drones
+        self.max_copies = max_copies
+        self.deadline = deadline
+        self.nodes = 0
+        self.timed_out = False
+        self.best_key = None
+        self.best_counts = None
+        ratios = scores / np.maximum(prices, 1e-9)
+        self.ratio_rank = np.empty(len(prices), dtype=np.int64)
+        self.ratio_rank[np.argsort(-ratios, kind="stable")] = np.arange(len(prices))
+        # Covered value per mask, for every mask the candidates can combine into
+        n_masks = 1 << len(capability_weights)
+        self.mask_values = np.array([sum(w for bit, w in enumerate(capability_weights) if mask >> bit & 1)
+                                     for mask in range(n_masks)])
+        self.cover_scores = self._cover_scores(n_masks)
+
+    def _cover_scores(self, n_masks):
+        """
+        cover_scores[i, m, k]: the best summed score of at most k units drawn from candidates i on
+        whose capabilities add up to exactly m, ignoring the budget (-inf if none do).
+        """
+        slots = np.arange(1, self.max_drones + 1)
+        table = np.full((len(self.prices) + 1, n_masks, self.max_drones + 1), -np.inf)
+        table[-1, 0, :] = 0.0
+        for i in range(len(self.prices) - 1, -1, -1):
+            current = table[i + 1].copy()
+            targets = np.arange(n_masks) | int(self.masks[i])
+            for _ in range(self.max_copies):
+                np.maximum.at(current, (targets[:, None], slots[None, :]), current[:, :-1] + self.scores[i])
+            table[i] = current
+        return table
+
+    def _key(self, covered, score, cost):
+        # Rounding keeps float noise from deciding between equal fleets
+        return (round(float(self.mask_values[covered]), 9), round(score, 9), -round(cost, 6))
+
+    def offer(self, counts, covered, score, cost):
+        key = self._key(covered, score, cost)
+        if self.best_key is None or key > self.best_key:
+            self.best_key = key
+            self.best_counts = dict(counts)
+
+    def _bound(self, start, covered, score, remaining_budget, slots):
+        start_covered = covered
+        affordable = np.flatnonzero(self.prices[start:] <= remaining_budget) + start
+        if len(affordable):
+            covered |= int(np.bitwise_or.reduce(self.masks[affordable]))
+            # Candidates are sorted by score, so the best slots that fit come first
+            top = np.repeat(self.scores[affordable[:slots]], self.max_copies)[:slots]
+            gain = min(float(top.sum()), self._fractional_bound(affordable, remaining_budget))
+            value = round(float(self.mask_values[covered]), 9)
+            if self.best_key is not None and value == self.best_key[0]:
+                # Only completions keeping the incumbent's coverage can beat it, which may rule out the top scores
+                keeps = self.mask_values[np.arange(len(self.mask_values)) | start_covered] >= value - 1e-9
+                gain = min(gain, float(self.cover_scores[start, keeps, slots].max()))
+            score += gain
+        return round(float(self.mask_values[covered]), 9), round(score, 9)
+
+    def _fractional_bound(self, affordable, remaining_budget):
+        """Best score of the fractional knapsack over affordable (by score per euro) within the remaining budget."""
+        by_ratio = affordable[self.ratio_rank[affordable].argsort()]
+        prices = np.repeat(self.prices[by_ratio], self.max_copies)
+        scores = np.repeat(self.scores[by_ratio], self.max_copies)
+        spent = np.cumsum(prices)
+        whole = int(np.searchsorted(spent, remaining_budget, side="right"))
+        bound = float(scores[:whole].sum())
+        if whole < len(prices) and prices[whole] > 0:
+            bound += scores[whole] * (remaining_budget - (spent[whole - 1] if whole else 0.0)) / prices[whole]
+        return bound
+
+    def search(self, start, counts, covered, score, cost, slots):
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            self.timed_out = True
+        if self.timed_out:
+            return
+        self.offer(counts, covered, score, cost)
+        if slots == 0 or start >= len(self.prices):
+            return
+        # Cost only breaks exact ties, so a branch that cannot raise coverage or score is cut
+        if self._bound(start, covered, score, self.budget - cost, slots) <= self.best_key[:2]:
+            return
+
+        for i in range(start, len(self.prices)):
+            if self.timed_out:
+                return
+            price = self.prices[i]
+            taken = counts.get(i, 0)
+            if taken >= self.max_copies or cost + price > self.budget:
+                continue
+            counts[i] = taken + 1
+            # Another copy of i may follow, so the search restarts at i
+            self.search(i, counts, covered | int(self.masks[i]), score + float(self.scores[i]), cost + price,
+                        slots - 1)
+            if taken:
+                counts[i] = taken
+            else:
+                del counts[i]
+
+
+def _greedy(search):
+    """Seeds the incumbent: repeatedly adds the drone with the most new coverage per euro, then the best score."""
+    counts, covered, score, cost = {}, 0, 0.0, 0.0
+    for _ in range(search.max_drones):
+        best, best_key = None, None
+        for i in range(len(search.prices)):
+            if counts.get(i, 0) >= search.max_copies or cost + search.prices[i] > search.budget:
+                continue
+            gain = search.mask_values[covered | int(search.masks[i])] - search.mask_values[covered]
+            key = (gain / max(search.prices[i], 1e-9), search.scores[i])
+            if best_key is None or key > best_key:
+                best, best_key = i, key
+        if best is None:
+            break
+        counts[best] = counts.get(best, 0) + 1
+        covered |= int(search.masks[best])
+        score += float(search.scores[best])
+        cost += search.prices[best]
+    search.offer(counts, covered, score, cost)
+
+
+def optimize_fleet(user_input_gui, weights_gui, budget, max_drones=3, max_copies=1, time_budget_s=2.0,
+                   W_knn=0.6, W_detailed=0.4, catalog=None):
+    """
+    Picks the fleet that best covers the required capabilities within a total budget.
+
+    Args:
+        user_input_gui (dict): The user input, as passed to get_top_drones; its capability values
+            (night camera, payload, air/water sensor, flight radius) are the requirements.
+        weights_gui (Mapping): Criterion weights; they score the drones and weight the capabilities.
+        budget (float): Total price of the fleet.
+        max_drones (int): Fleet size limit.
+        max_copies (int): How many units of the same drone a fleet may hold.
+        time_budget_s (float): Search time limit; the best fleet found so far is returned when it runs out.
+        W_knn, W_detailed (float): The score blend, as in get_top_drones.
+        catalog (DroneCatalog): Catalog to query; defaults to the shared catalog.
+
+    Returns:
+        dict: "fleet" (one entry per unit: Drone ID, Price, Total Score (%), Covers), "total_price",
+              "covered", "missing", "coverage (%)", "optimal" (False if the time budget ran out),
+              "candidates" and "nodes".
+    """
+    start_time = time.perf_counter()
+    if catalog is None:
+        catalog = drone_selector.get_catalog()
+    required = required_capabilities(user_input_gui, weights_gui)
+    scores = drone_selector.score_catalog(user_input_gui, weights_gui, W_knn=W_knn, W_detailed=W_detailed,
+                                          catalog=catalog)
+    columns = catalog.columns(["Budgets options"] + [capability for capability, _, _ in required])
+    prices = np.asarray(columns["Budgets options"], dtype=float)
+    masks = np.zeros(len(prices), dtype=np.int64)
+    for bit, (capability, threshold, _) in enumerate(required):
+        masks |= (np.asarray(columns[capability], dtype=float) >= threshold).astype(np.int64) << bit
+
+    candidates = fleet_candidates(prices, scores, masks, budget, max_drones)
+    # Best scores first, so good fleets are found early and the score bound tightens with depth
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+    search = _FleetSearch(prices[candidates], scores[candidates], masks[candidates],
+                          [weight for _, _, weight in required], budget, max_drones, max_copies,
+                          start_time + time_budget_s)
+    _greedy(search)
+    search.search(0, {}, 0, 0.0, 0.0, max_drones)
+
+    chosen = sorted(search.best_counts.items())
+    drones = catalog.rows([candidates[i] for i, _ in chosen]) if chosen else None
+    fleet, covered, total_price = [], 0, 0.0
+    for rank, (i, count) in enumerate(chosen):
+        covers = [capability for bit, (capability, _, _) in enumerate(required) if search.masks[i] >> bit & 1]
+        covered |= int(search.masks[i])
+        for _ in range(count):
+            fleet.append({"Drone ID": drones.iloc[rank]["Drone ID"], "Price": float(search.prices[i]),
+                          "Total Score (%)": round(float(search.scores[i]), 2), "Covers": covers})
+            total_price += float(search.prices[i])
+    total_weight = sum(weight for _, _, weight in required)
+    return {
+        "fleet": fleet,
+        "total_price": round(total_price, 2),
+        "covered": [capability for bit, (capability, _, _) in enumerate(required) if covered >> bit & 1],
+        "missing": [capability for bit, (capability, _, _) in enumerate(required) if not covered >> bit & 1],
+        "coverage (%)": round(100.0 * search.mask_values[covered] / total_weight, 2) if total_weight else 100.0,
+        "optimal": not search.timed_out,
+        "candidates": len(candidates),
+        "nodes": search.nodes,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pick a fleet of drones covering a port's needs within a budget.")
+    parser.add_argument("input", help="JSON file with one user input (or a record with a 'user_input').")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Total fleet budget; defaults to the input's 'Budgets options'.")
+    parser.add_argument("--catalog", default=drone_selector.CATALOG_PATH, help="Catalog CSV or compiled .dcat.")
+    parser.add_argument("--weights", default=drone_selector.WEIGHTS_PATH,
+                        help="Default weights file; named profiles are weights.<name>.conf next to it.")
+    parser.add_argument("--profile", default=None, help="Weights profile.")
+    parser.add_argument("--max-drones", type=int, default=3)
+    parser.add_argument("--max-copies", type=int, default=1, help="Units of the same drone a fleet may hold.")
+    parser.add_argument("--time-budget", type=float, default=2.0, help="Search time limit in seconds.")
+    args = parser.parse_args(argv)
+
+    with open(args.input, "r") as f:
+        record = json.load(f)
+    user_input = record.get("user_input", record)
+    budget = args.budget if args.budget is not None else float(user_input["Budgets options"])
+    weights = drone_selector.WeightsProfileStore(args.weights).get(args.profile)
+    start = time.perf_counter()
+    result = optimize_fleet(user_input, weights, budget, max_drones=args.max_drones, max_copies=args.max_copies,
+                            time_budget_s=args.time_budget, catalog=drone_selector.get_catalog(args.catalog))
+    elapsed = time.perf_counter() - start
+
+    status = "optimal" if result["optimal"] else "best found before the time budget ran out"
+    print(f"Fleet for {budget:.2f} ({status}; {result['candidates']} candidates, {result['nodes']} nodes, "
+          f"{elapsed * 1000:.1f} ms):")
+    for drone in result["fleet"]:
+        covers = ", ".join(drone["Covers"]) or "-"
+        print(f"  {drone['Drone ID']:<32} {drone['Price']:>10.2f}  {drone['Total Score (%)']:>6.2f}%  {covers}")
+    print(f"Total {result['total_price']:.2f}; coverage {result['coverage (%)']}%"
+          + (f"; missing {', '.join(result['missing'])}" if result["missing"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# form_input.py
+"""
+The configuration form's choices and their translation into a recommender user input.
+
+Kept free of Qt so recommendation_table can enumerate the form and transform its values
+on a headless machine; GUI.py builds its widgets from the same choices.
+"""
+
+import metrics
+
+# --- Form choices ---
+PORT_SIZES = ["Small", "Medium", "Big", "Very Big"]
+PORT_LOCATIONS = ["Baltic Sea", "West Mediterranean", "Central Mediterranean", "Adriatic Sea",
+                  "Great North Sea", "Celtic Sea", "Iberian Cost", "Aegean Sea", "Black Sea"]
+CAMERA_RESOLUTIONS = {
+    "Low": "480p",
+    "Average": "720p",
+    "High": "1080p",
+    "Very High": "4K"
+}
+CARGO_OPTIONS = ["No", "Low Weight", "High Weight"]
+TRANSMISSION_OPTIONS = ["No Transmission", "Slow", "Average", "High"]
+SENSOR_OPTIONS = ["Yes", "No"]
+NIGHT_USAGE_OPTIONS = ["Yes", "No", "Occasionally"]
+
+
+@metrics.timed("transform_user_input")
+def transform_user_input(user_input_gui):
+    radius_map = {
+        "Small": [1, 150],
+        "Medium": [5, 400],
+        "Big": [7, 600],
+        "Very Big": [10, 800]
+    }
+
+    transmission_map = {
+        "No Transmission": [0, 0],
+        "Slow": [1, 20],
+        "Average": [1, 50],
+        "High": [1, 85]
+    }
+
+    import location
+
+    loc = location.get_historical_weather_open_meteo(user_input_gui["Port Location"])
+    wind = loc["average_max_wind_kmh"]
+    temp = loc["average_min_temp_C"]
+    rtt = transmission_map.get(user_input_gui["Data Transmission"])[0]
+    speed = transmission_map.get(user_input_gui["Data Transmission"])[1]
+    radAndHeigh = radius_map.get(user_input_gui["Port Size"], -1)
+    radius = radAndHeigh[0]
+    height = radAndHeigh[1]
+    user_input = {
+        "Flight Radius": radius,
+        "Flight height": height,
+        "Thermal/Night Camera": 0.0 if user_input_gui["Night Vision"] == "No" else 1.0,
+        "Max wind resistance": wind,
+        "Budgets options": user_input_gui["Budget (€)"],
+        "Camera Quality": user_input_gui["Camera Performance"],
+        "ISO range": 25600 if user_input_gui["Night Vision"] == "Yes" else (
+            6400 if user_input_gui["Night Vision"] == "Occasionally" else 3200),
+        "Battery Life": user_input_gui["Battery Life (min)"],
+        "Payload Capacity": 0 if user_input_gui["Cargo"] == "No" else (
+            10 if user_input_gui["Cargo"] == "Low Weight" else 23),
+        "Dimensions": user_input_gui["Dimensions (cm³)"],
+        "Real-time data transmission": rtt,
+        "Transmission bandwidth": speed,
+        "Data storage ability": user_input_gui["Storage (GB)"],
+        "Air/Water quality sensor availability": 1 if user_input_gui["Air/Water Sensors"] == "Yes" else 0,
+        "Noise level": user_input_gui["Noise level"],
+        "Operating Temperature": temp,
+        "Class Identification Label": get_drone_class_from_volume(user_input_gui["Dimensions (cm³)"]),
+        "Charging Time": user_input_gui["Charging Time (min)"],
+        "Automatic Landing/Takeoff": 1,
+        "GPS Supported Systems": "GPS+Galileo",
+        "Automated Path Finding": 1 if int(user_input_gui["Budget (€)"]) >= 8000 else 0,
+    }
+
+    return user_input
+
+def get_drone_class_from_volume(volume_cm3: float) -> str:
+        """
+        Determines the drone class (C0 to C4) based on its volume in cm³.
+
+        Args:
+            volume_cm3 (float): The volume of the drone in cubic centimeters.
+
+        Returns:
+            str: The corresponding drone class (e.g., "C0", "C1", "C2", "C3", "C4").
+                 Returns "Unknown" if the input volume is not a valid number.
+        """
+        try:
+            volume = float(volume_cm3)
+        except (ValueError, TypeError):
+            print(f"Warning: Invalid volume input '{volume_cm3}'. Returning 'Unknown'.")
+            return "Unknown"
+
+        if volume <= 0:
+            # Drones must have a positive volume. Assign to smallest class or handle as error.
+            # For this function, we'll assign to C0 as the smallest possible class.
+            return "C0"
+        elif volume <= 5000:  # Up to 5000 cm³
+            return "C0"
+        elif volume <= 8750:  # From 5001 cm³ to 8750 cm³
+            return "C1"
+        elif volume <= 12500:  # From 8751 cm³ to 12500 cm³
+            return "C2"
+        elif volume <= 16250:  # From 12501 cm³ to 16250 cm³
+            return "C3"
+        else:  # Greater than 16250 cm³ (up to 20000 and beyond)
+            return "C4"
@@ -10,17 +10,140 @@ port_coords = {
     "Black Sea": (43, 33.0),
 }
 
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import requests
 from datetime import datetime, timedelta
 
-def get_historical_weather_open_meteo(region):
+import metrics
+
+ARCHIVE_API_URL = "https://archive-api.open-meteo.com/v1/era5"
+REQUEST_TIMEOUT = 30  # seconds
+WEATHER_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".weather_cache.json")
+WEATHER_CACHE_TTL = 24 * 60 * 60  # seconds; the yearly averages only change once a day
+
+
+class WeatherCache:
+    """
+    Persistent JSON cache of weather results, one entry per coordinates.
+
+    Each entry holds the latest result (its "period" names the date range it covers),
+    and a new fetch replaces it. Entries younger than the TTL are served without
+    contacting the API, even once the last-year range has rolled over to a new day.
+    Older entries are kept so they can be served as a fallback when the API is unreachable.
+
+    Args:
+        path (str): JSON file backing the cache.
+        ttl (float): Seconds an entry stays fresh.
+    """
+
+    def __init__(self, path=WEATHER_CACHE_PATH, ttl=WEATHER_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._entries = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(lat, lon):
+        return f"{lat},{lon}"
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, "r") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                entries = {}
+            # Files written before entries were keyed by coordinates alone hold "lat,lon|start|end"
+            # keys, one per day; only the latest of each survives
+            self._entries = {}
+            for key, entry in entries.items():
+                key = key.split("|", 1)[0]
+                if key not in self._entries or entry["fetched_at"] > self._entries[key]["fetched_at"]:
+                    self._entries[key] = entry
+        return self._entries
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, lat, lon, ttl=None):
+        """Returns the cached result for these coordinates if it is still fresh, otherwise None."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._load().get(self.make_key(lat, lon))
+        if entry is None or time.time() - entry["fetched_at"] > ttl:
+            return None
+        return entry["data"]
+
+    def get_latest(self, lat, lon):
+        """Returns the cached result for these coordinates regardless of age, or None."""
+        with self._lock:
+            entry = self._load().get(self.make_key(lat, lon))
+        return None if entry is None else entry["data"]
+
+    def put(self, lat, lon, data):
+        """Stores data as the result for these coordinates, replacing the previous one."""
+        with self._lock:
+            self._load()[self.make_key(lat, lon)] = {
+                "fetched_at": time.time(),
+                "data": data,
+            }
+            self._save()
+
+    def invalidate(self, lat=None, lon=None):
+        """Drops every entry, or only the entries for the given coordinates."""
+        with self._lock:
+            entries = self._load()
+            if lat is None and lon is None:
+                entries.clear()
+            else:
+                entries.pop(self.make_key(lat, lon), None)
+            self._save()
+
+
+weather_cache = WeatherCache()
+
+
+def invalidate_weather_cache(region=None):
+    """
+    Removes cached weather data so the next call goes to the API.
+
+    Args:
+        region (str, optional): The region to invalidate (key in port_coords).
+                                If omitted, the whole cache is cleared.
+    """
+    if region is None:
+        weather_cache.invalidate()
+    elif region in port_coords:
+        weather_cache.invalidate(*port_coords[region])
+
+
+def get_historical_weather_open_meteo(region, use_cache=True, ttl=None, cache=None,
+                                     base_url=ARCHIVE_API_URL, timeout=REQUEST_TIMEOUT, session=None):
     """
     Retrieves historical weather data (strongest wind and lowest temperature)
     for the last year for a given region using Open-Meteo archive API.
 
+    Results are cached on disk per region. A fresh cache entry is returned
+    without a network round-trip, and when the API cannot be reached the
+    cached result for the region is served instead, however old.
+
     Args:
         region (str): The name of the region (key in port_coords).
+        use_cache (bool): Whether to read from and write to the cache.
+        ttl (float, optional): Seconds a cached result stays fresh. Defaults to the cache's TTL.
+        cache (WeatherCache, optional): Cache to use. Defaults to the module-level weather_cache.
+        base_url (str): Archive endpoint; can point to a local stub server.
+        timeout (float): Seconds to wait for the API before giving up.
+        session (requests.Session, optional): Session to reuse pooled connections from.
 
     Returns:
         dict or str: A dictionary with historical weather data (region, period,
@@ -30,6 +153,8 @@ def get_historical_weather_open_meteo(region):
         return f"Invalid Region: {region}"
 
     lat, lon = port_coords[region]
+    if cache is None:
+        cache = weather_cache
 
     # Calculate the dates for the last year
     end_date = datetime.now() - timedelta(days=1) # Up to yesterday
@@ -39,9 +164,16 @@ def get_historical_weather_open_meteo(region):
     start_date_str = start_date.strftime('%Y-%m-%d')
     end_date_str = end_date.strftime('%Y-%m-%d')
 
+    if use_cache:
+        cached = cache.get(lat, lon, ttl=ttl)
+        if cached is not None:
+            metrics.inc("weather_cache_hits")
+            return cached
+        metrics.inc("weather_cache_misses")
+
     # Endpoint for historical data (archive)
     url = (
-        f"https://archive-api.open-meteo.com/v1/era5"
+        f"{base_url}"
         f"?latitude={lat}&longitude={lon}"
         f"&daily=temperature_2m_min,wind_speed_10m_max"
         f"&start_date={start_date_str}"
@@ -50,11 +182,18 @@ def get_historical_weather_open_meteo(region):
     )
 
     try:
-        response = requests.get(url)
+        http = session if session is not None else requests
+        with metrics.timer("weather_fetch"):
+            response = http.get(url, timeout=timeout)
         # Raise an exception for bad status codes (4xx or 5xx)
         response.raise_for_status()
 
     except requests.exceptions.RequestException as e:
+        metrics.inc("weather_fetch_errors")
+        stale = cache.get_latest(lat, lon) if use_cache else None
+        if stale is not None:
+            print(f"Warning: Error contacting API ({e}). Using cached weather for {stale['period']}.")
+            return stale
         return f"Error contacting API: {e}"
 
     data = response.json()
@@ -79,10 +218,87 @@ def get_historical_weather_open_meteo(region):
     average_max_wind_speed_kmh = np.nanmean(daily_winds_max_array)
 
 
-    return {
+    result = {
         "region": region,
         "period": f"{start_date_str} to {end_date_str}",
-        "average_max_wind_kmh": round(average_max_wind_speed_kmh, 1),
-        "average_min_temp_C": round(average_min_temp_C, 1)
+        "average_max_wind_kmh": round(float(average_max_wind_speed_kmh), 1),
+        "average_min_temp_C": round(float(average_min_temp_C), 1)
+    }
+    if use_cache:
+        cache.put(lat, lon, result)
+    return result
+
+
+
+def _timed_fetch(region, **kwargs):
+    start = time.perf_counter()
+    result = get_historical_weather_open_meteo(region, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def prefetch_weather(regions=None, max_workers=None, **kwargs):
+    """
+    Fetches the weather for several regions concurrently, filling the cache.
+
+    All requests share one pooled requests.Session. Extra keyword arguments
+    are passed to get_historical_weather_open_meteo.
+
+    Args:
+        regions (list[str], optional): Regions to fetch. Defaults to every region in port_coords.
+        max_workers (int, optional): Thread pool size. Defaults to one thread per region.
+
+    Returns:
+        tuple: A dict mapping each region to its weather result, and a timings dict with
+               the total wall-clock seconds and the seconds spent on each region.
+    """
+    regions = list(port_coords) if regions is None else list(regions)
+    if not regions:
+        return {}, {"wall_clock_s": 0.0, "per_region_s": {}}
+    max_workers = max_workers or len(regions)
+
+    start = time.perf_counter()
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {region: executor.submit(_timed_fetch, region, session=session, **kwargs)
+                       for region in regions}
+            outcomes = {region: future.result() for region, future in futures.items()}
+    wall_clock = time.perf_counter() - start
+
+    results = {region: outcome[0] for region, outcome in outcomes.items()}
+    timings = {
+        "wall_clock_s": round(wall_clock, 3),
+        "per_region_s": {region: round(outcome[1], 3) for region, outcome in outcomes.items()},
+    }
+    return results, timings
+
+
+def compare_prefetch_timing(regions=None, **kwargs):
+    """
+    Times a serial fetch of every region against the concurrent prefetch, bypassing the cache.
+
+    Returns:
+        dict: Wall-clock seconds for the serial and concurrent runs and the resulting speedup.
+    """
+    regions = list(port_coords) if regions is None else list(regions)
+    kwargs["use_cache"] = False
+
+    start = time.perf_counter()
+    for region in regions:
+        get_historical_weather_open_meteo(region, **kwargs)
+    serial = time.perf_counter() - start
+
+    _, timings = prefetch_weather(regions, **kwargs)
+    concurrent = timings["wall_clock_s"]
+    return {
+        "regions": len(regions),
+        "serial_s": round(serial, 3),
+        "concurrent_s": concurrent,
+        "speedup": round(serial / concurrent, 2) if concurrent > 0 else None,
     }
 
+
+if __name__ == "__main__":
+    print(compare_prefetch_timing())
@@ -0,0 +1,188 @@
+# membership.py
+"""
+Fuzzy membership functions, defined in a JSON file and compiled to closed-form NumPy kernels.
+
+Each entry names a numeric catalog column, the direction the user's value bounds and
+three fuzzy sets. "at_least" criteria (payload, battery) list their sets from the worst
+to the best fit; "at_most" criteria (budget) list them from the best to the worst:
+
+    {
+        "Payload Capacity": {"direction": "at_least",
+                             "sets": {"low": ["tri", 0, 0, 5], "medium": ["tri", 3, 10, 15],
+                                      "high": ["tri", 12, 25, 40]}},
+        "Budgets options": {"direction": "at_most", "noun": "budget",
+                            "sets": {"affordable": ["tri", 0, 0, 5000], ...}},
+        "Noise level": {"direction": "at_most",
+                        "sets": {"quiet": ["trap", 0, 0, 50, 60], "moderate": ["tri", 50, 65, 80],
+                                 "loud": ["trap", 70, 85, 200, 200]}}
+    }
+
+Shapes are "tri" (a <= b <= c) and "trap" (a <= b <= c <= d). The kernels evaluate a
+whole column with a few array operations and give the same values as skfuzzy's trimf
+and trapmf (except that a missing value is never a member), so skfuzzy is not needed.
+"noun" names what an "at_most" value is ("budget" gives "within budget"/"over budget"),
+and an optional "explanation" template formats {user}, {drone} and {label}.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+MEMBERSHIPS_PATH = "memberships.json"
+DIRECTIONS = ("at_least", "at_most")
+
+# The definitions the recommender shipped with; used when there is no memberships file
+DEFAULT_MEMBERSHIPS = {
+    "Payload Capacity": {
+        "direction": "at_least",
+        "sets": {"low": ["tri", 0, 0, 5], "medium": ["tri", 3, 10, 15], "high": ["tri", 12, 25, 40]},
+        "explanation": "Payload: User wants >= {user}kg, Drone has {drone}kg (Drone category: '{label}')",
+    },
+    "Budgets options": {
+        "direction": "at_most",
+        "noun": "budget",
+        "sets": {"affordable": ["tri", 0, 0, 5000], "moderate": ["tri", 4000, 7500, 10000],
+                 "expensive": ["tri", 8000, 15000, 30000]},
+        "explanation": "Budget: User wants <= {user}, Drone costs {drone} (Drone category: '{label}')",
+    },
+    "Battery Life": {
+        "direction": "at_least",
+        "sets": {"short": ["tri", 0, 0, 45], "medium": ["tri", 30, 60, 90], "long": ["tri", 75, 120, 180]},
+        "explanation": "Battery: User wants >= {user}min, Drone has {drone}min (Drone category: '{label}')",
+    },
+}
+
+
+# --- Kernels ---
+# Each shape is the minimum of its rising and falling edges, clipped to [0, 1]; the edges are
+# the same expressions skfuzzy evaluates piecewise, so the values match it exactly.
+def _rising(x, low, high):
+    if low == high:
+        return np.where(x >= high, np.inf, -np.inf)
+    return (x - low) / float(high - low)
+
+
+def _falling(x, low, high):
+    if low == high:
+        return np.where(x <= low, np.inf, -np.inf)
+    return (high - x) / float(high - low)
+
+
+def _clip(y, x):
+    np.clip(y, 0.0, 1.0, out=y)
+    y[np.isnan(x)] = 0.0
+    return y
+
+
+def trimf(x, a, b, c):
+    """Triangular membership of every value in x: 0 outside (a, c), rising to 1 at b."""
+    x = np.asarray(x, dtype=float)
+    return _clip(np.minimum(_rising(x, a, b), _falling(x, b, c)), x)
+
+
+def trapmf(x, a, b, c, d):
+    """Trapezoidal membership of every value in x: 0 outside [a, d], 1 on [b, c]."""
+    x = np.asarray(x, dtype=float)
+    return _clip(np.minimum(_rising(x, a, b), _falling(x, c, d)), x)
+
+
+SHAPES = {"tri": trimf, "trap": trapmf}
+SHAPE_SIZES = {"tri": 3, "trap": 4}
+
+
+# --- Definitions ---
+class FuzzyCriterion:
+    """
+    The three fuzzy sets of one catalog column, compiled to kernels.
+
+    Args:
+        name (str): The catalog column.
+        direction (str): "at_least" or "at_most".
+        sets (dict): Label -> [shape, breakpoints...], in the order described in the module docstring.
+        noun (str): What an "at_most" value is, for labels and verdicts.
+        explanation (str, optional): Explanation template with {user}, {drone} and {label}.
+    """
+
+    def __init__(self, name, direction, sets, noun="requirement", explanation=None):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Membership of '{name}': direction must be one of {DIRECTIONS}, not {direction!r}")
+        if len(sets) != 3:
+            raise ValueError(f"Membership of '{name}': expected 3 fuzzy sets, got {len(sets)}")
+        self.name = name
+        self.direction = direction
+        self.noun = noun
+        self.labels = list(sets)
+        self._kernels = [self._compile(label, definition) for label, definition in sets.items()]
+        if explanation is None:
+            operator = ">=" if direction == "at_least" else "<="
+            explanation = f"{name}: User wants {operator} {{user}}, Drone has {{drone}} (Drone category: '{{label}}')"
+        self.explanation = explanation
+
+    def _compile(self, label, definition):
+        if not isinstance(definition, (list, tuple)) or not definition or definition[0] not in SHAPES:
+            raise ValueError(f"Membership of '{self.name}', set '{label}': expected [shape, breakpoints...] "
+                             f"with a shape from {sorted(SHAPES)}")
+        shape, breakpoints = definition[0], [float(value) for value in definition[1:]]
+        if len(breakpoints) != SHAPE_SIZES[shape]:
+            raise ValueError(f"Membership of '{self.name}', set '{label}': {shape} takes "
+                             f"{SHAPE_SIZES[shape]} breakpoints, got {len(breakpoints)}")
+        if breakpoints != sorted(breakpoints):
+            raise ValueError(f"Membership of '{self.name}', set '{label}': breakpoints must be ascending")
+        kernel = SHAPES[shape]
+        return lambda x: kernel(x, *breakpoints)
+
+    def memberships(self, x):
+        """Returns label -> membership array for the values in x."""
+        return {label: kernel(x) for label, kernel in zip(self.labels, self._kernels)}
+
+
+class MembershipSet(Mapping):
+    """
+    The compiled fuzzy criteria, by catalog column, in definition order.
+
+    Args:
+        definitions (dict): Column -> definition, as in the memberships file.
+    """
+
+    def __init__(self, definitions):
+        self.definitions = definitions
+        self.criteria = {}
+        for name, definition in definitions.items():
+            unknown = set(definition) - {"direction", "sets", "noun", "explanation"}
+            if unknown:
+                raise ValueError(f"Membership of '{name}': unknown fields {sorted(unknown)}")
+            self.criteria[name] = FuzzyCriterion(name, definition.get("direction"), definition.get("sets", {}),
+                                                 noun=definition.get("noun", "requirement"),
+                                                 explanation=definition.get("explanation"))
+        self.fingerprint = hashlib.sha1(json.dumps(definitions, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def __getitem__(self, name):
+        return self.criteria[name]
+
+    def __iter__(self):
+        return iter(self.criteria)
+
+    def __len__(self):
+        return len(self.criteria)
+
+
+def load_memberships(filepath=MEMBERSHIPS_PATH):
+    """
+    Reads and compiles a memberships file; without one, the built-in DEFAULT_MEMBERSHIPS apply.
+
+    Raises:
+        ValueError: If the file is not valid JSON or defines a criterion wrongly.
+    """
+    if filepath is None or not os.path.exists(filepath):
+        return MembershipSet(DEFAULT_MEMBERSHIPS)
+    with open(filepath, "r") as f:
+        try:
+            definitions = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid memberships file '{filepath}': {e}")
+    if not isinstance(definitions, dict):
+        raise ValueError(f"Invalid memberships file '{filepath}': expected a JSON object")
+    return MembershipSet(definitions)
@@ -0,0 +1,184 @@
+# metrics.py
+"""
+In-process metrics registry for the selection pipeline.
+
+Stages are timed with `with metrics.timer("stage"):` or @metrics.timed("stage"), and
+events counted with metrics.inc("counter"). Collection is off by default: a disabled
+registry hands out a shared no-op timer and returns from inc() immediately, so the
+instrumentation can stay in the hot path. Enable it with metrics.enable() or the
+DRONE_METRICS=1 environment variable, then read it with snapshot(), to_json() or
+to_prometheus().
+
+Stages recorded by the recommender include csv_load, compiled_load, preprocess,
+scale, transform_user_inputs, weight_preparation, index_fit, index_load, index_query,
+distance_scan, fuzzy_scoring, explanations, get_top_drones, weather_fetch and the
+GUI's transform_user_input. Counters include requests, rows_scanned (drones whose
+distance was computed: full scans, brute-force index queries), neighbors_returned
+(by index queries), result_cache_hits/misses and weather_cache_hits/misses.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+DURATION_BUCKETS_S = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Stage durations (count, sum, max and cumulative buckets) and counters.
+
+    Args:
+        enabled (bool): Whether to record anything.
+        buckets (list[float]): Upper bounds, in seconds, of the duration buckets.
+    """
+
+    def __init__(self, enabled=False, buckets=DURATION_BUCKETS_S):
+        self.enabled = enabled
+        self.buckets = list(buckets)
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name):
+        """Context manager timing the enclosed block as stage name."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * (len(self.buckets) + 1)}
+                self._stages[name] = stage
+            stage["count"] += 1
+            stage["sum"] += seconds
+            stage["max"] = max(stage["max"], seconds)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    stage["buckets"][i] += 1
+                    break
+            else:
+                stage["buckets"][-1] += 1
+
+    def inc(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """Returns {"stages": {name: {count, sum_s, mean_s, max_s, buckets}}, "counters": {name: value}}."""
+        with self._lock:
+            stages = {}
+            for name, stage in sorted(self._stages.items()):
+                cumulative, buckets = 0, {}
+                for bound, count in zip(self.buckets + ["+Inf"], stage["buckets"]):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                stages[name] = {"count": stage["count"], "sum_s": stage["sum"],
+                                "mean_s": stage["sum"] / stage["count"], "max_s": stage["max"], "buckets": buckets}
+            return {"enabled": self.enabled, "stages": stages, "counters": dict(sorted(self._counters.items()))}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix="drone_selector"):
+        """Renders the metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [f"# HELP {prefix}_stage_seconds Duration of pipeline stages.",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        for name, stage in snapshot["stages"].items():
+            for bound, count in stage["buckets"].items():
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stage["sum_s"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+        for name, value in snapshot["counters"].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(enabled=os.environ.get("DRONE_METRICS", "") not in ("", "0"))
+
+
+def enable(enabled=True):
+    registry.enabled = enabled
+
+
+def timer(name):
+    return registry.timer(name)
+
+
+def timed(name):
+    """Decorator timing every call of the decorated function as stage name."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with registry.timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe(name, seconds):
+    registry.observe(name, seconds)
+
+
+def inc(name, value=1):
+    registry.inc(name, value)
+
+
+def reset():
+    registry.reset()
+
+
+def snapshot():
+    return registry.snapshot()
+
+
+def to_json(indent=2):
+    return registry.to_json(indent)
+
+
+def to_prometheus(prefix="drone_selector"):
+    return registry.to_prometheus(prefix)
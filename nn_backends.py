@@ -0,0 +1,353 @@
+# nn_backends.py
+"""
+Nearest-neighbour backends for the drone catalog.
+
+Every backend exposes fit(X) and kneighbors(X, n_neighbors) like
+sklearn.neighbors.NearestNeighbors, and can be saved next to the catalog and
+loaded back without refitting. choose_backend picks one from the catalog
+size and dimensionality.
+
+X may be a WeightedRows view, which weights the catalog's scaled rows as they are
+read: the brute-force and IVF backends keep only the view, so a (memory-mapped)
+catalog is never copied per weight vector. The trees store their own weighted copy
+in memory, but only their node arrays are saved: the rows are read back from X on load.
+"""
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import DistanceMetric
+from sklearn.neighbors import BallTree, KDTree
+
+# Size/dimensionality thresholds used by choose_backend
+BRUTE_FORCE_MAX_ROWS = 20_000
+KD_TREE_MAX_DIMS = 16
+TREE_MAX_ROWS = 500_000
+SCAN_CHUNK_ROWS = 65_536
+
+
+class WeightedRows:
+    """
+    Read-only view of a matrix whose columns are multiplied by weights as rows are read.
+
+    Args:
+        rows (np.ndarray): The matrix, e.g. a memory-mapped catalog's scaled features.
+        weights (np.ndarray): One weight per column.
+    """
+
+    def __init__(self, rows, weights):
+        self.rows = rows
+        self.weights = np.asarray(weights, dtype=float)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def shape(self):
+        return (len(self.rows), len(self.weights))
+
+    def __getitem__(self, index):
+        return np.asarray(self.rows[index], dtype=float) * self.weights
+
+    def __array__(self, dtype=None, copy=None):
+        weighted = self[:]
+        return weighted if dtype is None else weighted.astype(dtype, copy=False)
+
+
+class BruteForceBackend:
+    """Exact linear scan in chunks; nothing to persist beyond the data itself."""
+    name = "brute"
+    persistent = False
+
+    def __init__(self, chunk_size=SCAN_CHUNK_ROWS):
+        self.chunk_size = chunk_size
+        self._X = None
+
+    def fit(self, X):
+        self._X = X
+        return self
+
+    def kneighbors(self, X, n_neighbors):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        n_rows = len(self._X)
+        # Squared distances as |x|^2 - 2 x.q + |q|^2 to pick the neighbours, one matrix product per chunk
+        squared = np.empty((len(X), n_rows))
+        for start in range(0, n_rows, self.chunk_size):
+            chunk = self._X[start:start + self.chunk_size]
+            squared[:, start:start + len(chunk)] = np.einsum("ij,ij->i", chunk, chunk) - 2.0 * (X @ chunk.T)
+        best = np.argpartition(squared, n_neighbors - 1, axis=1)[:, :n_neighbors] \
+            if n_neighbors < n_rows else np.tile(np.arange(n_rows), (len(X), 1))
+        # The returned distances are recomputed exactly, as the catalog's full scans compute them
+        distances = np.stack([np.linalg.norm(self._X[rows] - query, axis=1) for rows, query in zip(best, X)])
+        order = np.argsort(distances, axis=1, kind="stable")
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(best, order, axis=1)
+
+    def save(self, path, fingerprint):
+        raise ValueError("The brute-force backend has no index to save")
+
+
+class TreeBackend:
+    """Exact search with a KD-tree or a ball tree."""
+    persistent = True
+
+    def __init__(self, kind="kd_tree", leaf_size=40):
+        if kind not in ("kd_tree", "ball_tree"):
+            raise ValueError(f"Unknown tree kind: {kind}")
+        self.name = kind
+        self.leaf_size = leaf_size
+        self._tree = None
+
+    def fit(self, X):
+        tree_class = KDTree if self.name == "kd_tree" else BallTree
+        self._tree = tree_class(np.ascontiguousarray(X), leaf_size=self.leaf_size, metric="euclidean")
+        return self
+
+    def kneighbors(self, X, n_neighbors):
+        return self._tree.query(X, k=n_neighbors, return_distance=True, sort_results=True)
+
+    def save(self, path, fingerprint):
+        state = self._tree.__getstate__()
+        # state[0] is the tree's copy of the rows and state[11] its distance metric; neither is saved
+        idx_array, node_data, node_bounds = state[1:4]
+        with open(path, "wb") as f:
+            np.savez(f, fingerprint=np.array(fingerprint), idx_array=idx_array, node_data=node_data,
+                     node_bounds=node_bounds, params=np.array(state[4:11]), kind=np.array(self.name))
+
+    @classmethod
+    def load(cls, path, X, fingerprint):
+        with np.load(path, allow_pickle=False) as data:
+            _check_fingerprint(data, fingerprint, len(X))
+            backend = cls(kind=str(data["kind"]), leaf_size=int(data["params"][0]))
+            tree_class = KDTree if backend.name == "kd_tree" else BallTree
+            tree = tree_class.__new__(tree_class)
+            tree.__setstate__((np.ascontiguousarray(X, dtype=float), data["idx_array"], data["node_data"],
+                               data["node_bounds"], *(int(v) for v in data["params"]),
+                               DistanceMetric.get_metric("euclidean"), None))
+        backend._tree = tree
+        return backend
+
+
+class IVFBackend:
+    """
+    Approximate search over an inverted file: rows are clustered with k-means and a query
+    only scans the n_probe clusters whose centroids are closest to it.
+
+    Args:
+        n_lists (int, optional): Number of clusters; defaults to about sqrt(n_rows).
+        n_probe (int): Clusters scanned per query.
+        train_size (int): Rows sampled to train the centroids.
+        seed (int): Seed of the sampling and of k-means.
+    """
+    name = "ivf"
+    persistent = True
+
+    def __init__(self, n_lists=None, n_probe=8, train_size=100_000, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = train_size
+        self.seed = seed
+        self._X = None
+        self.centroids = None
+        self.order = None
+        self.offsets = None
+
+    def fit(self, X, chunk_size=262_144):
+        n_rows = len(X)
+        n_lists = self.n_lists or max(1, min(n_rows, int(np.sqrt(n_rows))))
+        rng = np.random.default_rng(self.seed)
+        sample = np.sort(rng.choice(n_rows, size=min(n_rows, max(self.train_size, n_lists)), replace=False))
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=self.seed, n_init=1, batch_size=4096)
+        kmeans.fit(np.asarray(X[sample], dtype=float))
+
+        assignments = np.empty(n_rows, dtype=np.int64)
+        for start in range(0, n_rows, chunk_size):
+            assignments[start:start + chunk_size] = kmeans.predict(np.asarray(X[start:start + chunk_size], dtype=float))
+
+        self._X = X
+        self.n_lists = n_lists
+        self.centroids = kmeans.cluster_centers_
+        self.order = np.argsort(assignments, kind="stable")
+        self.offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=self.offsets[1:])
+        return self
+
+    def kneighbors(self, X, n_neighbors):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        all_distances = np.empty((len(X), n_neighbors))
+        all_indices = np.empty((len(X), n_neighbors), dtype=np.int64)
+        list_sizes = np.diff(self.offsets)
+
+        for row, query in enumerate(X):
+            centroid_order = np.argsort(np.linalg.norm(self.centroids - query, axis=1))
+            # Probe at least n_probe lists, and more until there are enough candidates
+            n_lists_probed = np.searchsorted(np.cumsum(list_sizes[centroid_order]), n_neighbors) + 1
+            n_lists_probed = min(len(centroid_order), max(self.n_probe, n_lists_probed))
+            candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]]
+                                         for c in centroid_order[:n_lists_probed]])
+            candidates.sort()
+            distances = np.linalg.norm(np.asarray(self._X[candidates]) - query, axis=1)
+            best = np.argpartition(distances, n_neighbors - 1)[:n_neighbors] \
+                if n_neighbors < len(candidates) else np.arange(len(candidates))
+            best = best[np.argsort(distances[best], kind="stable")]
+            all_distances[row] = distances[best]
+            all_indices[row] = candidates[best]
+        return all_distances, all_indices
+
+    def save(self, path, fingerprint):
+        with open(path, "wb") as f:
+            np.savez(f, fingerprint=np.array(fingerprint), n_rows=np.array(len(self.order)),
+                     centroids=self.centroids, order=self.order, offsets=self.offsets,
+                     params=np.array([self.n_lists, self.n_probe, self.train_size, self.seed]))
+
+    @classmethod
+    def load(cls, path, X, fingerprint):
+        with np.load(path, allow_pickle=False) as data:
+            _check_fingerprint(data, fingerprint, len(X))
+            n_lists, n_probe, train_size, seed = (int(v) for v in data["params"])
+            backend = cls(n_lists=n_lists, n_probe=n_probe, train_size=train_size, seed=seed)
+            backend.centroids = data["centroids"]
+            backend.order = data["order"]
+            backend.offsets = data["offsets"]
+        backend._X = X
+        return backend
+
+
+class PatchableIndex:
+    """
+    Wraps a fitted backend so single rows can be inserted, replaced or removed without refitting.
+
+    Removed and replaced rows are masked out of the base index, and inserted or replaced rows
+    are kept in a small delta that is scanned exactly and merged with the base results.
+
+    Args:
+        base: A fitted backend.
+        base_rows (int): Number of rows the base backend was fitted on.
+    """
+
+    def __init__(self, base, base_rows):
+        self.base = base
+        self.base_rows = base_rows
+        self.stale = np.zeros(base_rows, dtype=bool)
+        self.n_stale = 0
+        self._delta = {}
+        self._delta_cache = None
+
+    @property
+    def name(self):
+        return self.base.name
+
+    @property
+    def persistent(self):
+        return self.base.persistent
+
+    @property
+    def n_patches(self):
+        return self.n_stale + len(self._delta)
+
+    def _mark_stale(self, position):
+        if position < self.base_rows and not self.stale[position]:
+            self.stale[position] = True
+            self.n_stale += 1
+
+    def upsert(self, position, vector):
+        """Inserts the row at position, or replaces it if it is already indexed."""
+        self._mark_stale(position)
+        self._delta[position] = np.asarray(vector, dtype=float)
+        self._delta_cache = None
+
+    def remove(self, position):
+        self._mark_stale(position)
+        if self._delta.pop(position, None) is not None:
+            self._delta_cache = None
+
+    def _delta_arrays(self):
+        if self._delta_cache is None:
+            positions = np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta))
+            vectors = np.array(list(self._delta.values())) if self._delta else np.empty((0, 0))
+            self._delta_cache = (positions, vectors)
+        return self._delta_cache
+
+    def kneighbors(self, X, n_neighbors):
+        if not self.n_patches:
+            return self.base.kneighbors(X, n_neighbors=n_neighbors)
+
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        n_live = self.base_rows - self.n_stale + len(self._delta)
+        n_neighbors = min(n_neighbors, n_live)
+        # Fetching n_stale extra rows guarantees n_neighbors live base rows survive the masking
+        n_fetch = min(self.base_rows, n_neighbors + self.n_stale)
+        if n_fetch > 0:
+            base_distances, base_indices = self.base.kneighbors(X, n_neighbors=n_fetch)
+        else:
+            base_distances = np.empty((len(X), 0))
+            base_indices = np.empty((len(X), 0), dtype=np.int64)
+        delta_positions, delta_vectors = self._delta_arrays()
+
+        distances = np.empty((len(X), n_neighbors))
+        indices = np.empty((len(X), n_neighbors), dtype=np.int64)
+        for row, query in enumerate(X):
+            keep = ~self.stale[base_indices[row]]
+            delta_distances = np.linalg.norm(delta_vectors - query, axis=1) if len(delta_positions) \
+                else np.empty(0)
+            merged_distances = np.concatenate([base_distances[row][keep], delta_distances])
+            merged_indices = np.concatenate([base_indices[row][keep], delta_positions])
+            best = np.argsort(merged_distances, kind="stable")[:n_neighbors]
+            distances[row] = merged_distances[best]
+            indices[row] = merged_indices[best]
+        return distances, indices
+
+    def save(self, path, fingerprint):
+        if self.n_patches:
+            raise ValueError("A patched index cannot be saved; refit it first")
+        self.base.save(path, fingerprint)
+
+
+BACKENDS = {
+    "brute": BruteForceBackend,
+    "kd_tree": lambda: TreeBackend("kd_tree"),
+    "ball_tree": lambda: TreeBackend("ball_tree"),
+    "ivf": IVFBackend,
+}
+
+
+def choose_backend(n_rows, n_dims):
+    """Picks a backend name for a catalog of n_rows drones with n_dims features."""
+    if n_rows <= BRUTE_FORCE_MAX_ROWS:
+        return "brute"
+    if n_rows <= TREE_MAX_ROWS:
+        return "kd_tree" if n_dims <= KD_TREE_MAX_DIMS else "ball_tree"
+    return "ivf"
+
+
+def make_backend(name, n_rows, n_dims):
+    """Creates a backend by name; "auto" defers to choose_backend."""
+    if name == "auto":
+        name = choose_backend(n_rows, n_dims)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown nearest-neighbour backend: {name}")
+    return BACKENDS[name]()
+
+
+def _check_fingerprint(data, fingerprint, n_rows):
+    """Rejects a saved index that was fitted on other rows or weights than X."""
+    if str(data["fingerprint"]) != fingerprint:
+        raise ValueError("the index was saved for another catalog or weights")
+    saved_rows = len(data["idx_array"]) if "idx_array" in data else int(data["n_rows"])
+    if saved_rows != n_rows:
+        raise ValueError(f"the index covers {saved_rows} rows, the catalog has {n_rows}")
+
+
+def load_backend(name, path, X, fingerprint):
+    """
+    Loads a persisted backend of the given kind, attaching the data matrix it was fitted on.
+
+    Raises:
+        ValueError: If the file was saved under another fingerprint or for another number of rows.
+    """
+    if name in ("kd_tree", "ball_tree"):
+        backend = TreeBackend.load(path, X, fingerprint)
+        if backend.name != name:
+            raise ValueError(f"the index holds a {backend.name}, not a {name}")
+        return backend
+    if name == "ivf":
+        return IVFBackend.load(path, X, fingerprint)
+    raise ValueError(f"Backend {name} cannot be loaded from disk")
@@ -0,0 +1,449 @@
+# recommendation_table.py
+"""
+Precomputed recommendations for the GUI's input grid.
+
+Most of what form_input.transform_user_input produces comes from discrete choices (port size,
+location, camera, cargo, transmission, night usage, air/water sensors), plus the fixed
+landing and GPS values. Only budget, battery, dimensions, storage, charging time and
+noise are typed in. The build job scores every combination of the discrete choices
+with a few binned values of each typed field, across a process pool, and stores the
+ranked catalog positions and k-NN distances in a compact table.
+
+A lookup hashes the transformed user input, with the weights and query options, to a
+64-bit key and finds it in an open-addressing hash table stored in the file, so it costs
+a few memory-mapped reads however large the grid is. Only the top drones are then scored
+and decoded, as get_top_drones would. An input off the grid, other weights or options, and
+a catalog or fuzzy memberships changed since the build all miss; recommend() scores them live.
+
+The location's yearly weather is part of the transformed input, so a table only answers
+while the weather it was built with is current; rebuild it when the weather cache refreshes.
+
+Usage:
+    python recommendation_table.py --output recommendations.dtab --profiles default cargo --processes 4
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import catalog_format
+import drone_selector
+import form_input
+import metrics
+
+TABLE_PATH = os.environ.get("DRONE_TABLE", "recommendations.dtab")
+TABLE_KIND = "recommendation_table"
+DEFAULT_CHUNK_SIZE = 512
+EMPTY_SLOT = -1
+
+# Binned values of the typed GUI fields; the discrete fields take every GUI choice
+DEFAULT_TYPED_GRID = {
+    "Budget (€)": [3000, 6000, 10000, 20000],
+    "Battery Life (min)": [30, 60, 120],
+    "Dimensions (cm³)": [3000, 10000, 18000],
+    "Storage (GB)": [64, 256],
+    "Charging Time (min)": [60],
+    "Noise level": [65],
+}
+
+_worker_catalog = None
+_worker_grid = None
+_worker_profiles = None
+_worker_options = None
+
+
+# --- Keys ---
+def _key_value(value):
+    """Numbers and numeric strings compare as floats: the GUI passes typed fields as text."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _weights_fingerprint(weights_gui):
+    if isinstance(weights_gui, drone_selector.WeightsProfile):
+        return weights_gui.fingerprint
+    weights = {key: float(value) for key, value in weights_gui.items()}
+    return hashlib.sha1(json.dumps(weights, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def input_key(user_input_gui, weights_gui, options):
+    """64-bit key of a transformed user input under given weights and query options."""
+    canonical = {
+        "user_input": {key: _key_value(value) for key, value in user_input_gui.items()},
+        "weights": _weights_fingerprint(weights_gui),
+        "options": {key: _key_value(value) for key, value in options.items()},
+    }
+    digest = hashlib.blake2b(json.dumps(canonical, sort_keys=True).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _query_options(k, W_knn, W_detailed, top_n, exact, constraints):
+    # k does not change an exact query
+    return {"k": None if exact else k, "W_knn": W_knn, "W_detailed": W_detailed, "top_n": top_n,
+            "exact": bool(exact), "constraints": sorted(constraints or [])}
+
+
+def _hash_slots(keys):
+    """Open-addressing (linear probing) table over keys: slot -> entry, EMPTY_SLOT where free."""
+    n_slots = 1 << max(1, int(2 * len(keys) - 1).bit_length())
+    mask = n_slots - 1
+    slots = np.full(n_slots, EMPTY_SLOT, dtype=np.int64)
+    for entry, key in enumerate(keys.tolist()):
+        slot = key & mask
+        while slots[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        slots[slot] = entry
+    return slots
+
+
+# --- Table ---
+class RecommendationTable:
+    """
+    A recommendation table built by build_table, memory-mapped read-only.
+
+    Args:
+        path (str): The table file.
+    """
+
+    def __init__(self, path=TABLE_PATH):
+        self.path = path
+        self.metadata, arrays = catalog_format.read_arrays(path)
+        if self.metadata.get("kind") != TABLE_KIND:
+            raise ValueError(f"{path} is not a recommendation table")
+        self.keys = arrays["keys"]
+        self.slots = arrays["slots"]
+        self.positions = arrays["positions"]
+        self.distances = arrays["distances"]
+        self.hits = 0
+        self.misses = 0
+        self._warned_catalogs = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _entry(self, key):
+        mask = len(self.slots) - 1
+        slot = key & mask
+        while True:
+            entry = int(self.slots[slot])
+            if entry == EMPTY_SLOT:
+                return None
+            if int(self.keys[entry]) == key:
+                return entry
+            slot = (slot + 1) & mask
+
+    def matches(self, catalog):
+        """True if the table was built from this catalog's current content and the current fuzzy memberships."""
+        if catalog.content_digest == self.metadata["catalog_digest"] \
+                and drone_selector.fuzzy_memberships.fingerprint == self.metadata["memberships"]:
+            return True
+        if catalog.token not in self._warned_catalogs:
+            self._warned_catalogs.add(catalog.token)
+            print(f"Warning: Recommendation table '{self.path}' was built for another catalog or other fuzzy "
+                  f"memberships. Scoring live.")
+        return False
+
+    def lookup(self, user_input_gui, weights_gui, k=8, W_knn=0.6, W_detailed=0.4, top_n=3, catalog=None,
+               exact=False, constraints=None):
+        """
+        Answers a get_top_drones query from the table.
+
+        Returns:
+            list[dict] or None: The get_top_drones results, or None if the query is not in the table.
+        """
+        if catalog is None:
+            catalog = drone_selector.get_catalog()
+        with metrics.timer("table_lookup"):
+            entry = None
+            if self.matches(catalog):
+                options = _query_options(k, W_knn, W_detailed, top_n, exact, constraints)
+                entry = self._entry(input_key(user_input_gui, weights_gui, options))
+            with self._lock:
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            metrics.inc("table_misses" if entry is None else "table_hits")
+            if entry is None:
+                return None
+            positions = np.asarray(self.positions[entry], dtype=np.int64)
+            found = positions != EMPTY_SLOT
+            return drone_selector.top_drones_from_candidates(
+                user_input_gui, weights_gui, positions[found], np.asarray(self.distances[entry])[found],
+                W_knn=W_knn, W_detailed=W_detailed, catalog=catalog)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0, "built_at": self.metadata["built_at"]}
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_table(path=TABLE_PATH):
+    """Returns the shared table at path, reloaded when the file changes, or None if there is no table."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _tables_lock:
+        cached = _tables.get(path)
+        if cached is None or cached[0] != mtime:
+            try:
+                cached = (mtime, RecommendationTable(path))
+            except ValueError as e:
+                print(f"Warning: Could not load recommendation table: {e}")
+                cached = (mtime, None)
+            _tables[path] = cached
+        return cached[1]
+
+
+def recommend_batch(user_inputs_gui, weights_gui, table=None, k=8, W_knn=0.6, W_detailed=0.4, top_n=3,
+                    catalog=None, exact=False, constraints=None, use_cache=True):
+    """
+    get_top_drones_batch, answering the inputs found in table from it and scoring the rest live.
+
+    Args:
+        table (RecommendationTable, optional): The table to try first; None scores everything live.
+        Others: As in get_top_drones_batch.
+
+    Returns:
+        list[list[dict]]: One ranked result list per input, in input order.
+    """
+    user_inputs_gui = list(user_inputs_gui)
+    results = [None] * len(user_inputs_gui)
+    if table is not None:
+        if catalog is None:
+            catalog = drone_selector.get_catalog()
+        results = [table.lookup(user_input, weights_gui, k=k, W_knn=W_knn, W_detailed=W_detailed, top_n=top_n,
+                                catalog=catalog, exact=exact, constraints=constraints)
+                   for user_input in user_inputs_gui]
+    misses = [position for position, result in enumerate(results) if result is None]
+    if misses:
+        scored = drone_selector.get_top_drones_batch(
+            [user_inputs_gui[position] for position in misses], weights_gui, k=k, W_knn=W_knn,
+            W_detailed=W_detailed, top_n=top_n, catalog=catalog, exact=exact, constraints=constraints,
+            use_cache=use_cache)
+        for position, drones in zip(misses, scored):
+            results[position] = drones
+    return results
+
+
+def recommend(user_input_gui, weights_gui, table=None, **kwargs):
+    """get_top_drones for one input, answered from table when the input is on its grid."""
+    return recommend_batch([user_input_gui], weights_gui, table=table, **kwargs)[0]
+
+
+# --- Build ---
+def form_grid(typed_grid=None):
+    """
+    The GUI form values to precompute: every choice of the discrete fields, and typed_grid's bins.
+
+    Args:
+        typed_grid (dict, optional): GUI field -> values; overrides DEFAULT_TYPED_GRID, and may
+            narrow a discrete field to some of its choices.
+
+    Returns:
+        dict: GUI field -> list of values, in the order the grid is enumerated.
+    """
+    grid = {
+        "Port Size": form_input.PORT_SIZES,
+        "Port Location": form_input.PORT_LOCATIONS,
+        "Camera Performance": list(form_input.CAMERA_RESOLUTIONS.values()),
+        "Data Transmission": form_input.TRANSMISSION_OPTIONS,
+        "Air/Water Sensors": form_input.SENSOR_OPTIONS,
+        "Night Vision": form_input.NIGHT_USAGE_OPTIONS,
+        "Cargo": form_input.CARGO_OPTIONS,
+    }
+    grid.update(DEFAULT_TYPED_GRID)
+    for field, values in (typed_grid or {}).items():
+        if field not in grid:
+            raise ValueError(f"Unknown form field in the grid: {field}")
+        grid[field] = list(values)
+    return {field: list(values) for field, values in grid.items()}
+
+
+def _usable_locations(locations):
+    """Drops the locations whose weather cannot be fetched; form_input.transform_user_input would fail on them."""
+    import location
+
+    usable = []
+    for region in locations:
+        weather = location.get_historical_weather_open_meteo(region)
+        if isinstance(weather, dict):
+            usable.append(region)
+        else:
+            print(f"Warning: Skipping '{region}' in the recommendation table: {weather}")
+    return usable
+
+
+def _mp_context():
+    # fork lets the workers share the parent's preloaded catalog and weather
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def _init_worker(catalog_path, grid, weights_path, options):
+    global _worker_catalog, _worker_grid, _worker_profiles, _worker_options
+    _worker_catalog = drone_selector.get_catalog(catalog_path)
+    _worker_grid = grid
+    _worker_profiles = drone_selector.WeightsProfileStore(weights_path)
+    _worker_options = options
+
+
+def score_grid_chunk(start, stop, profile_names, catalog=None, grid=None, profiles=None, options=None):
+    """
+    Scores the grid forms numbered start to stop under every profile.
+
+    Returns:
+        tuple: keys (uint64), positions (int32, EMPTY_SLOT padded) and distances, one row per form and profile.
+    """
+    catalog = _worker_catalog if catalog is None else catalog
+    grid = _worker_grid if grid is None else grid
+    profiles = _worker_profiles if profiles is None else profiles
+    options = _worker_options if options is None else options
+
+    fields = list(grid)
+    shape = [len(grid[field]) for field in fields]
+    user_inputs = []
+    for flat in range(start, stop):
+        choice = np.unravel_index(flat, shape)
+        form = {field: grid[field][i] for field, i in zip(fields, choice)}
+        user_inputs.append(form_input.transform_user_input(form))
+
+    top_n = options["top_n"]
+    keys, positions, distances = [], [], []
+    for name in profile_names:
+        weights = profiles.get(name)
+        ranked = drone_selector.get_top_candidates_batch(
+            user_inputs, weights, k=options["k"] or 8, W_knn=options["W_knn"], W_detailed=options["W_detailed"],
+            top_n=top_n, catalog=catalog, exact=options["exact"], constraints=options["constraints"])
+        for user_input, (rows, dists) in zip(user_inputs, ranked):
+            keys.append(input_key(user_input, weights, options))
+            positions.append(np.pad(rows.astype(np.int32), (0, top_n - len(rows)), constant_values=EMPTY_SLOT))
+            distances.append(np.pad(dists, (0, top_n - len(dists)), constant_values=np.nan))
+    return (np.array(keys, dtype=np.uint64), np.array(positions, dtype=np.int32).reshape(-1, top_n),
+            np.array(distances, dtype=float).reshape(-1, top_n))
+
+
+def build_table(output_path=TABLE_PATH, profiles=None, typed_grid=None, weights_path=drone_selector.WEIGHTS_PATH,
+                catalog_path=drone_selector.CATALOG_PATH, processes=1, chunk_size=DEFAULT_CHUNK_SIZE, k=8,
+                W_knn=0.6, W_detailed=0.4, top_n=3, exact=False, constraints=None):
+    """
+    Precomputes the recommendations of every GUI form on the grid and writes them to a table file.
+
+    Args:
+        output_path (str): The table file to write.
+        profiles (list[str], optional): Weights profiles to precompute; defaults to the default profile.
+        typed_grid (dict, optional): Bins of the typed form fields, see form_grid.
+        weights_path (str): The default weights file; named profiles sit next to it.
+        catalog_path (str): The drones catalog, CSV or compiled.
+        processes (int): Worker processes; 1 scores in the calling process.
+        chunk_size (int): Grid forms per task sent to a worker.
+        k, W_knn, W_detailed, top_n, exact, constraints: As in get_top_drones; lookups must use the same.
+
+    Returns:
+        dict: Forms, entries, wall-clock seconds and the file size in bytes.
+    """
+    start_time = time.perf_counter()
+    profiles = list(profiles or [drone_selector.DEFAULT_PROFILE])
+    options = _query_options(k, W_knn, W_detailed, top_n, exact, constraints)
+    grid = form_grid(typed_grid)
+    grid["Port Location"] = _usable_locations(grid["Port Location"])
+    n_forms = int(np.prod([len(values) for values in grid.values()]))
+
+    catalog = drone_selector.get_catalog(catalog_path)
+    store = drone_selector.WeightsProfileStore(weights_path)
+    for name in profiles:
+        catalog.warm(store.get(name))
+
+    ranges = [(first, min(first + chunk_size, n_forms)) for first in range(0, n_forms, chunk_size)]
+    parts = []
+    if processes <= 1:
+        for first, last in ranges:
+            parts.append(score_grid_chunk(first, last, profiles, catalog, grid, store, options))
+    else:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=_mp_context(),
+                                 initializer=_init_worker,
+                                 initargs=(catalog_path, grid, weights_path, options)) as executor:
+            pending = deque()
+            for first, last in ranges:
+                pending.append(executor.submit(score_grid_chunk, first, last, profiles))
+                if len(pending) >= 2 * processes:
+                    parts.append(pending.popleft().result())
+            while pending:
+                parts.append(pending.popleft().result())
+
+    keys = np.concatenate([part[0] for part in parts]) if parts else np.array([], dtype=np.uint64)
+    positions = np.concatenate([part[1] for part in parts]) if parts else np.empty((0, top_n), dtype=np.int32)
+    distances = np.concatenate([part[2] for part in parts]) if parts else np.empty((0, top_n))
+    # Forms that transform to the same input share one entry
+    keys, first_entries = np.unique(keys, return_index=True)
+    positions, distances = positions[first_entries], distances[first_entries]
+
+    metadata = {
+        "kind": TABLE_KIND,
+        "catalog_digest": catalog.content_digest,
+        "catalog_rows": len(catalog),
+        "memberships": drone_selector.fuzzy_memberships.fingerprint,
+        "profiles": {name: store.get(name).fingerprint for name in profiles},
+        "options": options,
+        "grid": grid,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    catalog_format.write_arrays(output_path, {"keys": keys, "slots": _hash_slots(keys), "positions": positions,
+                                              "distances": distances}, metadata)
+    return {"forms": n_forms, "entries": len(keys), "wall_clock_s": time.perf_counter() - start_time,
+            "bytes": os.path.getsize(output_path)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute recommendations for the GUI's input grid.")
+    parser.add_argument("--output", default=TABLE_PATH)
+    parser.add_argument("--catalog", default=drone_selector.CATALOG_PATH, help="Catalog CSV or compiled .dcat.")
+    parser.add_argument("--weights", default=drone_selector.WEIGHTS_PATH,
+                        help="Default weights file; named profiles are weights.<name>.conf next to it.")
+    parser.add_argument("--profiles", nargs="*", default=None, help="Weights profiles to precompute.")
+    parser.add_argument("--grid", default=None, help="JSON file of form field -> values overriding the bins.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--k", type=int, default=8, help="Number of nearest neighbours.")
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--exact", action="store_true", help="Rank the whole catalog for every form.")
+    parser.add_argument("--constraints", nargs="*", choices=drone_selector.HARD_CONSTRAINTS, default=None)
+    args = parser.parse_args(argv)
+
+    typed_grid = None
+    if args.grid:
+        with open(args.grid, "r") as f:
+            typed_grid = json.load(f)
+    stats = build_table(args.output, profiles=args.profiles, typed_grid=typed_grid, weights_path=args.weights,
+                        catalog_path=args.catalog, processes=args.processes, chunk_size=args.chunk_size, k=args.k,
+                        top_n=args.top_n, exact=args.exact, constraints=args.constraints)
+    print(f"Precomputed {stats['entries']} entries for {stats['forms']} forms in {stats['wall_clock_s']:.1f} s "
+          f"({stats['bytes'] / 1e6:.1f} MB) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
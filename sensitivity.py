@@ -0,0 +1,332 @@
+# sensitivity.py
+"""
+Weight-sensitivity sweeps: how the ranking for one user input moves as the weights vary.
+
+The weighted squared distance of a drone is sum_j w_j * d_j, where d_j is its squared
+scaled difference to the user on feature j. The difference matrix D (drones x features)
+is built once, so the distances under V weight vectors come from the single product
+D @ W (features x V). The fuzzy detailed score decomposes the same way: a criterion's
+relevance does not depend on its weight, so the weighted averages of V criterion-weight
+vectors are two more products. Each variant ranks the whole catalog, like
+get_top_drones(exact=True), and may also change the W_knn/W_detailed blend. On large
+catalogs a per-drone upper bound over all variants prunes the drones that cannot reach
+any variant's top_n before the products are taken.
+
+Usage:
+    python sensitivity.py user_input.json --profile cargo --samples 1000 --spread 0.3
+    python sensitivity.py user_input.json --feature "Battery Life" --factors 0 0.5 1 2 4
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import drone_selector
+import metrics
+
+VARIANT_BLOCK_ELEMENTS = 1 << 22  # Drones x variants scored per block, bounding the temporary arrays
+PRUNING_SEEDS = 64  # Best drones under the base weights whose scores bound every variant's top_n
+
+
+# --- Variants ---
+def perturbed_variants(weights, n, spread=0.25, features=None, blend_spread=0.0, W_knn=0.6, W_detailed=0.4,
+                       seed=None):
+    """
+    Random variants around weights, for a global sensitivity sweep.
+
+    Args:
+        weights (Mapping): The base weights.
+        n (int): Number of variants.
+        spread (float): Each weight is scaled by a uniform factor in [1 - spread, 1 + spread].
+        features (list[str], optional): The weights to perturb; defaults to all of them.
+        blend_spread (float): W_knn is shifted by up to +/- blend_spread (clipped to [0, W_knn + W_detailed]),
+            keeping W_knn + W_detailed constant.
+        W_knn, W_detailed (float): The base blend.
+        seed (int, optional): Random seed.
+
+    Returns:
+        list[dict]: Variants for sweep_weights.
+    """
+    rng = np.random.default_rng(seed)
+    names = [name for name in (features or weights) if name in weights]
+    factors = rng.uniform(1.0 - spread, 1.0 + spread, size=(n, len(names)))
+    blend_total = W_knn + W_detailed
+    shifts = rng.uniform(-blend_spread, blend_spread, size=n) if blend_spread else np.zeros(n)
+
+    variants = []
+    for row, shift in zip(factors, shifts):
+        variant_W_knn = float(np.clip(W_knn + shift, 0.0, blend_total))
+        variants.append({"weights": {name: weights[name] * float(factor) for name, factor in zip(names, row)},
+                         "W_knn": variant_W_knn, "W_detailed": blend_total - variant_W_knn})
+    return variants
+
+
+def one_at_a_time_variants(weights, feature, factors):
+    """Variants scaling only weights[feature] by each factor, for a one-at-a-time sweep."""
+    base = weights.get(feature, 1.0)
+    return [{"weights": {feature: base * factor}} for factor in factors]
+
+
+# --- Sweep ---
+def _knn_weight_matrix(feature_names, weight_sets):
+    """Per-feature k-NN weights (features x variants), resolved like prepare_knn_weights."""
+    # A one-hot column takes its own weight if present, else its original feature's, else 1.0
+    sources = [[name] + [feature for feature in drone_selector.ONE_HOT_FEATURES if name.startswith(feature + "_")]
+               for name in feature_names]
+    matrix = np.ones((len(feature_names), len(weight_sets)))
+    for v, weights in enumerate(weight_sets):
+        for j, keys in enumerate(sources):
+            for key in keys:
+                if key in weights:
+                    matrix[j, v] = weights[key]
+                    break
+    return matrix
+
+
+def _decompose(catalog, user_input_gui, rows):
+    """Per-feature squared differences and per-criterion fuzzy relevance of the drones at rows."""
+    user_scaled_vector = np.nan_to_num(catalog.transform_user_inputs([user_input_gui])[0])
+    features = catalog.features_scaled if rows is None else catalog.features_scaled[rows]
+    squared_differences = np.square(features - user_scaled_vector)
+
+    columns = catalog.columns(drone_selector.FUZZY_CRITERIA)
+    if rows is not None:
+        columns = columns.iloc[rows]
+    unit_weights = {criterion: 1.0 for criterion in drone_selector.FUZZY_CRITERIA}
+    _, details = drone_selector.score_fuzzy_criteria(columns, user_input_gui, unit_weights, with_labels=False)
+    n_rows = len(squared_differences)
+    relevance = np.zeros((n_rows, len(drone_selector.FUZZY_CRITERIA)))
+    applies = np.zeros_like(relevance)
+    for c, criterion in enumerate(drone_selector.FUZZY_CRITERIA):
+        if criterion in details:
+            applies[:, c] = details[criterion]["applies"]
+            relevance[:, c] = np.where(details[criterion]["applies"], details[criterion]["relevance"], 0.0)
+    return squared_differences, relevance, applies
+
+
+def _blended_scores(squared_differences, relevance, applies, sweep, columns=slice(None)):
+    """Total scores (drones x variants) of the given drones under the variants in columns."""
+    distances = np.sqrt(np.maximum(squared_differences @ sweep["knn_weights"][:, columns], 0.0))
+    knn_similarity = np.maximum(0.0, 1.0 - distances / sweep["max_dist"][columns])
+    weight_totals = applies @ sweep["criterion_weights"][:, columns]
+    detailed = np.divide(relevance @ sweep["criterion_weights"][:, columns], weight_totals,
+                         out=np.zeros_like(weight_totals), where=weight_totals > 0)
+    return knn_similarity * sweep["blend_knn"][columns] + detailed * sweep["blend_detailed"][columns]
+
+
+def _candidates(squared_differences, relevance, applies, sweep, top_n):
+    """
+    The drones that can reach some variant's top_n; every other drone is pruned unscored.
+
+    A drone's score under any variant is at most its score with every feature weight at its
+    lowest value across variants in the distance, the sum of the highest ones in max_dist,
+    its best fuzzy relevance, and the highest blend weights. The top_n-th best score of a few
+    seed drones under each variant is a floor on that variant's top_n; drones whose bound is
+    below every floor cannot enter any top_n.
+    """
+    n_rows = len(squared_differences)
+    all_rows = np.arange(n_rows)
+    n_seeds = max(4 * top_n, PRUNING_SEEDS)
+    knn_weights = sweep["knn_weights"]
+    if top_n < 1 or n_rows <= 2 * n_seeds or knn_weights.min() < 0 or sweep["criterion_weights"].min() < 0 \
+            or sweep["blend_knn"].min() < 0 or sweep["blend_detailed"].min() < 0:
+        return all_rows
+
+    base_scores = _blended_scores(squared_differences, relevance, applies, sweep, slice(0, 1))[:, 0]
+    seeds = np.argpartition(-base_scores, n_seeds - 1)[:n_seeds]
+    floors = -np.partition(-_blended_scores(squared_differences[seeds], relevance[seeds], applies[seeds], sweep),
+                           top_n - 1, axis=0)[top_n - 1]
+
+    highest_total = knn_weights.max(axis=1).sum()
+    min_ratio = squared_differences @ knn_weights.min(axis=1) / highest_total if highest_total > 0 else 0.0
+    bound = sweep["blend_knn"].max() * np.maximum(0.0, 1.0 - np.sqrt(np.maximum(min_ratio, 0.0))) \
+        + sweep["blend_detailed"].max() * relevance.max(axis=1)
+    survivors = bound >= floors.min() - 1e-12
+    survivors[seeds] = True
+    return all_rows[survivors]
+
+
+def _top_per_variant(squared_differences, relevance, applies, sweep, top_n):
+    """Positions and scores (in %) of the top_n drones under every variant, best first."""
+    n_rows, n_columns = len(squared_differences), len(sweep["max_dist"])
+    n_best = min(top_n, n_rows)
+    top_positions = np.empty((n_columns, n_best), dtype=np.int64)
+    top_scores = np.empty((n_columns, n_best))
+    block = max(1, VARIANT_BLOCK_ELEMENTS // max(n_rows, 1))
+    for start in range(0, n_columns if n_best else 0, block):
+        columns = slice(start, start + block)
+        total = np.ascontiguousarray(_blended_scores(squared_differences, relevance, applies, sweep, columns).T)
+        if n_best < n_rows:
+            best = np.argpartition(-total, n_best - 1, axis=1)[:, :n_best]
+        else:
+            best = np.broadcast_to(np.arange(n_rows), total.shape)
+        best_scores = np.take_along_axis(total, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        top_positions[columns] = np.take_along_axis(best, order, axis=1)
+        top_scores[columns] = np.take_along_axis(best_scores, order, axis=1) * 100.0
+    return top_positions, top_scores
+
+
+def sweep_weights(user_input_gui, weights_gui, variants, W_knn=0.6, W_detailed=0.4, top_n=3, catalog=None,
+                  constraints=None):
+    """
+    Ranks the catalog for one user input under many weight variants at once.
+
+    Args:
+        user_input_gui (dict): The user input, as passed to get_top_drones.
+        weights_gui (Mapping): The base weights; each variant overrides some of them.
+        variants (list[dict]): {"weights": {...}, "W_knn": float, "W_detailed": float}, every key optional.
+        W_knn, W_detailed (float): The base blend.
+        top_n (int): Ranks tracked per variant.
+        catalog (DroneCatalog): Catalog to query; defaults to the shared catalog.
+        constraints (list[str], optional): Hard-constraint modes from HARD_CONSTRAINTS.
+
+    Returns:
+        dict: "base" (the top drones under the base weights), "top_rows" and "top_scores" (variants x top_n
+              catalog rows and scores in %), "overlap" (share of each variant's top drones also in the base
+              top), "top1_stability" (share of variants keeping the base's best drone), "mean_overlap",
+              and "drones": per-drone rank stability, most stable first.
+    """
+    if catalog is None:
+        catalog = drone_selector.get_catalog()
+    else:
+        catalog.refresh()
+
+    mask = None
+    if constraints:
+        mask = catalog.constraint_index().mask(user_input_gui, constraints)
+    active = catalog.active_mask()
+    if active is not None:
+        mask = active if mask is None else mask & active
+    rows = None if mask is None else np.flatnonzero(mask)
+
+    with metrics.timer("sensitivity_sweep"):
+        squared_differences, relevance, applies = _decompose(catalog, user_input_gui, rows)
+
+        # Column 0 is the unperturbed base
+        weight_sets = [dict(weights_gui)] + [{**weights_gui, **variant.get("weights", {})} for variant in variants]
+        sweep = {
+            "knn_weights": _knn_weight_matrix(catalog.feature_names, weight_sets),
+            "criterion_weights": np.array([[float(weights.get(criterion, 0.0)) for weights in weight_sets]
+                                           for criterion in drone_selector.FUZZY_CRITERIA]),
+            "blend_knn": np.array([W_knn] + [variant.get("W_knn", W_knn) for variant in variants], dtype=float),
+            "blend_detailed": np.array([W_detailed] + [variant.get("W_detailed", W_detailed)
+                                                       for variant in variants], dtype=float),
+        }
+        max_dist = np.sqrt(sweep["knn_weights"].sum(axis=0))
+        max_dist[max_dist == 0] = 1.0
+        sweep["max_dist"] = max_dist
+
+        candidates = _candidates(squared_differences, relevance, applies, sweep, top_n)
+        top_positions, top_scores = _top_per_variant(squared_differences[candidates], relevance[candidates],
+                                                     applies[candidates], sweep, top_n)
+        top_positions = candidates[top_positions]
+
+    top_rows = top_positions if rows is None else rows[top_positions]
+    return _summarize(catalog, top_rows, top_scores)
+
+
+def _summarize(catalog, top_rows, top_scores):
+    base_rows, base_scores = top_rows[0], top_scores[0]
+    top_rows, top_scores = top_rows[1:], top_scores[1:]
+    n_variants, n_best = top_rows.shape
+    base = [{"Drone ID": drone_id, "Total Score (%)": round(float(score), 2)}
+            for drone_id, score in zip(_drone_ids(catalog, base_rows), base_scores)]
+    summary = {"variants": n_variants, "top_n": n_best, "base": base, "top_rows": top_rows,
+               "top_scores": top_scores}
+    if not n_variants or not n_best:
+        summary.update(overlap=np.zeros(n_variants), top1_stability=0.0, mean_overlap=0.0, drones=[])
+        return summary
+
+    overlap = np.isin(top_rows, base_rows).sum(axis=1) / n_best
+    summary.update(overlap=overlap, top1_stability=float(np.mean(top_rows[:, 0] == base_rows[0])),
+                   mean_overlap=float(overlap.mean()))
+
+    # Per-drone statistics over every (variant, rank) slot it occupies
+    seen, slots = np.unique(top_rows, return_inverse=True)
+    slots = slots.reshape(top_rows.shape)
+    ranks = np.broadcast_to(np.arange(1, n_best + 1), top_rows.shape)
+    appearances = np.bincount(slots.ravel(), minlength=len(seen))
+    rank_sums = np.bincount(slots.ravel(), weights=ranks.ravel(), minlength=len(seen))
+    score_sums = np.bincount(slots.ravel(), weights=top_scores.ravel(), minlength=len(seen))
+    firsts = np.bincount(slots[:, 0], minlength=len(seen))
+    best_ranks = np.full(len(seen), n_best + 1)
+    worst_ranks = np.zeros(len(seen), dtype=np.int64)
+    np.minimum.at(best_ranks, slots.ravel(), ranks.ravel())
+    np.maximum.at(worst_ranks, slots.ravel(), ranks.ravel())
+    base_ranks = {row: rank for rank, row in enumerate(base_rows, start=1)}
+
+    drones = []
+    for i, (row, drone_id) in enumerate(zip(seen, _drone_ids(catalog, seen))):
+        drones.append({
+            "Drone ID": drone_id,
+            "base_rank": base_ranks.get(row),
+            "top_n_share": float(appearances[i] / n_variants),
+            "top1_share": float(firsts[i] / n_variants),
+            "mean_rank": float(rank_sums[i] / appearances[i]),
+            "best_rank": int(best_ranks[i]),
+            "worst_rank": int(worst_ranks[i]),
+            "mean_score (%)": round(float(score_sums[i] / appearances[i]), 2),
+        })
+    drones.sort(key=lambda drone: (-drone["top_n_share"], drone["mean_rank"]))
+    summary["drones"] = drones
+    return summary
+
+
+def _drone_ids(catalog, rows):
+    return list(catalog.rows(np.asarray(rows, dtype=np.int64))["Drone ID"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep the weights and report how stable the ranking is.")
+    parser.add_argument("input", help="JSON file with one user input (or a record with a 'user_input').")
+    parser.add_argument("--catalog", default=drone_selector.CATALOG_PATH, help="Catalog CSV or compiled .dcat.")
+    parser.add_argument("--weights", default=drone_selector.WEIGHTS_PATH,
+                        help="Default weights file; named profiles are weights.<name>.conf next to it.")
+    parser.add_argument("--profile", default=None, help="Base weights profile.")
+    parser.add_argument("--samples", type=int, default=1000, help="Random variants to evaluate.")
+    parser.add_argument("--spread", type=float, default=0.25, help="Relative weight perturbation.")
+    parser.add_argument("--blend-spread", type=float, default=0.0, help="Absolute W_knn perturbation.")
+    parser.add_argument("--feature", default=None, help="Sweep this weight alone over --factors.")
+    parser.add_argument("--factors", type=float, nargs="*", default=[0.0, 0.25, 0.5, 1.0, 2.0, 4.0])
+    parser.add_argument("--W-knn", type=float, default=0.6)
+    parser.add_argument("--W-detailed", type=float, default=0.4)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--constraints", nargs="*", choices=drone_selector.HARD_CONSTRAINTS, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with open(args.input, "r") as f:
+        record = json.load(f)
+    user_input = record.get("user_input", record)
+    catalog = drone_selector.get_catalog(args.catalog)
+    weights = drone_selector.WeightsProfileStore(args.weights).get(args.profile)
+    if args.feature:
+        variants = one_at_a_time_variants(weights, args.feature, args.factors)
+    else:
+        variants = perturbed_variants(weights, args.samples, args.spread, blend_spread=args.blend_spread,
+                                      W_knn=args.W_knn, W_detailed=args.W_detailed, seed=args.seed)
+
+    start = time.perf_counter()
+    summary = sweep_weights(user_input, weights, variants, W_knn=args.W_knn, W_detailed=args.W_detailed,
+                            top_n=args.top_n, catalog=catalog, constraints=args.constraints)
+    elapsed = time.perf_counter() - start
+
+    print(f"Evaluated {summary['variants']} variants in {elapsed * 1000:.1f} ms")
+    print("Base ranking: " + ", ".join(f"{drone['Drone ID']} ({drone['Total Score (%)']}%)"
+                                       for drone in summary["base"]))
+    print(f"Best drone kept in {summary['top1_stability']:.1%} of variants; "
+          f"mean top-{summary['top_n']} overlap {summary['mean_overlap']:.1%}")
+    width = max([len("Drone ID")] + [len(str(drone["Drone ID"])) for drone in summary["drones"]])
+    print(f"{'Drone ID':<{width}} {'base':>4} {'top-n':>7} {'top-1':>7} {'mean rank':>9} {'range':>7} {'score':>7}")
+    for drone in summary["drones"]:
+        base_rank = drone["base_rank"] or "-"
+        print(f"{str(drone['Drone ID']):<{width}} {base_rank:>4} {drone['top_n_share']:>7.1%} {drone['top1_share']:>7.1%} "
+              f"{drone['mean_rank']:>9.2f} {drone['best_rank']:>3}-{drone['worst_rank']:<3} "
+              f"{drone['mean_score (%)']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# service.py
+"""
+Local HTTP/JSON recommendation service.
+
+Keeps the catalog, its scaler and neighbour index, and the weights profiles warm in one
+process so callers skip the cold start of importing drone_selector. Uses only the
+standard library on top of the recommender's own dependencies.
+
+Endpoints:
+    POST /top_drones        {"user_input": {...}, "weights": {...}?, "profile": "cargo"?, "k", "top_n",
+                             "W_knn", "W_detailed", "exact", "constraints", "explain"}
+                            -> {"results": [...]}
+    POST /top_drones/batch  Same options with "user_inputs": [...] -> {"results": [[...], ...]}
+    GET  /health            -> {"status": "ok", "catalog_rows", "catalog_version"}
+    GET  /stats             -> Per-endpoint latency histograms, coalescing and table counters.
+    GET  /metrics           -> Per-stage pipeline metrics in the Prometheus text format (--metrics).
+
+Identical requests that arrive while one of them is being computed are coalesced: they
+wait for the first one and share its response. With --table, inputs on the precomputed
+grid of recommendation_table are answered from the table and only the rest are scored.
+
+Usage:
+    python service.py --port 8765
+    curl -s localhost:8765/top_drones -d '{"user_input": {"Budgets options": 3000}}'
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import batch_scoring
+import drone_selector
+import metrics
+import recommendation_table
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+# Latency is tracked per known endpoint; every other path shares one bucket, so probes cannot grow the stats
+TIMED_ENDPOINTS = {"GET /health", "GET /stats", "POST /top_drones", "POST /top_drones/batch"}
+OTHER_ENDPOINT = "other"
+QUERY_OPTIONS = {"k": 8, "top_n": 3, "W_knn": 0.6, "W_detailed": 0.4, "exact": False, "constraints": None,
+                 "explain": False}
+
+
+class LatencyHistogram:
+    """Latency histogram over fixed millisecond buckets."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = list(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)  # The last bucket is +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        ms = seconds * 1000.0
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self):
+        with self._lock:
+            # Cumulative counts, like Prometheus "le" buckets
+            cumulative = list(itertools.accumulate(self.counts))
+            buckets = {f"le_{bound}ms": count for bound, count in zip(self.buckets_ms, cumulative)}
+            buckets["le_inf"] = cumulative[-1]
+            return {"count": self.count, "mean_ms": self.total_ms / self.count if self.count else 0.0,
+                    "max_ms": self.max_ms, "buckets": buckets}
+
+
+class RequestCoalescer:
+    """Runs one computation per key at a time; concurrent callers with the same key share its result."""
+
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.coalesced = 0
+
+    def run(self, key, compute):
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "result": None, "error": None}
+                self._in_flight[key] = call
+                self.computed += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call["result"] = compute()
+            except Exception as e:
+                call["error"] = e
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                call["done"].set()
+        else:
+            call["done"].wait()
+
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class RecommendationService:
+    """
+    The recommender behind the HTTP handlers, usable without a server.
+
+    Args:
+        catalog_path (str): The drones catalog, CSV or compiled.
+        weights_path (str): Default weights for requests that carry none; named profiles sit next to it.
+        table_path (str, optional): A recommendation table to answer precomputed inputs from.
+    """
+
+    def __init__(self, catalog_path=drone_selector.CATALOG_PATH, weights_path=drone_selector.WEIGHTS_PATH,
+                 table_path=None):
+        self.catalog = drone_selector.get_catalog(catalog_path)
+        self.table = recommendation_table.RecommendationTable(table_path) if table_path else None
+        self.profiles = drone_selector.WeightsProfileStore(weights_path)
+        self.catalog.warm(self.profiles.get())
+        self.histograms = {}
+        self._histograms_lock = threading.Lock()
+        self.coalescer = RequestCoalescer()
+
+    def observe(self, endpoint, seconds):
+        with self._histograms_lock:
+            histogram = self.histograms.setdefault(endpoint, LatencyHistogram())
+        histogram.observe(seconds)
+
+    def _options(self, body):
+        unknown = set(body) - set(QUERY_OPTIONS) - {"user_input", "user_inputs", "weights", "profile"}
+        if unknown:
+            raise ValueError(f"Unknown fields: {sorted(unknown)}")
+        options = {name: body.get(name, default) for name, default in QUERY_OPTIONS.items()}
+        for name in ("k", "top_n"):
+            if not _is_int(options[name]) or options[name] < 1:
+                raise ValueError(f"'{name}' must be a positive integer")
+        for name in ("W_knn", "W_detailed"):
+            if not _is_number(options[name]):
+                raise ValueError(f"'{name}' must be a number")
+        for name in ("exact", "explain"):
+            if not isinstance(options[name], bool):
+                raise ValueError(f"'{name}' must be true or false")
+        constraints = options["constraints"]
+        if constraints is not None and (not isinstance(constraints, list)
+                                        or not all(isinstance(name, str) for name in constraints)):
+            raise ValueError("'constraints' must be a list of constraint names")
+        weights = body.get("weights")
+        if weights is not None and (not isinstance(weights, dict)
+                                    or not all(_is_number(value) for value in weights.values())):
+            raise ValueError("'weights' must be an object of criterion -> number")
+        profile = body.get("profile")
+        if profile is not None and not isinstance(profile, str):
+            raise ValueError("'profile' must be a string")
+        try:
+            weights = weights or self.profiles.get(profile)
+        except KeyError as e:
+            raise ValueError(e.args[0])
+        return weights, options
+
+    def _score(self, user_inputs, weights, options):
+        ranked = recommendation_table.recommend_batch(
+            user_inputs, weights, table=self.table, k=options["k"], W_knn=options["W_knn"],
+            W_detailed=options["W_detailed"], top_n=options["top_n"], catalog=self.catalog, exact=options["exact"],
+            constraints=options["constraints"])
+        return [[batch_scoring.result_to_json(drone, options["explain"]) for drone in drones] for drones in ranked]
+
+    def top_drones(self, body):
+        user_input = body.get("user_input")
+        if not isinstance(user_input, dict):
+            raise ValueError("'user_input' must be an object")
+        weights, options = self._options(body)
+        return {"results": self._score([user_input], weights, options)[0]}
+
+    def top_drones_batch(self, body):
+        user_inputs = body.get("user_inputs")
+        if not isinstance(user_inputs, list) or not all(isinstance(user_input, dict) for user_input in user_inputs):
+            raise ValueError("'user_inputs' must be a list of objects")
+        weights, options = self._options(body)
+        return {"results": self._score(user_inputs, weights, options)}
+
+    def handle(self, endpoint, body):
+        """Answers a POST endpoint, coalescing identical concurrent requests."""
+        handler = {"/top_drones": self.top_drones, "/top_drones/batch": self.top_drones_batch}[endpoint]
+        key = (endpoint, json.dumps(body, sort_keys=True))
+        return self.coalescer.run(key, lambda: handler(body))
+
+    def health(self):
+        return {"status": "ok", "catalog_rows": len(self.catalog), "catalog_version": self.catalog.version}
+
+    def stats(self):
+        with self._histograms_lock:
+            histograms = dict(self.histograms)
+        stats = {"latency": {endpoint: histogram.snapshot() for endpoint, histogram in histograms.items()},
+                 "coalescing": {"computed": self.coalescer.computed, "coalesced": self.coalescer.coalesced}}
+        if self.table is not None:
+            stats["table"] = self.table.stats()
+        return stats
+
+
+def make_handler(service):
+    """Builds the request handler class bound to a RecommendationService."""
+
+    class RecommendationHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, data, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_json(self, status, payload):
+            self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+        def _timed(self, respond):
+            start = time.perf_counter()
+            endpoint = self.path.split("?", 1)[0]
+            try:
+                status, payload = respond(endpoint)
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            self._send_json(status, payload)
+            name = f"{self.command} {endpoint}"
+            service.observe(name if name in TIMED_ENDPOINTS else OTHER_ENDPOINT, time.perf_counter() - start)
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] == "/metrics":
+                self._send(200, metrics.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+                return
+
+            def respond(endpoint):
+                if endpoint == "/health":
+                    return 200, service.health()
+                if endpoint == "/stats":
+                    return 200, service.stats()
+                return 404, {"error": f"Unknown endpoint {endpoint}"}
+            self._timed(respond)
+
+        def do_POST(self):
+            def respond(endpoint):
+                if endpoint not in ("/top_drones", "/top_drones/batch"):
+                    return 404, {"error": f"Unknown endpoint {endpoint}"}
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                    if not isinstance(body, dict):
+                        raise ValueError("The request body must be a JSON object")
+                except ValueError as e:  # Includes json.JSONDecodeError
+                    return 400, {"error": str(e)}
+                try:
+                    return 200, service.handle(endpoint, body)
+                except ValueError as e:
+                    return 400, {"error": str(e)}
+            self._timed(respond)
+
+        def log_message(self, format, *args):
+            pass  # Latency is reported through /stats instead of per-request logs
+
+    return RecommendationHandler
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Returns a threading HTTP server for service; port 0 picks a free port."""
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve drone recommendations over local HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--catalog", default=drone_selector.CATALOG_PATH, help="Catalog CSV or compiled .dcat.")
+    parser.add_argument("--weights", default=drone_selector.WEIGHTS_PATH)
+    parser.add_argument("--metrics", action="store_true", help="Record per-stage metrics for GET /metrics.")
+    parser.add_argument("--table", default=None,
+                        help="Recommendation table (see recommendation_table.py) to answer precomputed inputs from.")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+
+    service = RecommendationService(args.catalog, args.weights, args.table)
+    server = make_server(service, args.host, args.port)
+    print(f"Serving {len(service.catalog)} drones on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# skyline.py
+"""
+Pareto skyline (non-dominated set) of a point matrix, minimizing every column.
+
+skyline() is Sort-Filter-Skyline: rows are sorted by the sum of their min-max
+normalized values, ties broken by the values themselves, so a dominating row always
+comes before every row it dominates. The first remaining rows are therefore
+skyline members, and each one removes the rows it dominates from the rest with a
+vectorized column-wise comparison. The bulk of a large catalog is dominated by the
+first few members, so the cost is close to O(n log n + n * d * k) for a skyline of
+size k, instead of the O(n^2) of pairwise comparisons. Large inputs are first thinned
+by two pivot rows in O(n * d), so only the survivors are sorted. Two objectives take a
+single sort and a running minimum.
+
+Skyline keeps the result up to date as rows are inserted, updated and removed.
+"""
+
+import numpy as np
+
+HEAD_SIZE = 64  # Sorted rows whose own skyline is resolved per round
+PREFILTER_MIN_ROWS = 10_000  # Larger inputs are thinned by pivot rows before sorting
+
+
+def _dominated_mask(columns, point):
+    """Mask of the rows (given column-wise) that point dominates: no better anywhere, worse somewhere."""
+    dominated = columns[0] >= point[0]
+    for column, value in zip(columns[1:], point[1:]):
+        dominated &= column >= value
+    # Rows equal to point are not dominated by it
+    rows = np.flatnonzero(dominated)
+    strictly_worse = np.zeros(len(rows), dtype=bool)
+    for column, value in zip(columns, point):
+        strictly_worse |= column[rows] > value
+    dominated[rows[~strictly_worse]] = False
+    return dominated
+
+
+def _is_dominated(members, point):
+    if not len(members):
+        return False
+    return bool(np.any(np.all(members <= point, axis=1) & np.any(members < point, axis=1)))
+
+
+def _skyline_2d(rows, x, y):
+    """Skyline of rows sorted by (x, y): a row survives if its y beats every row with a smaller x."""
+    best_before = np.minimum.accumulate(np.concatenate([[np.inf], y[:-1]]))
+    survivors = y < best_before
+    # Duplicates of a survivor are not dominated by it either
+    group_starts = np.concatenate([[True], (x[1:] != x[:-1]) | (y[1:] != y[:-1])])
+    survivors = survivors[group_starts][np.cumsum(group_starts) - 1]
+    return np.sort(rows[survivors])
+
+
+def skyline(points, head_size=HEAD_SIZE):
+    """
+    Returns the rows of points that no other row dominates, minimizing every column.
+
+    Args:
+        points (np.ndarray): (n_rows, n_objectives) values; rows with NaN are ignored.
+        head_size (int): Sorted rows resolved per round before filtering the rest.
+
+    Returns:
+        np.ndarray: The skyline row indices, ascending. Identical rows are all kept.
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2:
+        raise ValueError("points must be a 2-D array")
+    candidates = np.flatnonzero(~np.isnan(points).any(axis=1))
+    if not len(candidates) or not points.shape[1]:
+        return candidates
+
+    values = points[candidates]
+    low = values.min(axis=0)
+    span = values.max(axis=0) - low
+    span[span == 0] = 1.0
+    normalized = (values - low) / span
+    normalized_sum = normalized.sum(axis=1)
+
+    # A row dominated by any row is off the skyline, so two balanced pivots thin a large input before the sort
+    if len(values) > PREFILTER_MIN_ROWS:
+        columns = [values[:, j] for j in range(values.shape[1])]
+        keep = np.ones(len(values), dtype=bool)
+        for pivot in {int(np.argmin(normalized_sum)), int(np.argmin(normalized.max(axis=1)))}:
+            keep &= ~_dominated_mask(columns, values[pivot])
+        candidates, values, normalized_sum = candidates[keep], values[keep], normalized_sum[keep]
+    # np.lexsort's last key is the primary one
+    keys = tuple(values[:, j] for j in reversed(range(values.shape[1])))
+    order = np.lexsort(keys if values.shape[1] == 2 else keys + (normalized_sum,))
+    rows = candidates[order]
+    columns = [np.ascontiguousarray(values[order, j]) for j in range(values.shape[1])]
+
+    if len(columns) == 2:
+        return _skyline_2d(rows, *columns)
+
+    found = []
+    while len(rows):
+        head = np.column_stack([column[:head_size] for column in columns])
+        winners = []
+        for i, point in enumerate(head):
+            if not _is_dominated(head[winners], point):
+                winners.append(i)
+        found.append(rows[winners])
+
+        rows = rows[len(head):]
+        columns = [column[len(head):] for column in columns]
+        for point in head[winners]:
+            if not len(rows):
+                break
+            keep = ~_dominated_mask(columns, point)
+            rows = rows[keep]
+            columns = [column[keep] for column in columns]
+    return np.sort(np.concatenate(found))
+
+
+class Skyline:
+    """
+    The skyline of a changing point set, patched per edited row instead of recomputed.
+
+    Args:
+        points (np.ndarray): (n_rows, n_objectives) values to minimize; NaN rows never enter.
+    """
+
+    def __init__(self, points):
+        points = np.asarray(points, dtype=float)
+        self.rows = skyline(points)
+        self.points = points[self.rows]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, row):
+        return bool(np.any(self.rows == row))
+
+    def insert(self, row, point):
+        """Adds a new or changed row; it enters if nothing dominates it and evicts the members it dominates."""
+        point = np.asarray(point, dtype=float)
+        if np.isnan(point).any() or _is_dominated(self.points, point):
+            return False
+        keep = ~(np.all(point <= self.points, axis=1) & np.any(point < self.points, axis=1))
+        self.rows = np.append(self.rows[keep], row)
+        self.points = np.vstack([self.points[keep], point])
+        return True
+
+    def remove(self, row, all_points):
+        """
+        Drops row. Only the rows it dominated can replace it, so only those are re-examined.
+
+        Args:
+            row (int): The removed or changed row.
+            all_points (callable): Returns the current (n_rows, n_objectives) matrix; called only
+                when row was a skyline member. Removed rows must be NaN in it.
+        """
+        member = np.flatnonzero(self.rows == row)
+        if not len(member):
+            return
+        removed = self.points[member[0]]
+        self.rows = np.delete(self.rows, member)
+        self.points = np.delete(self.points, member, axis=0)
+
+        points = np.asarray(all_points(), dtype=float)
+        freed = np.flatnonzero(_dominated_mask([points[:, j] for j in range(points.shape[1])], removed))
+        freed = freed[freed != row]
+        # A freed row cannot dominate a remaining member, which removed would then have dominated
+        for i in skyline(points[freed]):
+            if not _is_dominated(self.points, points[freed[i]]):
+                self.rows = np.append(self.rows, freed[i])
+                self.points = np.vstack([self.points, points[freed[i]]])
+
+    def update(self, row, point, all_points):
+        """Applies a changed row: removes its old values (if it was a member), then inserts the new ones."""
+        self.remove(row, all_points)
+        self.insert(row, point)
@@ -0,0 +1,186 @@
+# startup_benchmark.py
+"""
+Startup benchmark of the GUI: time-to-first-paint and time-to-first-recommendation.
+
+Every run launches a fresh interpreter, so imports and the catalog load are
+measured cold. The child imports GUI, shows the configuration window and
+records when it first paints; it then fills in the form and submits it right
+away (or, with --submit-after warmup, once the background warm-up is done, as
+when a user takes a while to fill in the form) and records when the
+recommendations arrive. All times are seconds since the child was launched.
+
+Without a display, Qt's offscreen platform is used. Weather comes from the
+location cache or the API, as in the GUI.
+
+Usage:
+    python startup_benchmark.py --runs 5 --output bench_results_startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+METRICS = ["import_s", "first_paint_s", "warmup_done_s", "first_recommendation_s"]
+
+BENCHMARK_FORM = {
+    "budget_entry": "8000",
+    "battery_entry": "60",
+    "dimensions_entry": "3000",
+    "storage_entry": "128",
+    "charging_entry": "60",
+}
+
+
+# --- Child ---
+def run_child(result_path, launched_at, submit_after):
+    """Starts the GUI, submits BENCHMARK_FORM and writes the timings to result_path."""
+    import_start = time.time()
+    import GUI
+    from PySide6.QtCore import QEvent, QObject, QTimer
+    from PySide6.QtWidgets import QApplication, QMessageBox
+
+    result = {"import_s": time.time() - import_start}
+
+    def elapsed():
+        return time.time() - launched_at
+
+    # Error dialogs would block the event loop; the message is recorded instead
+    QMessageBox.warning = lambda *args: None
+    QMessageBox.information = lambda *args: None
+
+    app = QApplication(sys.argv[:1])
+
+    def finish():
+        with open(result_path, "w") as f:
+            json.dump(result, f)
+        app.quit()
+
+    def submit():
+        if "submitted_s" not in result:
+            result["submitted_s"] = elapsed()
+            window.submit_form()
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and "first_paint_s" not in result:
+                result["first_paint_s"] = elapsed()
+                if submit_after == "paint":
+                    QTimer.singleShot(0, submit)
+            return False
+
+    window = GUI.DronePortConfig()
+    for name, value in BENCHMARK_FORM.items():
+        getattr(window, name).setText(value)
+
+    on_warmup_finished = window.on_warmup_finished
+
+    def warmup_finished(names, seconds):
+        on_warmup_finished(names, seconds)
+        result["warmup_done_s"] = elapsed()
+        if submit_after == "warmup":
+            submit()
+
+    def warmup_failed(message):
+        result["error"] = f"Warm-up failed: {message}"
+        finish()
+
+    # submit_form connects the instance attributes, so these wrappers receive the result
+    def request_finished(request_id, res):
+        result["first_recommendation_s"] = elapsed()
+        result["n_recommended"] = len(res)
+        finish()
+
+    def request_failed(request_id, message):
+        result["error"] = message
+        finish()
+
+    window.on_request_finished = request_finished
+    window.on_request_failed = request_failed
+    window.warmup_signals.finished.disconnect(window.on_warmup_finished)
+    window.warmup_signals.finished.connect(warmup_finished)
+    window.warmup_signals.failed.connect(warmup_failed)
+
+    paint_filter = FirstPaint()
+    window.installEventFilter(paint_filter)
+    window.show()
+    app.exec()
+
+
+# --- Parent ---
+def run_once(submit_after, timeout):
+    """Runs one cold start in a fresh interpreter and returns its timings."""
+    env = dict(os.environ)
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = os.path.join(tmp, "result.json")
+        command = [sys.executable, os.path.abspath(__file__), "--child", result_path,
+                   "--submit-after", submit_after, "--launched-at", repr(time.time())]
+        subprocess.run(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                       stdout=subprocess.DEVNULL, timeout=timeout, check=False)
+        if not os.path.exists(result_path):
+            return {"error": "The GUI exited without reporting"}
+        with open(result_path) as f:
+            return json.load(f)
+
+
+def summarize(runs):
+    """Returns the median and minimum of every metric over the runs that reported it."""
+    summary = {}
+    for metric in METRICS:
+        values = [run[metric] for run in runs if metric in run]
+        if values:
+            summary[metric] = {"median": round(statistics.median(values), 4), "min": round(min(values), 4)}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GUI startup: time-to-first-paint and time-to-first-recommendation.")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts; the median and minimum are reported.")
+    parser.add_argument("--submit-after", choices=["paint", "warmup"], default="paint",
+                        help="Submit the form as soon as the window paints, or once the warm-up has finished.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds before a run is abandoned.")
+    parser.add_argument("--output", default="bench_results_startup.json")
+    parser.add_argument("--child", metavar="RESULT_PATH", help=argparse.SUPPRESS)
+    parser.add_argument("--launched-at", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, args.launched_at, args.submit_after)
+        return
+
+    runs = []
+    for i in range(args.runs):
+        run = run_once(args.submit_after, args.timeout)
+        runs.append(run)
+        if "error" in run:
+            print(f"Run {i + 1}: Warning: {run['error']}")
+        else:
+            print(f"Run {i + 1}: " + ", ".join(f"{metric} {run[metric]:.3f}s" for metric in METRICS if metric in run))
+
+    summary = summarize(runs)
+    for metric, stats in summary.items():
+        print(f"{metric:>24}: median {stats['median']:.3f}s, min {stats['min']:.3f}s")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "submit_after": args.submit_after,
+        "runs": runs,
+        "summary": summary,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""A compiled (.dcat) catalog against the CSV it was compiled from, missing values included."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import drone_selector
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER_INPUT = {"Budgets options": 5000, "Battery Life": 40, "Payload Capacity": 1, "Camera Quality": "1080p"}
+WEIGHTS = {"Budgets options": 3.0, "Battery Life": 2.0, "Payload Capacity": 1.0, "Camera Quality": 1.0}
+GAPS = ["Payload Capacity", "Budgets options", "Battery Life", "Camera Quality", "Flight Radius"]
+
+
+@pytest.fixture
+def catalogs(tmp_path):
+    df = pd.read_csv(os.path.join(ROOT, "drones_dataset.csv"))
+    rng = np.random.default_rng(0)
+    for column in GAPS:
+        df.loc[rng.random(len(df)) < 0.2, column] = np.nan
+    csv_path = str(tmp_path / "gaps.csv")
+    df.to_csv(csv_path, index=False)
+    compiled_path = drone_selector.compile_catalog(csv_path)
+    return (drone_selector.DroneCatalog(csv_path, persist_indexes=False),
+            drone_selector.DroneCatalog(compiled_path, persist_indexes=False))
+
+
+def test_missing_values_stay_missing(catalogs):
+    from_csv, compiled = catalogs
+    columns = drone_selector.FUZZY_CRITERIA + ["Flight Radius"]
+    pd.testing.assert_frame_equal(compiled.columns(columns), from_csv.columns(columns), check_dtype=False)
+    pd.testing.assert_frame_equal(compiled.df, from_csv.df, check_dtype=False)
+
+
+def test_fuzzy_criteria_apply_to_the_same_drones(catalogs):
+    from_csv, compiled = catalogs
+    details = [drone_selector.score_fuzzy_criteria(catalog.columns(drone_selector.FUZZY_CRITERIA), USER_INPUT,
+                                                   WEIGHTS)[1] for catalog in catalogs]
+    assert details[0].keys() == details[1].keys()
+    for criterion in details[0]:
+        np.testing.assert_array_equal(details[0][criterion]["applies"], details[1][criterion]["applies"])
+        assert not details[1][criterion]["applies"].all()
+
+
+def test_rankings_match(catalogs):
+    from_csv, compiled = catalogs
+    for top_n in (5, len(from_csv)):
+        expected = drone_selector.get_top_drones(USER_INPUT, WEIGHTS, top_n=top_n, catalog=from_csv, use_cache=False)
+        ranked = drone_selector.get_top_drones(USER_INPUT, WEIGHTS, top_n=top_n, catalog=compiled, use_cache=False)
+        assert [(drone["Drone ID"], drone["Total Score (%)"]) for drone in ranked] == \
+               [(drone["Drone ID"], drone["Total Score (%)"]) for drone in expected]
+        assert [list(drone["Explanation"]) for drone in ranked] == [list(drone["Explanation"]) for drone in expected]
@@ -0,0 +1,52 @@
+"""score_fuzzy_criteria and fuzzy_explanations against the row-wise compute_detailed_scores_and_explanations."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import drone_selector
+
+CRITERIA = ["Payload Capacity", "Budgets options", "Battery Life"]
+WEIGHTS = {"Payload Capacity": 2.0, "Budgets options": 3.0, "Battery Life": 1.5}
+RANGES = {"Payload Capacity": (0.0, 45.0), "Budgets options": (0.0, 35000.0), "Battery Life": (0.0, 200.0)}
+
+
+def _breakpoints(criterion):
+    definitions = drone_selector.fuzzy_memberships.definitions[criterion]["sets"]
+    return sorted({float(value) for definition in definitions.values() for value in definition[1:]})
+
+
+def _assert_equivalent(drones, user_input, weights):
+    scores, details = drone_selector.score_fuzzy_criteria(drones, user_input, weights)
+    for position in range(len(drones)):
+        expected_score, expected_explanations = drone_selector.compute_detailed_scores_and_explanations(
+            drones.iloc[position], user_input, weights)
+        assert scores[position] == pytest.approx(expected_score, abs=1e-12)
+        assert drone_selector.fuzzy_explanations(details, position) == expected_explanations
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_values(seed):
+    rng = np.random.default_rng(seed)
+    drones = pd.DataFrame({criterion: rng.uniform(low, high, 200) for criterion, (low, high) in RANGES.items()})
+    drones.iloc[rng.choice(200, 10, replace=False), 0] = np.nan
+    user_input = {criterion: float(rng.uniform(low, high)) for criterion, (low, high) in RANGES.items()}
+    _assert_equivalent(drones, user_input, WEIGHTS)
+
+
+@pytest.mark.parametrize("criterion", CRITERIA)
+def test_breakpoint_values(criterion):
+    # Values on and next to every breakpoint, where the > 0.5 and tie branches switch
+    points = _breakpoints(criterion)
+    values = sorted({value + offset for value in points for offset in (-1e-9, 0.0, 1e-9)} | {
+        (a + b) / 2.0 for a, b in zip(points, points[1:])})
+    drones = pd.DataFrame({criterion: values})
+    for user_value in points:
+        _assert_equivalent(drones, {criterion: user_value}, {criterion: 1.0})
+
+
+def test_skipped_criteria():
+    drones = pd.DataFrame({"Payload Capacity": [5.0, np.nan], "Battery Life": [60.0, 90.0]})
+    # Budget is asked for but not in the table, battery has no weight
+    user_input = {"Payload Capacity": 4.0, "Budgets options": 3000.0, "Battery Life": 30.0}
+    _assert_equivalent(drones, user_input, {"Payload Capacity": 1.0, "Budgets options": 1.0})
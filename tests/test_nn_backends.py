@@ -0,0 +1,90 @@
+"""Nearest-neighbour backends over a weighted, memory-mapped matrix, against an exact scan."""
+
+import numpy as np
+import pytest
+
+import nn_backends
+
+N_ROWS, N_DIMS, N_NEIGHBORS = 2000, 6, 8
+
+
+@pytest.fixture
+def data(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = np.lib.format.open_memmap(str(tmp_path / "rows.npy"), mode="w+", dtype=float, shape=(N_ROWS, N_DIMS))
+    rows[:] = rng.random((N_ROWS, N_DIMS))
+    weights = rng.uniform(0.5, 2.0, N_DIMS)
+    queries = rng.random((5, N_DIMS)) * weights
+    return rows, weights, queries
+
+
+def _exact(rows, weights, queries):
+    distances = np.linalg.norm(np.asarray(rows) * weights - queries[:, None, :], axis=2)
+    indices = np.argsort(distances, axis=1, kind="stable")[:, :N_NEIGHBORS]
+    return np.take_along_axis(distances, indices, axis=1), indices
+
+
+def test_weighted_rows_weight_what_they_read(data):
+    rows, weights, _ = data
+    view = nn_backends.WeightedRows(rows, weights)
+    assert view.shape == (N_ROWS, N_DIMS) and len(view) == N_ROWS
+    np.testing.assert_allclose(view[[3, 1]], np.asarray(rows[[3, 1]]) * weights)
+    np.testing.assert_allclose(np.asarray(view), np.asarray(rows) * weights)
+
+
+@pytest.mark.parametrize("backend", [
+    nn_backends.BruteForceBackend(chunk_size=300),
+    nn_backends.TreeBackend("kd_tree"),
+    nn_backends.TreeBackend("ball_tree"),
+    nn_backends.IVFBackend(n_lists=10, n_probe=10),  # Probing every list is exact
+])
+def test_backends_match_an_exact_scan(data, backend):
+    rows, weights, queries = data
+    backend.fit(nn_backends.WeightedRows(rows, weights))
+    distances, indices = backend.kneighbors(queries, N_NEIGHBORS)
+    expected_distances, expected_indices = _exact(rows, weights, queries)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-12)
+
+
+def test_brute_force_keeps_the_view(data):
+    rows, weights, _ = data
+    view = nn_backends.WeightedRows(rows, weights)
+    assert nn_backends.BruteForceBackend().fit(view)._X is view
+
+
+@pytest.mark.parametrize("backend", [
+    nn_backends.TreeBackend("kd_tree"),
+    nn_backends.TreeBackend("ball_tree"),
+    nn_backends.IVFBackend(n_lists=10, n_probe=3),
+])
+def test_saved_backends_answer_like_the_fitted_ones(data, tmp_path, backend):
+    rows, weights, queries = data
+    view = nn_backends.WeightedRows(rows, weights)
+    path = str(tmp_path / "index.idx")
+    backend.fit(view).save(path, "catalog.weights")
+    loaded = nn_backends.load_backend(backend.name, path, view, "catalog.weights")
+    for got, expected in zip(loaded.kneighbors(queries, N_NEIGHBORS), backend.kneighbors(queries, N_NEIGHBORS)):
+        np.testing.assert_array_equal(got, expected)
+
+
+def test_saved_trees_hold_no_rows_and_no_pickles(data, tmp_path):
+    rows, weights, _ = data
+    path = str(tmp_path / "index.idx")
+    nn_backends.TreeBackend("kd_tree").fit(nn_backends.WeightedRows(rows, weights)).save(path, "catalog.weights")
+    with np.load(path, allow_pickle=False) as saved:
+        assert all(saved[name].dtype != object for name in saved.files)
+        assert not any(saved[name].shape == rows.shape for name in saved.files)
+
+
+def test_indexes_saved_for_other_rows_are_rejected(data, tmp_path):
+    rows, weights, _ = data
+    view = nn_backends.WeightedRows(rows, weights)
+    path = str(tmp_path / "index.idx")
+    nn_backends.TreeBackend("kd_tree").fit(view).save(path, "catalog.weights")
+    with pytest.raises(ValueError):
+        nn_backends.load_backend("kd_tree", path, view, "other-catalog.weights")
+    with pytest.raises(ValueError):
+        nn_backends.load_backend("kd_tree", path, nn_backends.WeightedRows(rows[:-1], weights), "catalog.weights")
+    with pytest.raises(ValueError):
+        nn_backends.load_backend("ball_tree", path, view, "catalog.weights")
@@ -0,0 +1,56 @@
+"""A small recommendation table, built without Qt, against live scoring."""
+
+import itertools
+import os
+import sys
+
+import pytest
+
+import drone_selector
+import form_input
+import location
+import recommendation_table
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGION = "Baltic Sea"
+TYPED_GRID = {
+    "Port Location": [REGION],
+    "Port Size": ["Small", "Big"],
+    "Camera Performance": ["1080p"],
+    "Budget (€)": [3000, 10000],
+    "Battery Life (min)": [60],
+    "Dimensions (cm³)": [3000],
+    "Storage (GB)": [64],
+}
+
+
+@pytest.fixture
+def table_path(tmp_path, monkeypatch):
+    # The build fetches the weather of every location on the grid; serve it from a seeded cache
+    cache = location.WeatherCache(path=str(tmp_path / "weather.json"))
+    cache.put(*location.port_coords[REGION], {"region": REGION, "period": "seeded", "average_max_wind_kmh": 30.0,
+                                               "average_min_temp_C": 2.0})
+    monkeypatch.setattr(location, "weather_cache", cache)
+    path = str(tmp_path / "grid.dtab")
+    recommendation_table.build_table(path, typed_grid=TYPED_GRID, weights_path=os.path.join(ROOT, "weights.conf"),
+                                     catalog_path=os.path.join(ROOT, "drones_dataset.csv"))
+    return path
+
+
+def test_build_does_not_need_qt(table_path):
+    assert "PySide6" not in sys.modules
+
+
+def test_grid_inputs_are_answered_like_live_scoring(table_path):
+    table = recommendation_table.RecommendationTable(table_path)
+    catalog = drone_selector.get_catalog(os.path.join(ROOT, "drones_dataset.csv"))
+    weights = drone_selector.WeightsProfileStore(os.path.join(ROOT, "weights.conf")).get()
+    grid = recommendation_table.form_grid(TYPED_GRID)
+    for values in itertools.product(*grid.values()):
+        user_input = form_input.transform_user_input(dict(zip(grid, values)))
+        answered = table.lookup(user_input, weights, catalog=catalog)
+        live = drone_selector.get_top_drones(user_input, weights, catalog=catalog, use_cache=False)
+        assert answered is not None
+        assert [(drone["Drone ID"], drone["Total Score (%)"]) for drone in answered] == \
+               [(drone["Drone ID"], drone["Total Score (%)"]) for drone in live]
+    assert table.stats()["misses"] == 0
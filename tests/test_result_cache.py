@@ -0,0 +1,117 @@
+"""result_cache: hits and misses, expiry, eviction, invalidation and cache keys."""
+
+import os
+import time
+
+import pytest
+
+import drone_selector
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "drones_dataset.csv")
+USER_INPUT = {"Budgets options": 5000, "Battery Life": 40, "Payload Capacity": 1}
+WEIGHTS = {"Budgets options": 3.0, "Battery Life": 2.0, "Payload Capacity": 1.0}
+
+
+@pytest.fixture
+def catalog():
+    return drone_selector.DroneCatalog(CATALOG_PATH, persist_indexes=False)
+
+
+@pytest.fixture
+def weights_path(tmp_path):
+    path = tmp_path / "weights.conf"
+    path.write_text("Budgets options: 3.0\n")
+    return str(path)
+
+
+def _key(cache, catalog, user_input=USER_INPUT):
+    return cache.make_key(catalog, user_input, WEIGHTS, {})
+
+
+def test_hits_and_misses_are_counted(catalog, weights_path):
+    cache = drone_selector.ResultCache(weights_path=weights_path)
+    key = _key(cache, catalog)
+    assert cache.get(catalog, key) is None
+    cache.put(catalog, key, [{"Drone ID": "a"}])
+    assert cache.get(catalog, key) == [{"Drone ID": "a"}]
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_hits_are_copies(catalog, weights_path):
+    cache = drone_selector.ResultCache(weights_path=weights_path)
+    key = _key(cache, catalog)
+    cache.put(catalog, key, [{"Drone ID": "a"}])
+    cache.get(catalog, key)[0]["Drone ID"] = "changed"
+    assert cache.get(catalog, key) == [{"Drone ID": "a"}]
+
+
+def test_entries_expire_after_the_ttl(catalog, weights_path):
+    cache = drone_selector.ResultCache(ttl=0.05, weights_path=weights_path)
+    key = _key(cache, catalog)
+    cache.put(catalog, key, [{"Drone ID": "a"}])
+    assert cache.get(catalog, key) is not None
+    time.sleep(0.1)
+    assert cache.get(catalog, key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(catalog, weights_path):
+    cache = drone_selector.ResultCache(max_entries=2, weights_path=weights_path)
+    keys = [_key(cache, catalog, {"Budgets options": budget}) for budget in (1000, 2000, 3000)]
+    cache.put(catalog, keys[0], [])
+    cache.put(catalog, keys[1], [])
+    cache.get(catalog, keys[0])  # keys[1] is now the least recently used
+    cache.put(catalog, keys[2], [])
+    assert cache.get(catalog, keys[1]) is None
+    assert cache.get(catalog, keys[0]) == [] and cache.get(catalog, keys[2]) == []
+
+
+def test_catalog_edit_invalidates_its_entries(catalog, weights_path):
+    cache = drone_selector.ResultCache(weights_path=weights_path)
+    other = drone_selector.DroneCatalog(CATALOG_PATH, persist_indexes=False)
+    key, other_key = _key(cache, catalog), _key(cache, other)
+    cache.put(catalog, key, [])
+    cache.put(other, other_key, [])
+    version = catalog.version
+    catalog.delete_drone(catalog.df["Drone ID"].iloc[0])
+    assert catalog.version > version
+    assert cache.get(catalog, key) is None
+    assert cache.get(catalog, _key(cache, catalog)) is None
+    assert cache.get(other, other_key) == []
+
+
+def test_weights_file_change_clears_the_cache(catalog, weights_path):
+    cache = drone_selector.ResultCache(weights_path=weights_path)
+    key = _key(cache, catalog)
+    cache.put(catalog, key, [])
+    assert cache.get(catalog, key) == []
+    mtime = os.path.getmtime(weights_path)
+    os.utime(weights_path, (mtime + 10, mtime + 10))
+    assert cache.get(catalog, key) is None
+
+
+def test_cached_explanations_ignore_later_changes_to_the_callers_dicts(catalog):
+    user_input, weights = dict(USER_INPUT), dict(WEIGHTS)
+    first = drone_selector.get_top_drones(user_input, weights, catalog=catalog)
+    # The GUI reuses its form dict between submissions
+    user_input["Budgets options"] = 1.0
+    weights["Budgets options"] = 0.0
+    cached = drone_selector.get_top_drones(dict(USER_INPUT), dict(WEIGHTS), catalog=catalog)
+    uncached = drone_selector.get_top_drones(dict(USER_INPUT), dict(WEIGHTS), catalog=catalog, use_cache=False)
+    for drones in (first, cached):
+        assert [list(drone["Explanation"]) for drone in drones] == \
+               [list(drone["Explanation"]) for drone in uncached]
+    assert any("User wants <= 5000" in line for line in cached[0]["Explanation"])
+
+
+def test_catalog_tokens_are_unique():
+    tokens = {drone_selector.DroneCatalog(CATALOG_PATH).token for _ in range(100)}
+    assert len(tokens) == 100
+
+
+def test_cache_keys_differ_between_catalogs_over_the_same_path():
+    # id() of a collected catalog can be reused by the next one, which starts at the same version
+    first, second = drone_selector.DroneCatalog(CATALOG_PATH), drone_selector.DroneCatalog(CATALOG_PATH)
+    cache = drone_selector.ResultCache(weights_path=None)
+    assert _key(cache, first) != _key(cache, second)
+    assert first.token in drone_selector.ResultCache.catalog_key(first)
@@ -0,0 +1,68 @@
+"""The recommendation service on localhost: responses and request validation."""
+
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import service
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER_INPUT = {"Budgets options": 3000}
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    recommendation_service = service.RecommendationService(os.path.join(ROOT, "drones_dataset.csv"),
+                                                           os.path.join(ROOT, "weights.conf"))
+    server = service.make_server(recommendation_service, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _post(base_url, endpoint, body):
+    request = urllib.request.Request(base_url + endpoint, data=json.dumps(body).encode("utf-8"), method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_top_drones(base_url):
+    status, payload = _post(base_url, "/top_drones", {"user_input": USER_INPUT, "top_n": 5})
+    assert status == 200
+    assert len(payload["results"]) == 5
+
+
+def test_batch(base_url):
+    status, payload = _post(base_url, "/top_drones/batch", {"user_inputs": [USER_INPUT, USER_INPUT]})
+    assert status == 200
+    assert payload["results"][0] == payload["results"][1]
+
+
+@pytest.mark.parametrize("options", [
+    {"k": "x"}, {"k": 0}, {"top_n": -1}, {"top_n": 2.5}, {"W_knn": "a"}, {"exact": "yes"},
+    {"weights": [1, 2]}, {"weights": {"Budgets options": "x"}}, {"constraints": "within_budget"},
+    {"profile": 3}, {"profile": "no-such-profile"}, {"unknown": 1},
+])
+def test_invalid_options_are_rejected(base_url, options):
+    status, payload = _post(base_url, "/top_drones", {"user_input": USER_INPUT, **options})
+    assert status == 400, payload
+
+
+def test_unknown_paths_share_one_latency_bucket(base_url):
+    for path in ("/probe-1", "/probe-2", "/health/x"):
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(base_url + path)
+        _post(base_url, path, {})
+    with urllib.request.urlopen(base_url + "/stats") as response:
+        latency = json.load(response)["latency"]
+    assert set(latency) <= service.TIMED_ENDPOINTS | {service.OTHER_ENDPOINT}
+    assert latency[service.OTHER_ENDPOINT]["count"] >= 6
@@ -0,0 +1,80 @@
+"""get_historical_weather_open_meteo and WeatherCache against a local stub of the archive API."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import location
+
+REGION = "Baltic Sea"
+DAILY = {"daily": {"temperature_2m_min": [-2.0, 4.0], "wind_speed_10m_max": [20.0, 30.0]}}
+
+
+@pytest.fixture
+def stub():
+    """A local archive endpoint; yields (base_url, request counter)."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            data = json.dumps(DAILY).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1/era5", requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return location.WeatherCache(path=str(tmp_path / "weather.json"))
+
+
+def test_fresh_entry_is_served_without_a_request(stub, cache):
+    base_url, requests_seen = stub
+    first = location.get_historical_weather_open_meteo(REGION, cache=cache, base_url=base_url)
+    second = location.get_historical_weather_open_meteo(REGION, cache=cache, base_url=base_url)
+    assert first == second
+    assert first["average_max_wind_kmh"] == 25.0 and first["average_min_temp_C"] == 1.0
+    assert len(requests_seen) == 1
+
+
+def test_refetch_replaces_the_entry(stub, cache):
+    base_url, requests_seen = stub
+    for _ in range(3):
+        location.get_historical_weather_open_meteo(REGION, cache=cache, base_url=base_url, ttl=0)
+    assert len(requests_seen) == 3
+    with open(cache.path) as f:
+        assert list(json.load(f)) == [cache.make_key(*location.port_coords[REGION])]
+
+
+def test_stale_entry_is_served_when_the_api_is_down(stub, cache):
+    base_url, _ = stub
+    fetched = location.get_historical_weather_open_meteo(REGION, cache=cache, base_url=base_url)
+    unreachable = "http://127.0.0.1:9/v1/era5"
+    assert location.get_historical_weather_open_meteo(REGION, cache=cache, base_url=unreachable, ttl=0,
+                                                      timeout=2) == fetched
+
+
+def test_dated_keys_are_folded_into_one_entry(tmp_path):
+    path = tmp_path / "weather.json"
+    path.write_text(json.dumps({
+        "58.0,20.0|2025-01-01|2026-01-01": {"fetched_at": 1.0, "data": {"period": "old"}},
+        "58.0,20.0|2025-01-02|2026-01-02": {"fetched_at": 2.0, "data": {"period": "new"}},
+    }))
+    cache = location.WeatherCache(path=str(path))
+    assert cache.get_latest(58.0, 20.0) == {"period": "new"}
+    assert cache.get(58.0, 20.0) is None  # Older than the TTL